@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class APIArchitectAgent(BaseAgent):
     """Agent specialized in designing RESTful APIs and API contracts"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("API_Architect", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("API_Architect", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Design comprehensive API architecture"""
         self.log("Starting API architecture design")
         
@@ -35,7 +36,7 @@ Provide:
 
 Format as a detailed API specification document."""
         
-        api_design = self.generate_code(prompt, {
+        api_design = await self.generate_code_async(prompt, {
             "app_type": app_type,
             "architecture": architecture
         })
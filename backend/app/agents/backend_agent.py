@@ -1,14 +1,15 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.agents.base_agent import BaseAgent
+from app.core.llm_client import LLMClient
 
 class BackendAgent(BaseAgent):
     """Specialized agent for backend development"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("BackendAgent", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("BackendAgent", llm_provider, llm_client)
         self.expertise = "Backend architecture, API design, database modeling, business logic"
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Execute backend development task"""
         self.log("Starting backend development task")
         
@@ -19,21 +20,19 @@ class BackendAgent(BaseAgent):
         # Generate backend structure
         backend_structure = self._generate_structure(project_type, architecture)
         
-        # Generate API endpoints
-        api_code = self._generate_api_endpoints(requirements)
-        
-        # Generate models
-        models_code = self._generate_models(requirements)
-        
-        # Generate services
-        services_code = self._generate_services(requirements)
+        # Generate API endpoints, models and services concurrently, or in one batched request
+        generated = await self.generate_sections_async({
+            "api_code": self._generate_api_endpoints_prompt(requirements),
+            "models_code": self._generate_models_prompt(requirements),
+            "services_code": self._generate_services_prompt(requirements)
+        }, shared_text=requirements)
         
         return {
             "status": "success",
             "structure": backend_structure,
-            "api_code": api_code,
-            "models_code": models_code,
-            "services_code": services_code,
+            "api_code": generated["api_code"],
+            "models_code": generated["models_code"],
+            "services_code": generated["services_code"],
             "message": "Backend architecture generated successfully"
         }
     
@@ -56,8 +55,8 @@ class BackendAgent(BaseAgent):
             }
         return {}
     
-    def _generate_api_endpoints(self, requirements: str) -> str:
-        """Generate API endpoints based on requirements"""
+    def _generate_api_endpoints_prompt(self, requirements: str) -> str:
+        """Prompt to generate API endpoints based on requirements"""
         prompt = f"""Generate FastAPI endpoint code for the following requirements:
 
 {requirements}
@@ -71,10 +70,10 @@ Create RESTful API endpoints with:
 
 Provide complete, production-ready code."""
         
-        return self.generate_code(prompt)
+        return prompt
     
-    def _generate_models(self, requirements: str) -> str:
-        """Generate database models"""
+    def _generate_models_prompt(self, requirements: str) -> str:
+        """Prompt to generate database models"""
         prompt = f"""Generate Pydantic models for MongoDB based on:
 
 {requirements}
@@ -88,10 +87,10 @@ Include:
 
 Provide complete model definitions."""
         
-        return self.generate_code(prompt)
+        return prompt
     
-    def _generate_services(self, requirements: str) -> str:
-        """Generate business logic services"""
+    def _generate_services_prompt(self, requirements: str) -> str:
+        """Prompt to generate business logic services"""
         prompt = f"""Generate service layer code for:
 
 {requirements}
@@ -104,4 +103,4 @@ Include:
 
 Provide complete service implementations."""
         
-        return self.generate_code(prompt)
+        return prompt
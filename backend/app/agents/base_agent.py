@@ -1,34 +1,182 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional, Awaitable, List, Tuple
+from contextlib import aclosing
+from app.core.llm_client import LLMClient, LLMUnavailableError
+from app.core.config import settings
+from app.core.concurrency import gather_limited
+from app.core.background_loop import background_loop
+from app.core.similarity_cache import llm_similarity_cache
+from app.core.llm_context import record_llm_near_duplicate
+from app.agents.run_context import current_output_sink, OutputSink
+from app.agents.code_blocks import CodeBlockExtractor
+from app.agents.context_budget import ContextBudgeter, fit_context
+from app.agents.prompt_batch import build_batch_prompt, parse_batch_response
+import asyncio
+import hashlib
 import logging
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
 class BaseAgent(ABC):
     """Base class for all specialized agents"""
     
-    def __init__(self, name: str, llm_provider: str = "emergent"):
+    # Terms that make context relevant to this agent; ranks sections when context must be trimmed
+    context_focus: str = ""
+    
+    def __init__(self, name: str, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
         self.name = name
-        self.llm_client = LLMClient(provider=llm_provider)
+        # Agents hold no per-run state, so one client can be shared by every agent
+        self.llm_client = llm_client or LLMClient(provider=llm_provider)
         self.logger = logging.getLogger(f"agent.{name}")
+        # Upper bound on independent LLM sub-tasks this agent runs at once
+        self.max_concurrent_subtasks = settings.AGENT_SUBTASK_CONCURRENCY
+        # Token budget for the context attached to this agent's prompts
+        self.context_budget = settings.AGENT_CONTEXT_BUDGETS.get(name, settings.AGENT_CONTEXT_TOKENS)
     
     @abstractmethod
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the agent's task"""
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the agent's task without blocking the event loop"""
         pass
     
+    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the agent's task synchronously (runs execute_async on the background loop)"""
+        return background_loop.run(self.execute_async(task))
+    
     def generate_code(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Generate code using LLM"""
         full_prompt = self._build_prompt(prompt, context)
         return self.llm_client.generate(full_prompt, temperature=0.2, max_tokens=3000)
     
+    async def generate_code_async(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate code using LLM (async)
+        When an output sink is active (someone is watching the run), the response
+        is streamed to it as it arrives; the full text is returned either way.
+        """
+        return await self._generate(self._build_prompt(prompt, context))
+    
+    async def generate_code_reusable_async(
+        self,
+        prompt: str,
+        similar_text: str,
+        context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Generate code, reusing the response to a near-duplicate prompt when the
+        similarity cache is enabled. similar_text is the part of the prompt that
+        is compared fuzzily (e.g. the requirements); the rest must match exactly.
+        Returns (code, match), where match describes the near-duplicate that was
+        reused (similarity and matched text) or is None for a fresh response.
+        """
+        full_prompt = self._build_prompt(prompt, context)
+        namespace = None
+        if llm_similarity_cache.enabled and similar_text:
+            template = full_prompt.replace(similar_text, "\x00")
+            namespace = f"{self.name}:{self.llm_client.model}:{hashlib.sha256(template.encode('utf-8')).hexdigest()}"
+            match = llm_similarity_cache.lookup(namespace, similar_text)
+            if match:
+                record_llm_near_duplicate()
+                self.log(f"Reusing the response to a near-duplicate prompt (similarity {match['similarity']})")
+                return match.pop("response"), match
+        
+        code = await self._generate(full_prompt)
+        if namespace:
+            llm_similarity_cache.store(namespace, similar_text, code)
+        return code, None
+    
+    async def generate_sections_async(self, prompts: Dict[str, str], shared_text: str = "") -> Dict[str, str]:
+        """
+        Generate code for several independent sub-prompts and return it by name.
+        With AGENT_BATCH_PROMPTS they go out as one request with delimited
+        sections and shared_text (e.g. the requirements) sent once; sections
+        missing from the response are retried as separate calls. Otherwise
+        each sub-prompt is its own call, run concurrently.
+        """
+        results: Dict[str, str] = {}
+        if settings.AGENT_BATCH_PROMPTS and len(prompts) > 1:
+            try:
+                response = await self._generate(
+                    build_batch_prompt(prompts, shared_text), max_tokens=3000 * len(prompts)
+                )
+                results = parse_batch_response(response, prompts)
+            except (LLMUnavailableError, asyncio.TimeoutError):
+                # Separate calls would fail the same way
+                raise
+            except Exception as e:
+                self.log(f"Batched request failed, falling back to separate calls: {str(e)}", "warning")
+            missing = [name for name in prompts if name not in results]
+            if missing and results:
+                self.log(f"Batched response lacked sections {missing}, generating them separately", "warning")
+        
+        results.update(await self.run_subtasks({
+            name: self.generate_code_async(prompt) for name, prompt in prompts.items() if name not in results
+        }))
+        return {name: results[name] for name in prompts}
+    
+    async def _generate(self, full_prompt: str, max_tokens: int = 3000) -> str:
+        """Send a built prompt to the LLM, streaming it when an output sink is active"""
+        sink = current_output_sink()
+        if sink is not None and settings.LLM_STREAMING_ENABLED:
+            return await self._generate_streamed(full_prompt, sink, max_tokens)
+        return await self.llm_client.generate_async(
+            full_prompt, temperature=0.2, max_tokens=max_tokens, latency_key=self.name
+        )
+    
+    async def _generate_streamed(self, full_prompt: str, sink: OutputSink, max_tokens: int = 3000) -> str:
+        """Stream a response to sink, coalescing small deltas and extracting code blocks as they complete"""
+        stream_id = uuid.uuid4().hex[:12]
+        extractor = CodeBlockExtractor()
+        parts: List[str] = []
+        pending: List[str] = []
+        blocks: List[Dict[str, Any]] = []
+        sequence = 0
+        last_flush = time.monotonic()
+        
+        async def flush():
+            nonlocal sequence, last_flush
+            await sink(stream_id, sequence, "".join(pending), list(blocks))
+            sequence += 1
+            last_flush = time.monotonic()
+            pending.clear()
+            blocks.clear()
+        
+        async with aclosing(self.llm_client.generate_stream(
+            full_prompt, temperature=0.2, max_tokens=max_tokens, latency_key=self.name
+        )) as stream:
+            async for delta in stream:
+                parts.append(delta)
+                pending.append(delta)
+                blocks.extend(extractor.feed(delta))
+                # Completed code blocks go out immediately; plain text is batched
+                if blocks or time.monotonic() - last_flush >= settings.LLM_STREAM_FLUSH_INTERVAL:
+                    await flush()
+        blocks.extend(extractor.close())
+        if pending or blocks:
+            await flush()
+        return "".join(parts)
+    
+    async def run_subtasks(self, subtasks: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+        """
+        Run independent sub-tasks concurrently and return their results by name.
+        At most max_concurrent_subtasks run at once; if one fails the rest are cancelled.
+        """
+        return await gather_limited(subtasks, self.max_concurrent_subtasks)
+    
+    def fit_context(self, text: str, default: str = "N/A") -> str:
+        """Fit context text (e.g. a code summary) into this agent's budget, keeping what matters most to it"""
+        return fit_context(text, self.context_budget, self.context_focus, default)
+    
     def _build_prompt(self, prompt: str, context: Optional[Dict[str, Any]]) -> str:
-        """Build a comprehensive prompt with context"""
+        """Build a comprehensive prompt with context, within the agent's context budget"""
         if not context:
             return prompt
         
-        context_str = "\n".join([f"{k}: {v}" for k, v in context.items()])
+        budgeter = ContextBudgeter(self.context_budget, f"{self.context_focus} {prompt}")
+        for key, value in context.items():
+            budgeter.add(key, value)
+        context_str = budgeter.render()
         return f"""Context:
 {context_str}
 
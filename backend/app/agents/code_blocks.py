@@ -0,0 +1,66 @@
+"""
+Incremental extraction of fenced code blocks from streamed LLM output
+"""
+from typing import Dict, Any, List, Optional
+
+
+class CodeBlockExtractor:
+    """
+    Feed text as it arrives; each ``` fenced block is returned as soon as its
+    closing fence has been seen, without waiting for the rest of the response
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._language: Optional[str] = None
+        self._lines: List[str] = []
+        self._in_block = False
+        self.blocks: List[Dict[str, Any]] = []
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of text and return the blocks it completed"""
+        self._pending += text
+        completed = []
+        # Only whole lines can be classified as fences or code
+        while "\n" in self._pending:
+            line, self._pending = self._pending.split("\n", 1)
+            block = self._consume_line(line)
+            if block:
+                completed.append(block)
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush the final line; a block left open at the end is returned as incomplete"""
+        completed = []
+        if self._pending:
+            block = self._consume_line(self._pending)
+            self._pending = ""
+            if block:
+                completed.append(block)
+        if self._in_block:
+            completed.append(self._emit(complete=False))
+        return completed
+
+    def _consume_line(self, line: str) -> Optional[Dict[str, Any]]:
+        if line.strip().startswith("```"):
+            if self._in_block:
+                return self._emit(complete=True)
+            self._in_block = True
+            self._language = line.strip()[3:].strip() or None
+            self._lines = []
+        elif self._in_block:
+            self._lines.append(line)
+        return None
+
+    def _emit(self, complete: bool) -> Dict[str, Any]:
+        block = {
+            "index": len(self.blocks),
+            "language": self._language,
+            "code": "\n".join(self._lines),
+            "complete": complete
+        }
+        self.blocks.append(block)
+        self._in_block = False
+        self._language = None
+        self._lines = []
+        return block
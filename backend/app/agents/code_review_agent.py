@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class CodeReviewAgent(BaseAgent):
     """Agent specialized in code review and quality assurance"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("Code_Reviewer", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("Code_Reviewer", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Perform comprehensive code review"""
         self.log("Starting code review")
         
@@ -17,7 +18,7 @@ class CodeReviewAgent(BaseAgent):
         prompt = f"""Perform comprehensive code review and quality assurance:
 
 Platform: {platform}
-Code Context: {code_context[:2000] if code_context else 'Complete application codebase'}
+Code Context: {self.fit_context(code_context, 'Complete application codebase')}
 
 Provide detailed review covering:
 
@@ -102,7 +103,7 @@ Provide:
 - Quality score (1-10)
 - Actionable improvement plan"""
         
-        review_results = self.generate_code(prompt, {
+        review_results = await self.generate_code_async(prompt, {
             "platform": platform
         })
         
@@ -0,0 +1,166 @@
+"""
+Token-budgeted prompt context
+Assembles named context sections into a prompt fragment that fits a token
+budget. Sections are ranked by weight and by how relevant they are to the
+task; those that do not fit are condensed to their signatures, cut at a line
+boundary, or dropped, most relevant first.
+"""
+from typing import Dict, Any, List, Optional
+import re
+from app.core.token_counter import count_tokens
+
+# Header the budgeter renders sections under; split_sections() parses it back
+SECTION_HEADER = "### "
+
+# Lines that outline code: imports, declarations, decorators, routes and fences
+_SIGNATURE = re.compile(
+    r"^(#{1,4} |\s*(```|@|def |async def |class |import |from \S+ import|export |function |interface |type \w+ =|"
+    r"const \w+ = (async )?\(|(router|app)\.(get|post|put|patch|delete)\(|CREATE ))"
+)
+_WORD = re.compile(r"[a-z][a-z0-9_]{2,}")
+
+# Sections smaller than this after cutting are not worth including
+MIN_SECTION_TOKENS = 40
+
+_CUT_MARKER = "... (cut to fit the context budget)"
+_OMITTED_NOTE_TOKENS = 30
+
+
+def format_value(value: Any, indent: int = 0) -> str:
+    """Render a context value as readable text instead of a Python repr"""
+    pad = "  " * indent
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                lines.append(f"{pad}{key}:")
+                lines.append(format_value(item, indent + 1))
+            elif isinstance(item, str) and "\n" in item:
+                lines.append(f"{pad}{key}:")
+                lines.append(item if not pad else "\n".join(pad + "  " + line for line in item.splitlines()))
+            else:
+                lines.append(f"{pad}{key}: {item}")
+        return "\n".join(lines)
+    if isinstance(value, list):
+        if all(not isinstance(item, (dict, list)) for item in value):
+            return pad + ", ".join(str(item) for item in value)
+        return "\n".join(f"{pad}- {format_value(item, indent + 1).strip()}" for item in value)
+    return f"{pad}{value}"
+
+
+def condense_code(text: str) -> str:
+    """Outline of a code or markdown text: declarations and signatures, without bodies"""
+    lines = [line for line in text.splitlines() if _SIGNATURE.match(line)]
+    # A lone opening fence would leave the rest of the prompt inside a code block
+    if sum(1 for line in lines if line.strip().startswith("```")) % 2:
+        lines.append("```")
+    return "\n".join(lines)
+
+
+def cut_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of whole lines within max_tokens, marked as cut"""
+    lines = text.splitlines()
+    # Leave room for the marker and a closing fence
+    budget = max_tokens - count_tokens(_CUT_MARKER) - 3
+    kept, used = [], 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) == len(lines):
+        return text
+    if sum(1 for line in kept if line.strip().startswith("```")) % 2:
+        kept.append("```")
+    kept.append(_CUT_MARKER)
+    return "\n".join(kept)
+
+
+def split_sections(text: str) -> List[Dict[str, str]]:
+    """Parse text rendered by ContextBudgeter back into sections; plain text is one section"""
+    sections: List[Dict[str, str]] = []
+    for line in text.splitlines():
+        if line.startswith(SECTION_HEADER):
+            sections.append({"name": line[len(SECTION_HEADER):].strip(), "lines": []})
+        elif sections:
+            sections[-1]["lines"].append(line)
+        elif line.strip():
+            sections.append({"name": "context", "lines": [line]})
+    return [{"name": s["name"], "content": "\n".join(s["lines"]).strip()} for s in sections]
+
+
+class ContextBudgeter:
+    """Collects context sections and renders the most useful ones within max_tokens"""
+
+    def __init__(self, max_tokens: int, query: str = ""):
+        self.max_tokens = max_tokens
+        self.query_terms = set(_WORD.findall(query.lower()))
+        self.sections: List[Dict[str, Any]] = []
+        self.omitted: List[str] = []
+        self.condensed: List[str] = []
+
+    def add(self, name: str, value: Any, weight: float = 1.0) -> "ContextBudgeter":
+        """Add a section; weight expresses how much the task needs it (0 drops it first)"""
+        text = value if isinstance(value, str) else format_value(value)
+        text = text.strip()
+        if text:
+            self.sections.append({"name": name, "text": text, "weight": weight, "order": len(self.sections)})
+        return self
+
+    def add_text(self, text: str, weight: float = 1.0) -> "ContextBudgeter":
+        """Add text rendered by another budgeter, keeping its sections separately rankable"""
+        for section in split_sections(text):
+            self.add(section["name"], section["content"], weight)
+        return self
+
+    def _relevance(self, section: Dict[str, Any]) -> float:
+        if not self.query_terms:
+            return section["weight"]
+        words = set(_WORD.findall(f"{section['name']} {section['text']}".lower()))
+        overlap = len(words & self.query_terms) / len(self.query_terms)
+        return section["weight"] * (1.0 + overlap)
+
+    def render(self) -> str:
+        """Sections in their original order, each verbatim, condensed or cut, within the budget"""
+        header_cost = count_tokens(SECTION_HEADER) + 2
+        total = sum(count_tokens(s["text"]) + count_tokens(s["name"]) + header_cost for s in self.sections)
+        if total <= self.max_tokens:
+            return self._join({s["order"]: s["text"] for s in self.sections})
+
+        chosen: Dict[int, str] = {}
+        # Keep room for the note listing omitted sections
+        remaining = self.max_tokens - _OMITTED_NOTE_TOKENS
+        for section in sorted(self.sections, key=self._relevance, reverse=True):
+            available = remaining - count_tokens(section["name"]) - header_cost
+            text = section["text"]
+            if count_tokens(text) > available:
+                outline = condense_code(text)
+                if outline and count_tokens(outline) <= available:
+                    text = outline
+                else:
+                    text = cut_to_tokens(outline if count_tokens(outline) >= MIN_SECTION_TOKENS else text, available)
+                if available < MIN_SECTION_TOKENS or not text.strip():
+                    self.omitted.append(section["name"])
+                    continue
+                self.condensed.append(section["name"])
+            chosen[section["order"]] = text
+            remaining -= count_tokens(text) + count_tokens(section["name"]) + header_cost
+
+        rendered = self._join(chosen)
+        if self.omitted:
+            rendered += f"\n\n(Omitted to fit the context budget: {', '.join(self.omitted)})"
+        return rendered
+
+    def _join(self, chosen: Dict[int, str]) -> str:
+        names = {s["order"]: s["name"] for s in self.sections}
+        return "\n\n".join(f"{SECTION_HEADER}{names[order]}\n{chosen[order]}" for order in sorted(chosen))
+
+
+def fit_context(text: str, max_tokens: int, query: str = "", default: Optional[str] = None) -> str:
+    """Fit free-form or budgeter-rendered context text into max_tokens"""
+    if not text:
+        return default or ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    return ContextBudgeter(max_tokens, query).add_text(text).render()
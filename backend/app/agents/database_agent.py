@@ -1,39 +1,38 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.agents.base_agent import BaseAgent
+from app.core.llm_client import LLMClient
 
 class DatabaseAgent(BaseAgent):
     """Specialized agent for database design and optimization"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("DatabaseAgent", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("DatabaseAgent", llm_provider, llm_client)
         self.expertise = "Database design, schema optimization, indexing, relationships"
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Execute database design task"""
         self.log("Starting database design task")
         
         requirements = task.get("requirements", "")
         db_type = task.get("db_type", "mongodb")
         
-        # Design schema
-        schema = self._design_schema(requirements, db_type)
-        
-        # Generate indexes
-        indexes = self._generate_indexes(requirements, db_type)
-        
-        # Design relationships
-        relationships = self._design_relationships(requirements)
+        # Design schema, indexes and relationships concurrently, or in one batched request
+        generated = await self.generate_sections_async({
+            "schema": self._design_schema_prompt(requirements, db_type),
+            "indexes": self._generate_indexes_prompt(requirements, db_type),
+            "relationships": self._design_relationships_prompt(requirements)
+        }, shared_text=requirements)
         
         return {
             "status": "success",
-            "schema": schema,
-            "indexes": indexes,
-            "relationships": relationships,
+            "schema": generated["schema"],
+            "indexes": generated["indexes"],
+            "relationships": generated["relationships"],
             "message": "Database design completed successfully"
         }
     
-    def _design_schema(self, requirements: str, db_type: str) -> str:
-        """Design database schema"""
+    def _design_schema_prompt(self, requirements: str, db_type: str) -> str:
+        """Prompt to design database schema"""
         prompt = f"""Design a {db_type} database schema for:
 
 {requirements}
@@ -47,10 +46,10 @@ Provide:
 
 Format as JSON schema or code."""
         
-        return self.generate_code(prompt)
+        return prompt
     
-    def _generate_indexes(self, requirements: str, db_type: str) -> str:
-        """Generate optimal indexes"""
+    def _generate_indexes_prompt(self, requirements: str, db_type: str) -> str:
+        """Prompt to generate optimal indexes"""
         prompt = f"""Design indexes for {db_type} based on:
 
 {requirements}
@@ -63,10 +62,10 @@ Include:
 
 Provide index creation commands."""
         
-        return self.generate_code(prompt)
+        return prompt
     
-    def _design_relationships(self, requirements: str) -> str:
-        """Design data relationships"""
+    def _design_relationships_prompt(self, requirements: str) -> str:
+        """Prompt to design data relationships"""
         prompt = f"""Design data relationships for:
 
 {requirements}
@@ -79,4 +78,4 @@ Explain:
 
 Provide relationship diagram as text/code."""
         
-        return self.generate_code(prompt)
+        return prompt
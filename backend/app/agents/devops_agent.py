@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class DevOpsAgent(BaseAgent):
     """Agent specialized in DevOps, CI/CD, and deployment infrastructure"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("DevOps_Engineer", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("DevOps_Engineer", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Create complete DevOps infrastructure and CI/CD pipelines"""
         self.log("Starting DevOps infrastructure setup")
         
@@ -85,7 +86,7 @@ Provide complete configurations for:
 
 Provide complete, production-ready configuration files."""
         
-        devops_config = self.generate_code(prompt, {
+        devops_config = await self.generate_code_async(prompt, {
             "platforms": platforms,
             "deployment_target": deployment_target
         })
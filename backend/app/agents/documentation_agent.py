@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class DocumentationAgent(BaseAgent):
     """Agent specialized in generating comprehensive documentation"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("Documentation_Writer", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("Documentation_Writer", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Generate comprehensive project documentation"""
         self.log("Starting documentation generation")
         
@@ -118,7 +119,7 @@ Generate complete documentation including:
 
 Generate all documentation in Markdown format with proper formatting and examples."""
         
-        documentation = self.generate_code(prompt, {
+        documentation = await self.generate_code_async(prompt, {
             "project_name": project_name,
             "features": features,
             "tech_stack": tech_stack
@@ -1,14 +1,15 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.agents.base_agent import BaseAgent
+from app.core.llm_client import LLMClient
 
 class FrontendAgent(BaseAgent):
     """Specialized agent for frontend development"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("FrontendAgent", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("FrontendAgent", llm_provider, llm_client)
         self.expertise = "Frontend architecture, UI components, state management, responsive design"
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Execute frontend development task"""
         self.log("Starting frontend development task")
         
@@ -19,21 +20,19 @@ class FrontendAgent(BaseAgent):
         # Generate frontend structure
         structure = self._generate_structure(platform)
         
-        # Generate components
-        components_code = self._generate_components(requirements, platform)
-        
-        # Generate API integration
-        api_integration = self._generate_api_integration(api_endpoints, platform)
-        
-        # Generate routing
-        routing_code = self._generate_routing(requirements, platform)
+        # Generate components, API integration and routing concurrently, or in one batched request
+        generated = await self.generate_sections_async({
+            "components_code": self._generate_components_prompt(requirements, platform),
+            "api_integration": self._generate_api_integration_prompt(api_endpoints, platform),
+            "routing_code": self._generate_routing_prompt(requirements, platform)
+        }, shared_text=requirements)
         
         return {
             "status": "success",
             "structure": structure,
-            "components_code": components_code,
-            "api_integration": api_integration,
-            "routing_code": routing_code,
+            "components_code": generated["components_code"],
+            "api_integration": generated["api_integration"],
+            "routing_code": generated["routing_code"],
             "message": "Frontend architecture generated successfully"
         }
     
@@ -71,8 +70,8 @@ class FrontendAgent(BaseAgent):
             }
         return {}
     
-    def _generate_components(self, requirements: str, platform: str) -> str:
-        """Generate React/React Native components"""
+    def _generate_components_prompt(self, requirements: str, platform: str) -> str:
+        """Prompt to generate React/React Native components"""
         framework = "React Native" if platform == "react-native" else "React"
         prompt = f"""Generate {framework} components for:
 
@@ -88,10 +87,10 @@ Include:
 
 Provide complete, production-ready components."""
         
-        return self.generate_code(prompt)
+        return prompt
     
-    def _generate_api_integration(self, api_endpoints: list, platform: str) -> str:
-        """Generate API integration layer"""
+    def _generate_api_integration_prompt(self, api_endpoints: list, platform: str) -> str:
+        """Prompt to generate API integration layer"""
         endpoints_str = "\n".join([f"- {ep}" for ep in api_endpoints]) if api_endpoints else "Standard CRUD operations"
         
         prompt = f"""Generate API integration service for {platform}:
@@ -108,10 +107,10 @@ Include:
 
 Provide complete API service implementation."""
         
-        return self.generate_code(prompt)
+        return prompt
     
-    def _generate_routing(self, requirements: str, platform: str) -> str:
-        """Generate routing configuration"""
+    def _generate_routing_prompt(self, requirements: str, platform: str) -> str:
+        """Prompt to generate routing configuration"""
         router = "React Router" if platform in ["react", "nextjs"] else "React Navigation"
         
         prompt = f"""Generate {router} configuration for:
@@ -126,4 +125,4 @@ Include:
 
 Provide complete routing setup."""
         
-        return self.generate_code(prompt)
+        return prompt
@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any, List
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, List, Optional
 
 class ImageGeneratorAgent(BaseAgent):
     """Agent specialized in generating visual assets and images"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("Image_Generator", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("Image_Generator", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Generate visual assets for the application"""
         self.log("Starting image generation")
         
@@ -100,7 +101,8 @@ Note: Since we cannot actually generate images, provide:
 3. Free stock photo recommendations
 4. SVG code for simple icons/graphics"""
         
-        image_specs = self.generate_code(prompt, {
+        # Requirements worded differently may reuse earlier asset specifications
+        image_specs, near_duplicate = await self.generate_code_reusable_async(prompt, requirements, {
             "image_types": image_types,
             "style": style
         })
@@ -111,6 +113,7 @@ Note: Since we cannot actually generate images, provide:
             "agent": self.name,
             "status": "completed",
             "image_specifications": image_specs,
+            "near_duplicate": near_duplicate,
             "asset_types": image_types,
             "recommendations": [
                 "AI image generation prompts provided",
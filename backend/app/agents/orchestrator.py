@@ -1,19 +1,19 @@
-from typing import Dict, Any, List, Optional
-from app.agents.backend_agent import BackendAgent
-from app.agents.frontend_agent import FrontendAgent
-from app.agents.database_agent import DatabaseAgent
-from app.agents.api_architect_agent import APIArchitectAgent
-from app.agents.uiux_designer_agent import UIUXDesignerAgent
-from app.agents.devops_agent import DevOpsAgent
-from app.agents.testing_agent import TestingAgent
-from app.agents.security_agent import SecurityAgent
-from app.agents.performance_agent import PerformanceAgent
-from app.agents.documentation_agent import DocumentationAgent
-from app.agents.code_review_agent import CodeReviewAgent
-from app.agents.image_generator_agent import ImageGeneratorAgent
+from typing import Dict, Any, List, Optional, AsyncIterator
+from app.agents.registry import AgentRegistry, agent_registry
+from app.agents.run_context import RunContext, OutputSink, output_sink_scope
+from app.agents.workflow import WorkflowStage, WorkflowScheduler, STAGE_TIMED_OUT
+from app.agents.timeline import summarize_timeline
+from app.agents.token_usage import summarize_token_usage
+from app.agents.context_budget import ContextBudgeter
+from app.agents.workflow_profiles import STAGE_DEFINITIONS, DEFAULT_WORKFLOW_PROFILE, get_workflow_profile
 from app.services.websocket_manager import websocket_manager
+from app.core.config import settings
+from app.core.concurrency import gather_limited
+from app.core.llm_context import deadline_scope
+from app.core.llm_cassette import Cassette, cassette_scope, current_cassette, open_run_cassette
 import logging
 import asyncio
+import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -24,32 +24,56 @@ class AgentOrchestrator:
     to generate production-ready applications
     """
     
-    def __init__(self, llm_provider: str = "emergent", project_id: Optional[str] = None):
+    # Integrated component name for each stage (image assets only feed the frontend)
+    STAGE_COMPONENTS = {
+        "database": "database",
+        "api_architecture": "api",
+        "backend": "backend",
+        "frontend": "frontend",
+        "design_system": "design_system",
+        "security": "security",
+        "performance": "performance",
+        "testing": "testing",
+        "devops": "devops",
+        "documentation": "documentation",
+        "code_review": "code_review"
+    }
+    
+    def __init__(
+        self,
+        llm_provider: str = "emergent",
+        project_id: Optional[str] = None,
+        checkpoint_service: Optional[Any] = None,
+        registry: Optional[AgentRegistry] = None
+    ):
         self.llm_provider = llm_provider
+        # Default project for runs that don't name one
         self.project_id = project_id
+        # Persists each completed stage so a failed run can be resumed
+        self.checkpoint_service = checkpoint_service
         
-        # Initialize all 12 specialized agents
-        self.agents = {
-            "database": DatabaseAgent(llm_provider),
-            "api_architect": APIArchitectAgent(llm_provider),
-            "backend": BackendAgent(llm_provider),
-            "uiux_designer": UIUXDesignerAgent(llm_provider),
-            "frontend": FrontendAgent(llm_provider),
-            "testing": TestingAgent(llm_provider),
-            "security": SecurityAgent(llm_provider),
-            "performance": PerformanceAgent(llm_provider),
-            "devops": DevOpsAgent(llm_provider),
-            "documentation": DocumentationAgent(llm_provider),
-            "code_review": CodeReviewAgent(llm_provider),
-            "image_generator": ImageGeneratorAgent(llm_provider)
-        }
-        
-        self.workflow_logs = []
-        self.execution_times = {}
+        # The 12 specialized agents are shared process-wide; per-run state lives in RunContext
+        self.agents = (registry or agent_registry).get_agents(llm_provider)
     
-    async def generate_application(self, project_config: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_application(
+        self,
+        project_config: Dict[str, Any],
+        run_id: Optional[str] = None,
+        previous_stages: Optional[Dict[str, Dict[str, Any]]] = None,
+        project_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Orchestrate all 12 agents to generate a complete, production-ready application
+        Orchestrate the specialized agents to generate a complete, production-ready application
+        
+        The stages come from the project's workflow profile ("full" runs all 12
+        agents, see workflow_profiles.py). Stages run as a dependency graph: each stage starts as soon as the
+        stages it consumes have finished, so independent agents run concurrently.
+        
+        Each finished stage is checkpointed under run_id, together with a
+        fingerprint of its inputs, when a checkpoint service is configured.
+        previous_stages maps stage keys to {"fingerprint", "result"} from an
+        earlier run; stages whose input fingerprint is unchanged reuse that
+        result instead of calling their agent again.
         
         Workflow:
         1. Requirements Analysis
@@ -65,179 +89,319 @@ class AgentOrchestrator:
         11. Documentation Generation
         12. Code Review & Quality Assurance
         """
+        stages = {}
+        async for event in self.stream_application(project_config, run_id, previous_stages, project_id):
+            if event["type"] == "stage_completed":
+                stages[event["stage"]] = event["result"]
+            else:
+                results = event["results"]
+        
+        # Keep stage results in workflow order regardless of completion order
+        results["stages"] = {
+            key: stages[key] for key in results["metadata"]["stage_order"] if key in stages
+        }
+        
+        if results["status"] == "completed":
+            # ===== FINAL INTEGRATION =====
+            self._log(results, "🔗 Integrating all components", results["metadata"].get("project_id"))
+            results["integrated_structure"] = self._integrate_all_components(
+                results["stages"], results["metadata"]["execution_times"]
+            )
+        
+        return results
+    
+    async def stream_application(
+        self,
+        project_config: Dict[str, Any],
+        run_id: Optional[str] = None,
+        previous_stages: Optional[Dict[str, Dict[str, Any]]] = None,
+        project_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate an application, yielding each stage result as soon as it is ready
+        
+        Yields one {"type": "stage_completed", ...} event per stage, in completion
+        order, then a single {"type": "generation_finished", "results": ...} event
+        carrying status, logs and metadata. Stage outputs are not accumulated:
+        each is released once the stages consuming it have started, so callers
+        persist what they need from the stage events.
+        
+        All run state is kept in a RunContext, so one orchestrator can serve
+        concurrent runs for different projects.
+        
+        With LLM_CASSETTE_MODE set, the run's LLM calls are recorded to (or
+        replayed from) a cassette file. A cassette already active in the
+        caller's context (cassette_scope) is used instead and left to the caller to save.
+        """
         logger.info(f"🚀 Starting advanced application generation: {project_config.get('name')}")
-        start_time = datetime.now()
+        run = RunContext(run_id or str(uuid.uuid4()), project_id or self.project_id)
+        start_time = run.started_at
         
         results = {
             "status": "in_progress",
             "project_name": project_config.get("name"),
             "stages": {},
-            "logs": [],
+            "logs": run.workflow_logs,
             "metadata": {
+                "run_id": run.run_id,
+                "project_id": run.project_id,
                 "agents_used": [],
                 "total_agents": 12,
+                "stage_order": [],
+                "reused_stages": [],
                 "generation_started": start_time.isoformat()
             }
         }
         
+        events: asyncio.Queue = asyncio.Queue()
+        runner = None
+        scheduler = None
+        cassette = current_cassette()
+        owns_cassette = cassette is None
+        
         try:
-            requirements = project_config.get("requirements", "")
-            platforms = project_config.get("target_platforms", ["react"])
-            app_type = project_config.get("app_type", "web")
-            architecture = project_config.get("architecture_type", "modular")
+            if owns_cassette:
+                cassette = open_run_cassette(run.run_id)
+            workflow = self._build_workflow(project_config, run)
+            scheduler = WorkflowScheduler(workflow, stage_timeout=settings.AGENT_TIMEOUT)
+            results["metadata"]["stage_order"] = [stage.key for stage in workflow]
+            results["metadata"]["workflow_profile"] = project_config.get("workflow_profile") or DEFAULT_WORKFLOW_PROFILE
+            results["metadata"]["total_agents"] = len(workflow)
+            completed_count = 0
             
-            # ===== STAGE 1: DATABASE DESIGN =====
-            self._log(results, "📊 Stage 1/12: Designing database schema")
-            db_result = await self._execute_agent("database", {
-                "requirements": requirements,
-                "db_type": "mongodb"
-            })
-            results["stages"]["database"] = db_result
-            results["metadata"]["agents_used"].append("database")
-            
-            # ===== STAGE 2: API ARCHITECTURE =====
-            self._log(results, "🔌 Stage 2/12: Designing API architecture")
-            api_result = await self._execute_agent("api_architect", {
-                "requirements": requirements,
-                "app_type": app_type,
-                "architecture": "rest"
-            })
-            results["stages"]["api_architecture"] = api_result
-            results["metadata"]["agents_used"].append("api_architect")
-            
-            # ===== STAGE 3: UI/UX DESIGN SYSTEM =====
-            self._log(results, "🎨 Stage 3/12: Creating UI/UX design system")
-            design_result = await self._execute_agent("uiux_designer", {
-                "requirements": requirements,
-                "platform": platforms[0] if platforms else "web",
-                "design_style": project_config.get("design_style", "modern")
-            })
-            results["stages"]["design_system"] = design_result
-            results["metadata"]["agents_used"].append("uiux_designer")
-            
-            # ===== STAGE 4: IMAGE ASSETS =====
-            self._log(results, "🖼️  Stage 4/12: Generating image specifications")
-            image_result = await self._execute_agent("image_generator", {
-                "requirements": requirements,
-                "image_types": ["logo", "hero", "icons", "illustrations"],
-                "style": project_config.get("design_style", "modern")
-            })
-            results["stages"]["image_assets"] = image_result
-            results["metadata"]["agents_used"].append("image_generator")
-            
-            # ===== STAGE 5: BACKEND DEVELOPMENT =====
-            self._log(results, "⚙️  Stage 5/12: Generating backend code")
-            backend_result = await self._execute_agent("backend", {
-                "requirements": requirements,
-                "project_type": app_type,
-                "architecture": architecture,
-                "api_spec": api_result.get("api_specification", ""),
-                "database_schema": db_result.get("schema", "")
-            })
-            results["stages"]["backend"] = backend_result
-            results["metadata"]["agents_used"].append("backend")
-            
-            # ===== STAGE 6: FRONTEND DEVELOPMENT =====
-            self._log(results, "💻 Stage 6/12: Generating frontend code")
-            frontend_results = {}
-            api_endpoints = self._extract_api_endpoints(api_result)
-            
-            for platform in platforms:
-                frontend_result = await self._execute_agent("frontend", {
-                    "requirements": requirements,
-                    "platform": platform,
-                    "api_endpoints": api_endpoints,
-                    "design_system": design_result.get("design_system", ""),
-                    "image_specs": image_result.get("image_specifications", "")
+            async def on_stage_complete(stage_key: str, output: Any, fingerprint: str):
+                nonlocal completed_count
+                completed_count += 1
+                timed_out = isinstance(output, dict) and output.get("status") == STAGE_TIMED_OUT
+                # Timed-out stages are not checkpointed so the next run retries them
+                if not timed_out:
+                    await self._save_checkpoint(run, stage_key, output, fingerprint)
+                await events.put({
+                    "type": "stage_completed",
+                    "stage": stage_key,
+                    "agent": scheduler.stages[stage_key].agent,
+                    "result": output,
+                    "reused": stage_key in scheduler.reused,
+                    "timed_out": timed_out,
+                    "completed_stages": completed_count,
+                    "total_stages": len(workflow)
                 })
-                frontend_results[platform] = frontend_result
-            
-            results["stages"]["frontend"] = frontend_results
-            results["metadata"]["agents_used"].append("frontend")
-            
-            # ===== STAGE 7: SECURITY AUDIT =====
-            self._log(results, "🔒 Stage 7/12: Performing security audit")
-            security_result = await self._execute_agent("security", {
-                "requirements": requirements,
-                "code_context": self._get_code_summary(backend_result, frontend_results),
-                "platform": app_type
-            })
-            results["stages"]["security"] = security_result
-            results["metadata"]["agents_used"].append("security")
-            
-            # ===== STAGE 8: PERFORMANCE OPTIMIZATION =====
-            self._log(results, "⚡ Stage 8/12: Optimizing performance")
-            performance_result = await self._execute_agent("performance", {
-                "requirements": requirements,
-                "platform": app_type,
-                "code_context": self._get_code_summary(backend_result, frontend_results)
-            })
-            results["stages"]["performance"] = performance_result
-            results["metadata"]["agents_used"].append("performance")
             
-            # ===== STAGE 9: TESTING SUITE =====
-            self._log(results, "🧪 Stage 9/12: Generating test suites")
-            testing_result = await self._execute_agent("testing", {
-                "requirements": requirements,
-                "platform": platforms[0] if platforms else "web",
-                "api_endpoints": api_endpoints
-            })
-            results["stages"]["testing"] = testing_result
-            results["metadata"]["agents_used"].append("testing")
+            async def run_workflow():
+                try:
+                    # The generation deadline bounds every stage and LLM call in this run
+                    with deadline_scope(settings.GENERATION_TIMEOUT), cassette_scope(cassette):
+                        await scheduler.run(
+                            previous=previous_stages,
+                            on_stage_complete=on_stage_complete,
+                            release_outputs=True
+                        )
+                finally:
+                    await events.put(None)
             
-            # ===== STAGE 10: DEVOPS INFRASTRUCTURE =====
-            self._log(results, "🐳 Stage 10/12: Setting up DevOps infrastructure")
-            devops_result = await self._execute_agent("devops", {
-                "requirements": requirements,
-                "platforms": platforms,
-                "deployment_target": project_config.get("deployment_target", "docker")
-            })
-            results["stages"]["devops"] = devops_result
-            results["metadata"]["agents_used"].append("devops")
+            runner = asyncio.create_task(run_workflow())
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            await runner
             
-            # ===== STAGE 11: DOCUMENTATION =====
-            self._log(results, "📝 Stage 11/12: Generating documentation")
-            documentation_result = await self._execute_agent("documentation", {
-                "requirements": requirements,
-                "project_name": project_config.get("name", "Application"),
-                "features": self._extract_features(results),
-                "tech_stack": self._build_tech_stack(platforms, architecture)
-            })
-            results["stages"]["documentation"] = documentation_result
-            results["metadata"]["agents_used"].append("documentation")
+            results["metadata"]["agents_used"] = [stage.agent for stage in workflow]
+            results["metadata"]["reused_stages"] = scheduler.reused
+            results["metadata"]["stage_fingerprints"] = scheduler.fingerprints
+            if scheduler.reused:
+                self._log(run, f"♻️  Reused {len(scheduler.reused)} stage(s) with unchanged inputs: {', '.join(scheduler.reused)}")
             
-            # ===== STAGE 12: CODE REVIEW =====
-            self._log(results, "✅ Stage 12/12: Performing code review")
-            review_result = await self._execute_agent("code_review", {
-                "code_context": self._get_code_summary(backend_result, frontend_results),
-                "platform": app_type
-            })
-            results["stages"]["code_review"] = review_result
-            results["metadata"]["agents_used"].append("code_review")
-            
-            # ===== FINAL INTEGRATION =====
-            self._log(results, "🔗 Integrating all components")
-            results["integrated_structure"] = self._integrate_all_components(results["stages"])
+            results["metadata"]["timed_out_stages"] = scheduler.timed_out
+            results["metadata"]["partial"] = bool(scheduler.timed_out)
+            if scheduler.timed_out:
+                self._log(run, f"⚠️  Continuing without timed-out stage(s): {', '.join(scheduler.timed_out)}")
             
             # Calculate final metadata
             end_time = datetime.now()
             results["status"] = "completed"
             results["metadata"]["generation_completed"] = end_time.isoformat()
             results["metadata"]["total_duration_seconds"] = (end_time - start_time).total_seconds()
-            results["metadata"]["execution_times"] = self.execution_times
+            results["metadata"]["execution_times"] = run.execution_times
             
-            self._log(results, f"✨ Application generation completed! Duration: {results['metadata']['total_duration_seconds']:.2f}s")
+            self._log(run, f"✨ Application generation completed! Duration: {results['metadata']['total_duration_seconds']:.2f}s")
             
         except Exception as e:
             results["status"] = "failed"
             results["error"] = str(e)
-            self._log(results, f"❌ Error: {str(e)}")
+            self._log(run, f"❌ Error: {str(e)}")
             logger.error(f"Application generation failed: {str(e)}", exc_info=True)
         
-        return results
+        finally:
+            # Stop the workflow if the consumer went away before it finished
+            if runner and not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+        
+        # Attached for failed runs too, covering the stages that got to run
+        if scheduler:
+            results["metadata"]["timeline"] = scheduler.timeline
+            results["metadata"]["critical_path"] = summarize_timeline(scheduler.timeline)
+            results["metadata"]["token_usage"] = summarize_token_usage(scheduler.timeline)
+            # Stages whose output was reused from a near-duplicate prompt rather than generated
+            results["metadata"]["near_duplicate_stages"] = [
+                key for key, entry in scheduler.timeline.items() if entry.get("llm_near_duplicate_hits")
+            ]
+        if cassette:
+            if owns_cassette:
+                await self._save_cassette(run, cassette)
+            results["metadata"]["cassette"] = cassette.get_stats()
+        
+        yield {"type": "generation_finished", "results": results}
+
+    def _build_workflow(self, project_config: Dict[str, Any], run: RunContext) -> List[WorkflowStage]:
+        """Build the stage dependency graph for a generation run from its workflow profile"""
+        profile = get_workflow_profile(project_config.get("workflow_profile") or DEFAULT_WORKFLOW_PROFILE)
+        config = self._normalize_config(project_config)
+        stage_keys = profile["stages"]
+        
+        workflow = []
+        for number, key in enumerate(stage_keys, 1):
+            definition = STAGE_DEFINITIONS[key]
+            label = f"{definition['icon']} Stage {number}/{len(stage_keys)}: {definition['label']}"
+            workflow.append(WorkflowStage(
+                key,
+                definition["agent"],
+                self._input_builder(definition, config, stage_keys),
+                self._stage_runner(definition, label, run),
+                depends_on=[dep for dep in definition.get("depends_on", []) if dep in stage_keys],
+                label=label,
+                critical=definition.get("critical", True)
+            ))
+        
+        return workflow
     
-    async def _execute_agent(self, agent_name: str, task: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single agent and track execution time"""
+    def _normalize_config(self, project_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply defaults to the project configuration used by stage inputs"""
+        platforms = project_config.get("target_platforms", ["react"])
+        return {
+            "name": project_config.get("name", "Application"),
+            "requirements": project_config.get("requirements", ""),
+            "app_type": project_config.get("app_type", "web"),
+            "target_platforms": platforms,
+            "primary_platform": platforms[0] if platforms else "web",
+            "architecture_type": project_config.get("architecture_type", "modular"),
+            "design_style": project_config.get("design_style", "modern"),
+            "deployment_target": project_config.get("deployment_target", "docker")
+        }
+    
+    def _input_builder(self, definition: Dict[str, Any], config: Dict[str, Any], stage_keys: List[str]):
+        """Create the function that assembles a stage's agent task(s) from upstream outputs"""
+        def build_inputs(outputs: Dict[str, Any]) -> Any:
+            if definition.get("per_platform"):
+                return {
+                    platform: self._resolve_inputs(definition["inputs"], config, outputs, stage_keys, platform)
+                    for platform in config["target_platforms"]
+                }
+            return self._resolve_inputs(definition["inputs"], config, outputs, stage_keys)
+        return build_inputs
+    
+    def _resolve_inputs(
+        self,
+        template: Dict[str, Any],
+        config: Dict[str, Any],
+        outputs: Dict[str, Any],
+        stage_keys: List[str],
+        platform: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Resolve the input references of a stage definition"""
+        def resolve(value: Any) -> Any:
+            if not isinstance(value, str) or not value.startswith("$"):
+                return value
+            if value == "$platform":
+                return platform
+            source, _, path = value[1:].partition(".")
+            if source == "config":
+                return config[path]
+            if source == "stages":
+                stage_key, _, field = path.partition(".")
+                return (outputs.get(stage_key) or {}).get(field, "")
+            if source == "derived":
+                return self._derive_input(path, config, outputs, stage_keys)
+            raise ValueError(f"Unknown input reference '{value}'")
+        
+        return {name: resolve(value) for name, value in template.items()}
+    
+    def _derive_input(self, name: str, config: Dict[str, Any], outputs: Dict[str, Any], stage_keys: List[str]) -> Any:
+        """Compute a derived stage input"""
+        if name == "api_endpoints":
+            return self._extract_api_endpoints(outputs.get("api_architecture") or {})
+        if name == "code_summary":
+            return self._get_code_summary(outputs.get("backend") or {}, outputs.get("frontend") or {})
+        if name == "features":
+            return self._extract_features(stage_keys)
+        if name == "tech_stack":
+            return self._build_tech_stack(config["target_platforms"], config["architecture_type"])
+        raise ValueError(f"Unknown derived input '{name}'")
+    
+    def _stage_runner(self, definition: Dict[str, Any], label: str, run: RunContext):
+        """Create the function that executes a stage's agent"""
+        agent_name = definition["agent"]
+        
+        async def run_single(task: Dict[str, Any]) -> Dict[str, Any]:
+            self._log(run, label)
+            return await self._execute_agent(run, agent_name, task)
+        
+        async def run_per_platform(platform_tasks: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+            self._log(run, label)
+            stage_start = datetime.now()
+            
+            # Fan out one generation per platform, timed individually
+            platform_results = await gather_limited({
+                platform: self._execute_agent(run, agent_name, task, timing_key=f"{agent_name}:{platform}")
+                for platform, task in platform_tasks.items()
+            }, settings.MAX_PLATFORM_CONCURRENCY)
+            
+            run.record_time(agent_name, (datetime.now() - stage_start).total_seconds())
+            return platform_results
+        
+        return run_per_platform if definition.get("per_platform") else run_single
+    
+    async def _save_checkpoint(self, run: RunContext, stage_key: str, output: Any, fingerprint: str):
+        """Persist a completed stage; checkpoint failures never fail the run"""
+        if not (self.checkpoint_service and run.project_id):
+            return
+        try:
+            await self.checkpoint_service.save_stage(run.project_id, run.run_id, stage_key, output, fingerprint)
+        except Exception as e:
+            logger.warning(f"Failed to checkpoint stage '{stage_key}' for run {run.run_id}: {str(e)}")
+    
+    async def _save_cassette(self, run: RunContext, cassette: Cassette):
+        """Write a run's recorded LLM calls; a failed write never fails the run"""
+        try:
+            path = await asyncio.to_thread(cassette.save)
+            if path:
+                self._log(run, f"📼 Recorded {len(cassette.entries)} LLM call(s) to {path}")
+        except Exception as e:
+            logger.warning(f"Failed to save the LLM cassette of run {run.run_id}: {str(e)}")
+    
+    def _output_sink(self, run: RunContext, agent_name: str, timing_key: str) -> Optional[OutputSink]:
+        """Sink forwarding an agent's partial output to the project's WebSocket clients, if there are any"""
+        if not (settings.LLM_STREAMING_ENABLED and run.project_id
+                and websocket_manager.get_connection_count(run.project_id)):
+            return None
+        
+        async def sink(stream_id: str, sequence: int, delta: str, code_blocks: List[Dict[str, Any]]):
+            await websocket_manager.broadcast_agent_output_delta(
+                run.project_id, agent_name, timing_key, stream_id, sequence, delta, code_blocks
+            )
+        return sink
+    
+    async def _execute_agent(
+        self,
+        run: RunContext,
+        agent_name: str,
+        task: Dict[str, Any],
+        timing_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Execute a single agent and track execution time under timing_key (defaults to the agent name)"""
+        timing_key = timing_key or agent_name
         start = datetime.now()
         agent = self.agents.get(agent_name)
         
@@ -245,46 +409,47 @@ class AgentOrchestrator:
             raise ValueError(f"Agent '{agent_name}' not found")
         
         # Broadcast agent start via WebSocket
-        if self.project_id:
+        if run.project_id:
             await websocket_manager.broadcast_agent_update(
-                self.project_id, 
+                run.project_id, 
                 agent_name, 
                 "started", 
-                f"Starting {agent_name} agent"
+                f"Starting {timing_key} agent"
             )
         
-        # Execute agent (synchronous for now, can be made async)
-        result = agent.execute(task)
+        # Await the agent natively so LLM calls never block the event loop;
+        # its LLM output is streamed while anyone is watching the project
+        with output_sink_scope(self._output_sink(run, agent_name, timing_key)):
+            result = await agent.execute_async(task)
         
         duration = (datetime.now() - start).total_seconds()
-        self.execution_times[agent_name] = duration
+        run.record_time(timing_key, duration)
         
         # Broadcast agent completion via WebSocket
-        if self.project_id:
+        if run.project_id:
             await websocket_manager.broadcast_agent_update(
-                self.project_id, 
+                run.project_id, 
                 agent_name, 
                 "completed", 
-                f"Completed {agent_name} agent in {duration:.2f}s"
+                f"Completed {timing_key} agent in {duration:.2f}s"
             )
         
-        logger.info(f"Agent '{agent_name}' completed in {duration:.2f}s")
+        logger.info(f"Agent '{timing_key}' completed in {duration:.2f}s")
         return result
     
-    def _log(self, results: Dict[str, Any], message: str):
-        """Add timestamped log entry and broadcast via WebSocket"""
-        timestamp = datetime.now().isoformat()
-        log_entry = {
-            "timestamp": timestamp,
-            "message": message
-        }
-        results["logs"].append(log_entry)
+    def _log(self, run: Any, message: str, project_id: Optional[str] = None):
+        """Add timestamped log entry to the run (or a finished results dict) and broadcast via WebSocket"""
+        if isinstance(run, RunContext):
+            run.add_log(message)
+            project_id = run.project_id
+        else:
+            run["logs"].append({"timestamp": datetime.now().isoformat(), "message": message})
         logger.info(message)
         
-        # Broadcast log via WebSocket if project_id is set
-        if self.project_id:
+        # Broadcast log via WebSocket if the run belongs to a project
+        if project_id:
             asyncio.create_task(
-                websocket_manager.broadcast_log(self.project_id, message)
+                websocket_manager.broadcast_log(project_id, message)
             )
     
     def _extract_api_endpoints(self, api_result: Dict[str, Any]) -> List[str]:
@@ -306,17 +471,26 @@ class AgentOrchestrator:
         return endpoints
     
     def _get_code_summary(self, backend_result: Dict[str, Any], frontend_results: Dict[str, Any]) -> str:
-        """Create a summary of generated code for review agents"""
-        summary = f"Backend Code:\n{str(backend_result)[:1000]}\n\n"
-        summary += f"Frontend Code:\n{str(frontend_results)[:1000]}"
-        return summary
+        """Create a summary of generated code for review agents, within CODE_SUMMARY_TOKENS"""
+        budgeter = ContextBudgeter(settings.CODE_SUMMARY_TOKENS)
+        self._add_code_sections(budgeter, "backend", backend_result)
+        for platform, result in frontend_results.items():
+            if isinstance(result, dict):
+                self._add_code_sections(budgeter, f"frontend.{platform}", result)
+        return budgeter.render()
     
-    def _extract_features(self, results: Dict[str, Any]) -> List[str]:
-        """Extract implemented features from results"""
+    def _add_code_sections(self, budgeter: ContextBudgeter, prefix: str, result: Dict[str, Any]):
+        """Add each generated artifact of an agent result as its own summary section"""
+        for key, value in result.items():
+            if key in ("agent", "status", "message") or not value:
+                continue
+            # Folder trees are the first thing to give up when space runs out
+            budgeter.add(f"{prefix}.{key}", value, weight=0.3 if key == "structure" else 1.0)
+    
+    def _extract_features(self, stages: List[str]) -> List[str]:
+        """Extract implemented features from the stages in the workflow"""
         features = []
         
-        stages = results.get("stages", {})
-        
         if "backend" in stages:
             features.extend(["RESTful API", "Backend Services"])
         if "frontend" in stages:
@@ -353,9 +527,23 @@ class AgentOrchestrator:
         
         return stack
     
-    def _integrate_all_components(self, stages: Dict[str, Any]) -> Dict[str, Any]:
+    def _integrate_all_components(self, stages: Dict[str, Any], execution_times: Dict[str, float]) -> Dict[str, Any]:
         """Integrate all generated components into unified structure"""
+        summary = self.integration_summary(len(stages), execution_times)
         integrated = {
+            "structure": summary["structure"],
+            "components": {
+                component: stages.get(stage_key, {})
+                for stage_key, component in self.STAGE_COMPONENTS.items()
+            },
+            "generation_stats": summary["generation_stats"]
+        }
+        
+        return integrated
+    
+    def integration_summary(self, agents_executed: int, execution_times: Dict[str, float]) -> Dict[str, Any]:
+        """Project structure and generation stats of the integrated output, without components"""
+        return {
             "structure": {
                 "backend/": {
                     "app/": {
@@ -393,27 +581,12 @@ class AgentOrchestrator:
                     ".github/workflows/": "CI/CD pipelines"
                 }
             },
-            "components": {
-                "database": stages.get("database", {}),
-                "api": stages.get("api_architecture", {}),
-                "backend": stages.get("backend", {}),
-                "frontend": stages.get("frontend", {}),
-                "design_system": stages.get("design_system", {}),
-                "security": stages.get("security", {}),
-                "performance": stages.get("performance", {}),
-                "testing": stages.get("testing", {}),
-                "devops": stages.get("devops", {}),
-                "documentation": stages.get("documentation", {}),
-                "code_review": stages.get("code_review", {})
-            },
             "generation_stats": {
-                "agents_executed": len(stages),
+                "agents_executed": agents_executed,
                 "total_agents": 12,
-                "execution_times": self.execution_times
+                "execution_times": execution_times
             }
         }
-        
-        return integrated
     
     def get_agent_status(self) -> Dict[str, Any]:
         """Get status of all agents"""
@@ -1,13 +1,16 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class PerformanceAgent(BaseAgent):
     """Agent specialized in performance optimization"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("Performance_Optimizer", llm_provider)
+    context_focus = "query index find aggregate cache async await loop pagination limit batch render state effect fetch bundle"
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("Performance_Optimizer", llm_provider, llm_client)
+    
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Generate performance optimization strategies"""
         self.log("Starting performance optimization analysis")
         
@@ -19,7 +22,7 @@ class PerformanceAgent(BaseAgent):
 
 Requirements: {requirements}
 Platform: {platform}
-Code Context: {code_context[:1000] if code_context else 'N/A'}
+Code Context: {self.fit_context(code_context)}
 
 Provide detailed optimization implementations:
 
@@ -105,7 +108,7 @@ Provide detailed optimization implementations:
 
 Provide code implementations with before/after performance metrics."""
         
-        optimization_plan = self.generate_code(prompt, {
+        optimization_plan = await self.generate_code_async(prompt, {
             "platform": platform
         })
         
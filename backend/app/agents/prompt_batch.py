@@ -0,0 +1,56 @@
+"""
+Batched prompts
+Combines an agent's independent sub-prompts into one request with delimited
+sections, and splits the response back into one answer per sub-prompt
+"""
+from typing import Dict
+import re
+
+SHARED_REFERENCE = "[the shared requirements above]"
+
+_SECTION_START = re.compile(r"^[ \t]*={3,}[ \t]*SECTION:[ \t]*([\w.-]+)[ \t]*={3,}[ \t]*$", re.MULTILINE)
+_SECTION_END = re.compile(r"^[ \t]*={3,}[ \t]*END SECTION:[ \t]*([\w.-]+)[ \t]*={3,}[ \t]*$", re.MULTILINE)
+
+
+def build_batch_prompt(prompts: Dict[str, str], shared_text: str = "") -> str:
+    """
+    One prompt answering every sub-prompt in its own delimited section.
+    shared_text (e.g. the requirements) is stated once up front and replaced
+    by a reference wherever a sub-prompt repeats it.
+    """
+    parts = [
+        f"Complete the following {len(prompts)} independent tasks.",
+        "Answer each task in its own section. Start a section with a line containing exactly "
+        "`===== SECTION: <task name> =====` and end it with a line containing exactly "
+        "`===== END SECTION: <task name> =====`. Write nothing outside the sections, and give "
+        "every task a complete answer as if it had been asked on its own."
+    ]
+    if shared_text:
+        parts.append(f"Shared requirements for all tasks:\n{shared_text}")
+    for name, prompt in prompts.items():
+        if shared_text:
+            prompt = prompt.replace(shared_text, SHARED_REFERENCE)
+        parts.append(f"===== TASK: {name} =====\n{prompt}")
+    return "\n\n".join(parts)
+
+
+def parse_batch_response(response: str, names) -> Dict[str, str]:
+    """
+    Answers by task name. A section runs from its start marker to its end
+    marker, or to the next section if the end marker is missing. Tasks without
+    a non-empty section are left out, so the caller can retry them alone.
+    """
+    starts = [(match.group(1), match.start(), match.end()) for match in _SECTION_START.finditer(response)]
+    sections: Dict[str, str] = {}
+    for index, (name, _, content_start) in enumerate(starts):
+        if name not in names or name in sections:
+            continue
+        content_end = starts[index + 1][1] if index + 1 < len(starts) else len(response)
+        content = response[content_start:content_end]
+        end = _SECTION_END.search(content)
+        if end:
+            content = content[:end.start()]
+        content = content.strip()
+        if content:
+            sections[name] = content
+    return sections
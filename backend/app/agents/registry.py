@@ -0,0 +1,88 @@
+"""
+Process-wide agent registry
+Agents are stateless, so one instance of each is built per LLM provider and
+shared by every generation run; all agents of a provider share one LLM client
+"""
+from typing import Dict, Any, List, Type
+from app.agents.base_agent import BaseAgent
+from app.agents.backend_agent import BackendAgent
+from app.agents.frontend_agent import FrontendAgent
+from app.agents.database_agent import DatabaseAgent
+from app.agents.api_architect_agent import APIArchitectAgent
+from app.agents.uiux_designer_agent import UIUXDesignerAgent
+from app.agents.devops_agent import DevOpsAgent
+from app.agents.testing_agent import TestingAgent
+from app.agents.security_agent import SecurityAgent
+from app.agents.performance_agent import PerformanceAgent
+from app.agents.documentation_agent import DocumentationAgent
+from app.agents.code_review_agent import CodeReviewAgent
+from app.agents.image_generator_agent import ImageGeneratorAgent
+from app.core.llm_client import LLMClient
+import threading
+
+
+class AgentRegistry:
+    """Lazily builds and caches the specialized agents and their LLM clients"""
+    
+    AGENT_CLASSES: Dict[str, Type[BaseAgent]] = {
+        "database": DatabaseAgent,
+        "api_architect": APIArchitectAgent,
+        "backend": BackendAgent,
+        "uiux_designer": UIUXDesignerAgent,
+        "frontend": FrontendAgent,
+        "testing": TestingAgent,
+        "security": SecurityAgent,
+        "performance": PerformanceAgent,
+        "devops": DevOpsAgent,
+        "documentation": DocumentationAgent,
+        "code_review": CodeReviewAgent,
+        "image_generator": ImageGeneratorAgent
+    }
+    
+    def __init__(self):
+        self._llm_clients: Dict[str, LLMClient] = {}
+        self._agents: Dict[str, Dict[str, BaseAgent]] = {}
+        self._lock = threading.Lock()
+    
+    def get_llm_client(self, provider: str = "emergent") -> LLMClient:
+        """Get the shared LLM client for a provider"""
+        with self._lock:
+            client = self._llm_clients.get(provider)
+            if client is None:
+                client = self._llm_clients[provider] = LLMClient(provider=provider)
+            return client
+    
+    def get_agents(self, llm_provider: str = "emergent") -> Dict[str, BaseAgent]:
+        """Get all agents for a provider, keyed by agent name"""
+        agents = self._agents.get(llm_provider)
+        if agents is None:
+            llm_client = self.get_llm_client(llm_provider)
+            with self._lock:
+                agents = self._agents.get(llm_provider)
+                if agents is None:
+                    agents = self._agents[llm_provider] = {
+                        name: agent_class(llm_provider, llm_client)
+                        for name, agent_class in self.AGENT_CLASSES.items()
+                    }
+        return agents
+    
+    def get_agent(self, name: str, llm_provider: str = "emergent") -> BaseAgent:
+        """Get a single agent by name"""
+        agent = self.get_agents(llm_provider).get(name)
+        if not agent:
+            raise ValueError(f"Agent '{name}' not found")
+        return agent
+    
+    def agent_names(self) -> List[str]:
+        return list(self.AGENT_CLASSES)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Instances currently held by the registry"""
+        return {
+            "providers": list(self._agents),
+            "agent_instances": sum(len(agents) for agents in self._agents.values()),
+            "llm_clients": len(self._llm_clients)
+        }
+
+# Global agent registry instance
+agent_registry = AgentRegistry()
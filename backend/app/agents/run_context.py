@@ -0,0 +1,50 @@
+"""
+Per-run state of a generation
+Keeps timings and logs out of the shared orchestrator and agents so that
+concurrent runs never overwrite each other's state
+"""
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+# Receives streamed agent output: (stream_id, sequence, delta, completed_code_blocks)
+OutputSink = Callable[[str, int, str, List[Dict[str, Any]]], Awaitable[None]]
+
+# Where agents running in the current context forward partial LLM output, if anywhere
+_output_sink: ContextVar[Optional[OutputSink]] = ContextVar("agent_output_sink", default=None)
+
+
+@contextmanager
+def output_sink_scope(sink: Optional[OutputSink]):
+    """Stream the output of agents run in this context to sink (None disables streaming)"""
+    token = _output_sink.set(sink)
+    try:
+        yield
+    finally:
+        _output_sink.reset(token)
+
+
+def current_output_sink() -> Optional[OutputSink]:
+    return _output_sink.get()
+
+
+class RunContext:
+    """State owned by a single generation run"""
+    
+    def __init__(self, run_id: str, project_id: Optional[str] = None):
+        self.run_id = run_id
+        # Target for WebSocket broadcasts, if the run belongs to a project
+        self.project_id = project_id
+        self.started_at = datetime.now()
+        self.execution_times: Dict[str, float] = {}
+        self.workflow_logs: List[Dict[str, Any]] = []
+    
+    def record_time(self, key: str, seconds: float):
+        self.execution_times[key] = seconds
+    
+    def add_log(self, message: str) -> Dict[str, Any]:
+        """Append a timestamped log entry and return it"""
+        entry = {"timestamp": datetime.now().isoformat(), "message": message}
+        self.workflow_logs.append(entry)
+        return entry
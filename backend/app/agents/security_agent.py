@@ -1,13 +1,16 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class SecurityAgent(BaseAgent):
     """Agent specialized in security auditing and vulnerability detection"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("Security_Auditor", llm_provider)
+    context_focus = "auth login password token jwt session secret encrypt hash validate sanitize permission role cors sql query upload"
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("Security_Auditor", llm_provider, llm_client)
+    
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Perform comprehensive security audit"""
         self.log("Starting security audit")
         
@@ -19,7 +22,7 @@ class SecurityAgent(BaseAgent):
 
 Requirements: {requirements}
 Platform: {platform}
-Code Context: {code_context[:1000] if code_context else 'N/A'}
+Code Context: {self.fit_context(code_context)}
 
 Provide detailed security analysis and implementations:
 
@@ -98,7 +101,7 @@ Provide detailed security analysis and implementations:
 
 Provide code implementations and configuration for all security measures."""
         
-        security_audit = self.generate_code(prompt, {
+        security_audit = await self.generate_code_async(prompt, {
             "platform": platform
         })
         
@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class TestingAgent(BaseAgent):
     """Agent specialized in creating comprehensive test suites"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("Testing_Engineer", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("Testing_Engineer", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Generate comprehensive test suites"""
         self.log("Starting test suite generation")
         
@@ -84,7 +85,7 @@ Provide complete test implementations for:
 
 Provide complete, runnable test code with proper setup."""
         
-        test_suite = self.generate_code(prompt, {
+        test_suite = await self.generate_code_async(prompt, {
             "platform": platform,
             "api_endpoints": api_endpoints
         })
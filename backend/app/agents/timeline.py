@@ -0,0 +1,136 @@
+"""
+Timeline analysis for generation runs
+Derives the critical path of a run from its per-stage timeline and
+aggregates timelines across runs to show which agents dominate latency
+"""
+from typing import Dict, Any, List, Optional
+
+# Timeline statuses of stages that actually ran
+_EXECUTED = ("completed", "timed_out")
+
+
+def critical_path(timeline: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    Chain of stages that determined the run's duration.
+    Starting from the stage that finished last, repeatedly step back to the
+    dependency that finished last, i.e. the one the stage was waiting on.
+    """
+    finished = {key: entry for key, entry in timeline.items() if "finished_offset_seconds" in entry}
+    if not finished:
+        return []
+
+    key = max(finished, key=lambda k: finished[k]["finished_offset_seconds"])
+    path = [key]
+    while True:
+        deps = [dep for dep in finished[key].get("depends_on", []) if dep in finished]
+        if not deps:
+            break
+        key = max(deps, key=lambda k: finished[k]["finished_offset_seconds"])
+        path.append(key)
+
+    path.reverse()
+    return path
+
+
+def summarize_timeline(timeline: Dict[str, Dict[str, Any]], wall_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Critical path and latency breakdown of one run.
+    parallelism is the summed stage time divided by the wall time; above 1
+    means stages overlapped and the run finished faster than sequentially.
+    """
+    path = critical_path(timeline)
+    finished = [entry for entry in timeline.values() if "duration_seconds" in entry]
+    stage_seconds = sum(entry["duration_seconds"] for entry in finished)
+    if wall_seconds is None:
+        wall_seconds = max((entry["finished_offset_seconds"] for entry in finished), default=0.0)
+
+    slowest = max(timeline, key=lambda k: timeline[k].get("duration_seconds", 0.0), default=None)
+    return {
+        "stages": path,
+        "critical_path_seconds": round(timeline[path[-1]]["finished_offset_seconds"], 4) if path else 0.0,
+        "critical_path_llm_wait_seconds": round(sum(timeline[k].get("llm_wait_seconds", 0.0) for k in path), 4),
+        "wall_seconds": round(wall_seconds, 4),
+        "total_stage_seconds": round(stage_seconds, 4),
+        "total_llm_wait_seconds": round(sum(entry.get("llm_wait_seconds", 0.0) for entry in finished), 4),
+        "parallelism": round(stage_seconds / wall_seconds, 2) if wall_seconds > 0 else None,
+        "slowest_stage": slowest
+    }
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def aggregate_timelines(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate the generation metadata of many runs.
+    Per stage: latency percentiles, LLM share of the stage time and how often
+    the stage was on the critical path. Reused stages are left out of the
+    latency figures since they did not execute.
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    wall_times, parallelism = [], []
+
+    for metadata in runs:
+        timeline = metadata.get("timeline") or {}
+        if not timeline:
+            continue
+        summary = metadata.get("critical_path") or summarize_timeline(timeline)
+        if summary.get("wall_seconds"):
+            wall_times.append(summary["wall_seconds"])
+        if summary.get("parallelism"):
+            parallelism.append(summary["parallelism"])
+
+        for key, entry in timeline.items():
+            stats = stages.setdefault(key, {
+                "agent": entry.get("agent"),
+                "durations": [],
+                "llm_wait_seconds": 0.0,
+                "runs": 0,
+                "reused": 0,
+                "timed_out": 0,
+                "retries": 0,
+                "on_critical_path": 0
+            })
+            stats["runs"] += 1
+            if key in summary.get("stages", []):
+                stats["on_critical_path"] += 1
+            if entry.get("status") == "reused":
+                stats["reused"] += 1
+            elif entry.get("status") in _EXECUTED:
+                stats["durations"].append(entry.get("duration_seconds", 0.0))
+                stats["llm_wait_seconds"] += entry.get("llm_wait_seconds", 0.0)
+                stats["retries"] += entry.get("retries", 0)
+                if entry["status"] == "timed_out":
+                    stats["timed_out"] += 1
+
+    stage_report = {}
+    for key, stats in stages.items():
+        durations = stats.pop("durations")
+        llm_wait = stats.pop("llm_wait_seconds")
+        total = sum(durations)
+        if durations:
+            stats.update({
+                "mean_seconds": round(total / len(durations), 4),
+                "p50_seconds": round(_percentile(durations, 50), 4),
+                "p95_seconds": round(_percentile(durations, 95), 4),
+                "max_seconds": round(max(durations), 4),
+                "llm_wait_share": round(llm_wait / total, 3) if total > 0 else None
+            })
+        stats["critical_path_share"] = round(stats["on_critical_path"] / stats["runs"], 3)
+        stage_report[key] = stats
+
+    return {
+        "runs": len(wall_times),
+        "mean_wall_seconds": round(sum(wall_times) / len(wall_times), 4) if wall_times else None,
+        "p95_wall_seconds": round(_percentile(wall_times, 95), 4) if wall_times else None,
+        "mean_parallelism": round(sum(parallelism) / len(parallelism), 2) if parallelism else None,
+        "stages": dict(sorted(
+            stage_report.items(),
+            key=lambda item: item[1].get("mean_seconds", 0.0),
+            reverse=True
+        ))
+    }
@@ -0,0 +1,93 @@
+"""
+Token accounting for generation runs
+Rolls the per-stage token counts recorded in a run's timeline up per agent
+and per run, and aggregates them across runs to show which agents' prompts
+dominate spend
+"""
+from typing import Dict, Any, List
+
+_FIELDS = ("input_tokens", "output_tokens", "llm_calls", "estimated_token_calls")
+
+
+def _empty() -> Dict[str, int]:
+    return {field: 0 for field in _FIELDS}
+
+
+def _finish(counts: Dict[str, Any]) -> Dict[str, Any]:
+    counts["total_tokens"] = counts["input_tokens"] + counts["output_tokens"]
+    counts["mean_input_tokens_per_call"] = (
+        round(counts["input_tokens"] / counts["llm_calls"]) if counts["llm_calls"] else 0
+    )
+    return counts
+
+
+def summarize_token_usage(timeline: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Token totals of one run, overall, per stage and per agent.
+    Only successful provider responses are counted, so llm_calls (and the
+    per-call means) leave out failed attempts and throttled retries; cache
+    hits, coalesced calls and reused stages cost nothing and add no tokens.
+    """
+    totals = _empty()
+    by_stage: Dict[str, Dict[str, Any]] = {}
+    by_agent: Dict[str, Dict[str, Any]] = {}
+
+    for key, entry in timeline.items():
+        counts = {
+            "input_tokens": entry.get("llm_input_tokens", 0),
+            "output_tokens": entry.get("llm_output_tokens", 0),
+            # Timelines recorded before responses were counted separately only have llm_calls
+            "llm_calls": entry.get("llm_responses", entry.get("llm_calls", 0)),
+            "estimated_token_calls": entry.get("llm_estimated_token_calls", 0)
+        }
+        agent = entry.get("agent") or key
+        by_stage[key] = _finish({"agent": agent, **counts})
+        agent_counts = by_agent.setdefault(agent, _empty())
+        for field in _FIELDS:
+            agent_counts[field] += counts[field]
+            totals[field] += counts[field]
+
+    return {
+        **_finish(totals),
+        "by_stage": by_stage,
+        "by_agent": {agent: _finish(counts) for agent, counts in by_agent.items()}
+    }
+
+
+def aggregate_token_usage(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate the token usage in the generation metadata of many runs.
+    Per agent: totals, mean tokens per run and per call, and the agent's
+    share of all tokens spent.
+    """
+    totals = _empty()
+    agents: Dict[str, Dict[str, Any]] = {}
+    run_count = 0
+
+    for metadata in runs:
+        usage = metadata.get("token_usage") or summarize_token_usage(metadata.get("timeline") or {})
+        if not usage.get("by_agent"):
+            continue
+        run_count += 1
+        for field in _FIELDS:
+            totals[field] += usage.get(field, 0)
+        for agent, counts in usage["by_agent"].items():
+            stats = agents.setdefault(agent, {**_empty(), "runs": 0})
+            stats["runs"] += 1
+            for field in _FIELDS:
+                stats[field] += counts.get(field, 0)
+
+    total_tokens = totals["input_tokens"] + totals["output_tokens"]
+    report = {}
+    for agent, stats in agents.items():
+        stats = _finish(stats)
+        stats["mean_tokens_per_run"] = round(stats["total_tokens"] / stats["runs"])
+        stats["token_share"] = round(stats["total_tokens"] / total_tokens, 3) if total_tokens else None
+        report[agent] = stats
+
+    return {
+        "runs": run_count,
+        **_finish(totals),
+        "mean_tokens_per_run": round(total_tokens / run_count) if run_count else None,
+        "agents": dict(sorted(report.items(), key=lambda item: item[1]["total_tokens"], reverse=True))
+    }
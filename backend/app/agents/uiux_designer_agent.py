@@ -1,13 +1,14 @@
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.core.llm_client import LLMClient
+from typing import Dict, Any, Optional
 
 class UIUXDesignerAgent(BaseAgent):
     """Agent specialized in UI/UX design and design systems"""
     
-    def __init__(self, llm_provider: str = "emergent"):
-        super().__init__("UIUX_Designer", llm_provider)
+    def __init__(self, llm_provider: str = "emergent", llm_client: Optional[LLMClient] = None):
+        super().__init__("UIUX_Designer", llm_provider, llm_client)
     
-    def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute_async(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Create comprehensive UI/UX design system"""
         self.log("Starting UI/UX design system creation")
         
@@ -82,7 +83,8 @@ Provide detailed specifications for:
 
 Format as a complete design system with code examples (CSS/Tailwind)."""
         
-        design_system = self.generate_code(prompt, {
+        # Requirements worded differently may reuse an earlier design system
+        design_system, near_duplicate = await self.generate_code_reusable_async(prompt, requirements, {
             "platform": platform,
             "design_style": design_style
         })
@@ -93,6 +95,7 @@ Format as a complete design system with code examples (CSS/Tailwind)."""
             "agent": self.name,
             "status": "completed",
             "design_system": design_system,
+            "near_duplicate": near_duplicate,
             "platform": platform,
             "features": [
                 "Complete Color Palette",
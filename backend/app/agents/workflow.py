@@ -0,0 +1,228 @@
+"""
+Workflow scheduling for the agent orchestrator
+Runs generation stages as a dependency graph, starting each stage
+as soon as every stage it depends on has completed
+"""
+from typing import Dict, Any, List, Callable, Awaitable, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from app.core.llm_context import deadline_scope, remaining_time, llm_stats_scope
+
+logger = logging.getLogger(__name__)
+
+# Status recorded for a non-critical stage that ran out of time
+STAGE_TIMED_OUT = "timed_out"
+
+InputBuilder = Callable[[Dict[str, Any]], Any]
+StageRunner = Callable[[Any], Awaitable[Any]]
+StageCallback = Callable[[str, Any, str], Awaitable[None]]
+
+
+def fingerprint_inputs(agent: str, inputs: Any) -> str:
+    """Content hash of everything a stage consumes"""
+    payload = json.dumps({"agent": agent, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WorkflowStage:
+    """A single stage of the generation workflow"""
+
+    def __init__(
+        self,
+        key: str,
+        agent: str,
+        build_inputs: InputBuilder,
+        run: StageRunner,
+        depends_on: Optional[List[str]] = None,
+        label: str = "",
+        critical: bool = True
+    ):
+        self.key = key
+        self.agent = agent
+        # Builds the stage inputs from the outputs of its dependencies
+        self.build_inputs = build_inputs
+        # Executes the stage for the given inputs
+        self.run = run
+        self.depends_on = list(depends_on or [])
+        self.label = label or key
+        # A non-critical stage that times out yields a marker instead of failing the run
+        self.critical = critical
+
+    def __repr__(self) -> str:
+        return f"WorkflowStage({self.key!r}, depends_on={self.depends_on!r})"
+
+
+class WorkflowScheduler:
+    """Executes workflow stages concurrently, respecting their dependencies"""
+
+    def __init__(self, stages: List[WorkflowStage], stage_timeout: Optional[float] = None):
+        self.stages = {stage.key: stage for stage in stages}
+        # Upper bound per stage; the enclosing deadline_scope bounds the whole run
+        self.stage_timeout = stage_timeout
+        self.fingerprints: Dict[str, str] = {}
+        self.reused: List[str] = []
+        self.timed_out: List[str] = []
+        # Per-stage timing, see _record()
+        self.timeline: Dict[str, Dict[str, Any]] = {}
+        self._started = time.monotonic()
+        self._validate()
+
+    def _validate(self):
+        """Reject unknown dependencies and dependency cycles"""
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.key}' depends on unknown stage '{dep}'")
+
+        visiting, visited = set(), set()
+
+        def visit(key: str):
+            if key in visited:
+                return
+            if key in visiting:
+                raise ValueError(f"Dependency cycle detected at stage '{key}'")
+            visiting.add(key)
+            for dep in self.stages[key].depends_on:
+                visit(dep)
+            visiting.discard(key)
+            visited.add(key)
+
+        for key in self.stages:
+            visit(key)
+
+    async def run(
+        self,
+        previous: Optional[Dict[str, Dict[str, Any]]] = None,
+        on_stage_complete: Optional[StageCallback] = None,
+        release_outputs: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Run all stages and return their outputs keyed by stage key.
+
+        `previous` maps stage keys to {"fingerprint", "result"} from an earlier run.
+        A stage whose input fingerprint is unchanged reuses that result instead of
+        executing again. If any stage fails, the remaining stages are cancelled
+        and the error is raised.
+
+        With release_outputs, an output is dropped as soon as every stage that
+        consumes it has started, so only on_stage_complete sees each result and
+        the returned dict is empty.
+        """
+        previous = previous or {}
+        self._started = time.monotonic()
+        outputs: Dict[str, Any] = {}
+        finished = set()
+        pending = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+        consumers = {
+            key: [other.key for other in self.stages.values() if key in other.depends_on]
+            for key in self.stages
+        }
+
+        try:
+            while pending or running:
+                for key, stage in list(pending.items()):
+                    if all(dep in finished for dep in stage.depends_on):
+                        del pending[key]
+                        self._record(key, "queued")
+                        inputs = stage.build_inputs(outputs)
+                        fingerprint = fingerprint_inputs(stage.agent, inputs)
+                        self.fingerprints[key] = fingerprint
+
+                        checkpoint = previous.get(key)
+                        if checkpoint and checkpoint.get("fingerprint") == fingerprint:
+                            logger.info(f"Stage '{key}' inputs unchanged, reusing previous result")
+                            self.reused.append(key)
+                            task = asyncio.create_task(self._reuse(key, checkpoint["result"]))
+                        else:
+                            task = asyncio.create_task(self._run_stage(stage, inputs))
+                        running[task] = key
+
+                if release_outputs:
+                    # Inputs are built when a stage starts, so started consumers no longer need the output
+                    for key in list(outputs):
+                        if all(consumer not in pending for consumer in consumers[key]):
+                            del outputs[key]
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    key = running.pop(task)
+                    outputs[key] = task.result()
+                    finished.add(key)
+                    if on_stage_complete:
+                        await on_stage_complete(key, outputs[key], self.fingerprints[key])
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+        if release_outputs:
+            outputs.clear()
+        return outputs
+
+    async def _run_stage(self, stage: WorkflowStage, inputs: Any) -> Any:
+        """Run a stage within its deadline, which also bounds every LLM call it makes"""
+        timeout = self.stage_timeout
+        remaining = remaining_time()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        self._record(stage.key, "started")
+        status = "failed"
+        with deadline_scope(timeout), llm_stats_scope() as stats:
+            try:
+                result = await asyncio.wait_for(stage.run(inputs), timeout)
+                status = "completed"
+                return result
+            except asyncio.TimeoutError as e:
+                # Without a stage deadline the timeout came from inside the stage, e.g. an HTTP read
+                timed_out = f"timed out after {timeout:.0f}s" if timeout is not None else f"timed out ({str(e) or 'inner timeout'})"
+                if stage.critical:
+                    raise asyncio.TimeoutError(f"Stage '{stage.key}' {timed_out}")
+                logger.warning(f"Non-critical stage '{stage.key}' {timed_out}, continuing without it")
+                self.timed_out.append(stage.key)
+                status = STAGE_TIMED_OUT
+                return {
+                    "agent": stage.agent,
+                    "status": STAGE_TIMED_OUT,
+                    "message": f"Stage '{stage.key}' {timed_out}; result omitted"
+                }
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                self._record(stage.key, "finished", status=status, **stats.to_dict())
+
+    async def _reuse(self, key: str, result: Any) -> Any:
+        self._record(key, "started")
+        self._record(key, "finished", status="reused")
+        return result
+
+    def _record(self, key: str, event: str, **fields: Any):
+        """
+        Record a stage event ("queued", "started" or "finished") in the timeline.
+        Offsets are seconds since the run started; once finished, an entry also
+        holds queue, run and LLM wait time plus the LLM call counts of the stage.
+        """
+        offset = time.monotonic() - self._started
+        entry = self.timeline.setdefault(key, {
+            "agent": self.stages[key].agent,
+            "depends_on": self.stages[key].depends_on,
+            "status": "pending"
+        })
+        entry[f"{event}_at"] = datetime.now().isoformat()
+        entry[f"{event}_offset_seconds"] = round(offset, 4)
+        entry.update(fields)
+
+        if event == "started":
+            entry["status"] = "running"
+            entry["queue_seconds"] = round(offset - entry["queued_offset_seconds"], 4)
+        elif event == "finished":
+            duration = offset - entry["started_offset_seconds"]
+            entry["duration_seconds"] = round(duration, 4)
+            entry["processing_seconds"] = round(max(0.0, duration - entry.get("llm_wait_seconds", 0.0)), 4)
@@ -0,0 +1,183 @@
+"""
+Declarative workflow definitions for the agent orchestrator
+
+Each stage names the agent that runs it, the stages it depends on and how its
+agent task is assembled. Input values are literals or references:
+- "$config.<field>"          normalized project configuration
+- "$stages.<stage>.<field>"  a field of an upstream stage result ("" if absent)
+- "$derived.<name>"          a value computed by the orchestrator from stage results
+- "$platform"                the current platform of a per-platform stage
+
+A profile is an ordered list of stages. Dependencies on stages that a profile
+leaves out are dropped, and references to their results resolve to "".
+"""
+from typing import Dict, Any
+
+DEFAULT_WORKFLOW_PROFILE = "full"
+
+STAGE_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    "database": {
+        "agent": "database",
+        "icon": "📊",
+        "label": "Designing database schema",
+        "inputs": {
+            "requirements": "$config.requirements",
+            "db_type": "mongodb"
+        }
+    },
+    "api_architecture": {
+        "agent": "api_architect",
+        "icon": "🔌",
+        "label": "Designing API architecture",
+        "inputs": {
+            "requirements": "$config.requirements",
+            "app_type": "$config.app_type",
+            "architecture": "rest"
+        }
+    },
+    "design_system": {
+        "agent": "uiux_designer",
+        "icon": "🎨",
+        "label": "Creating UI/UX design system",
+        "inputs": {
+            "requirements": "$config.requirements",
+            "platform": "$config.primary_platform",
+            "design_style": "$config.design_style"
+        }
+    },
+    "image_assets": {
+        "agent": "image_generator",
+        "icon": "🖼️ ",
+        "label": "Generating image specifications",
+        "critical": False,
+        "inputs": {
+            "requirements": "$config.requirements",
+            "image_types": ["logo", "hero", "icons", "illustrations"],
+            "style": "$config.design_style"
+        }
+    },
+    "backend": {
+        "agent": "backend",
+        "icon": "⚙️ ",
+        "label": "Generating backend code",
+        "depends_on": ["database", "api_architecture"],
+        "inputs": {
+            "requirements": "$config.requirements",
+            "project_type": "$config.app_type",
+            "architecture": "$config.architecture_type",
+            "api_spec": "$stages.api_architecture.api_specification",
+            "database_schema": "$stages.database.schema"
+        }
+    },
+    "frontend": {
+        "agent": "frontend",
+        "icon": "💻",
+        "label": "Generating frontend code",
+        "depends_on": ["api_architecture", "design_system", "image_assets"],
+        "per_platform": True,
+        "inputs": {
+            "requirements": "$config.requirements",
+            "platform": "$platform",
+            "api_endpoints": "$derived.api_endpoints",
+            "design_system": "$stages.design_system.design_system",
+            "image_specs": "$stages.image_assets.image_specifications"
+        }
+    },
+    "security": {
+        "agent": "security",
+        "icon": "🔒",
+        "label": "Performing security audit",
+        "depends_on": ["backend", "frontend"],
+        "inputs": {
+            "requirements": "$config.requirements",
+            "code_context": "$derived.code_summary",
+            "platform": "$config.app_type"
+        }
+    },
+    "performance": {
+        "agent": "performance",
+        "icon": "⚡",
+        "label": "Optimizing performance",
+        "depends_on": ["backend", "frontend"],
+        "inputs": {
+            "requirements": "$config.requirements",
+            "platform": "$config.app_type",
+            "code_context": "$derived.code_summary"
+        }
+    },
+    "testing": {
+        "agent": "testing",
+        "icon": "🧪",
+        "label": "Generating test suites",
+        "depends_on": ["api_architecture"],
+        "inputs": {
+            "requirements": "$config.requirements",
+            "platform": "$config.primary_platform",
+            "api_endpoints": "$derived.api_endpoints"
+        }
+    },
+    "devops": {
+        "agent": "devops",
+        "icon": "🐳",
+        "label": "Setting up DevOps infrastructure",
+        "inputs": {
+            "requirements": "$config.requirements",
+            "platforms": "$config.target_platforms",
+            "deployment_target": "$config.deployment_target"
+        }
+    },
+    "documentation": {
+        "agent": "documentation",
+        "icon": "📝",
+        "label": "Generating documentation",
+        "critical": False,
+        "inputs": {
+            "requirements": "$config.requirements",
+            "project_name": "$config.name",
+            "features": "$derived.features",
+            "tech_stack": "$derived.tech_stack"
+        }
+    },
+    "code_review": {
+        "agent": "code_review",
+        "icon": "✅",
+        "label": "Performing code review",
+        "depends_on": ["backend", "frontend"],
+        "critical": False,
+        "inputs": {
+            "code_context": "$derived.code_summary",
+            "platform": "$config.app_type"
+        }
+    }
+}
+
+WORKFLOW_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "description": "Code only: database, API design, backend and frontend",
+        "stages": ["database", "api_architecture", "backend", "frontend"]
+    },
+    "standard": {
+        "description": "Code plus design system, security, performance, tests and DevOps",
+        "stages": [
+            "database", "api_architecture", "design_system", "backend", "frontend",
+            "security", "performance", "testing", "devops"
+        ]
+    },
+    "full": {
+        "description": "All 12 agents, including images, documentation and code review",
+        "stages": [
+            "database", "api_architecture", "design_system", "image_assets", "backend", "frontend",
+            "security", "performance", "testing", "devops", "documentation", "code_review"
+        ]
+    }
+}
+
+
+def get_workflow_profile(name: str) -> Dict[str, Any]:
+    """Get a workflow profile by name"""
+    profile = WORKFLOW_PROFILES.get(name)
+    if not profile:
+        raise ValueError(
+            f"Unknown workflow profile '{name}'. Available: {', '.join(WORKFLOW_PROFILES)}"
+        )
+    return profile
@@ -2,6 +2,13 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Dict, Any
 from app.models.agent import AgentTask, AgentTaskCreate
 from app.services.agent_service import AgentService
+from app.agents.workflow_profiles import WORKFLOW_PROFILES, STAGE_DEFINITIONS, DEFAULT_WORKFLOW_PROFILE
+from app.core.llm_cache import llm_cache
+from app.core.rate_limiter import llm_rate_limiters
+from app.core.circuit_breaker import provider_breakers
+from app.core.hedging import llm_hedger
+from app.core.single_flight import llm_single_flight
+from app.core.similarity_cache import llm_similarity_cache
 
 router = APIRouter(prefix="/agents", tags=["agents"])
 
@@ -130,6 +137,73 @@ async def get_agent_types():
         ]
     }
 
+@router.get("/workflows")
+async def get_workflow_profiles():
+    """Get the built-in workflow profiles a project can select"""
+    return {
+        "default": DEFAULT_WORKFLOW_PROFILE,
+        "profiles": [
+            {
+                "name": name,
+                "description": profile["description"],
+                "stages": [
+                    {
+                        "stage": stage,
+                        "agent": STAGE_DEFINITIONS[stage]["agent"],
+                        "depends_on": [
+                            dep for dep in STAGE_DEFINITIONS[stage].get("depends_on", [])
+                            if dep in profile["stages"]
+                        ]
+                    }
+                    for stage in profile["stages"]
+                ]
+            }
+            for name, profile in WORKFLOW_PROFILES.items()
+        ]
+    }
+
+@router.get("/llm-cache")
+async def get_llm_cache_stats():
+    """Get LLM response cache hit/miss metrics and size"""
+    return await llm_cache.get_stats_async()
+
+@router.delete("/llm-cache")
+async def clear_llm_cache():
+    """Drop all cached LLM responses"""
+    await llm_cache.clear_async()
+    return {"message": "LLM response cache cleared"}
+
+@router.get("/llm-limits")
+async def get_llm_rate_limits():
+    """Get rate limiter state and queue-wait metrics per provider and model"""
+    return llm_rate_limiters.get_stats()
+
+@router.get("/llm-providers")
+async def get_llm_provider_health():
+    """Get circuit breaker state, error rate and p95 latency per LLM provider"""
+    return provider_breakers.get_states()
+
+@router.get("/llm-hedging")
+async def get_llm_hedging_stats():
+    """Get hedged-request counts, budget use and hedge delays per agent/model"""
+    return llm_hedger.get_stats()
+
+@router.get("/llm-similarity-cache")
+async def get_llm_similarity_cache_stats():
+    """Get near-duplicate cache hit/miss metrics and size"""
+    return llm_similarity_cache.get_stats()
+
+@router.delete("/llm-similarity-cache")
+async def clear_llm_similarity_cache():
+    """Remove all entries from the near-duplicate cache"""
+    llm_similarity_cache.clear()
+    return {"message": "Near-duplicate cache cleared"}
+
+@router.get("/llm-coalescing")
+async def get_llm_coalescing_stats():
+    """Get how many LLM requests joined an identical request already in flight"""
+    return llm_single_flight.get_stats()
+
 @router.post("/tasks", response_model=AgentTask)
 async def create_agent_task(task: AgentTaskCreate):
     """Create a new agent task"""
@@ -5,6 +5,10 @@ import os
 from app.models.project import Project, ProjectCreate, ProjectUpdate
 from app.services.project_service import ProjectService
 from app.services.generation_service import GenerationService
+from app.agents.workflow_profiles import WORKFLOW_PROFILES
+from app.agents.timeline import aggregate_timelines
+from app.agents.token_usage import aggregate_token_usage
+from app.core.llm_context import unscoped_token_usage
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -14,6 +18,9 @@ generation_service = GenerationService()
 @router.post("", response_model=Project)
 async def create_project(project: ProjectCreate):
     """Create a new project"""
+    if project.workflow_profile not in WORKFLOW_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown workflow profile: {project.workflow_profile}")
+    
     try:
         return await project_service.create_project(project)
     except Exception as e:
@@ -27,6 +34,28 @@ async def get_projects():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/timelines/summary")
+async def get_timeline_summary(limit: int = 100):
+    """Aggregate stage latency and critical paths over the last runs of recent projects"""
+    try:
+        runs = await project_service.get_generation_metadata(min(max(limit, 1), 1000))
+        return aggregate_timelines(runs)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/token-usage/summary")
+async def get_token_usage_summary(limit: int = 100):
+    """
+    Aggregate LLM token usage per agent over the last runs of recent projects.
+    outside_runs covers calls made outside any generation run (e.g. requirements
+    analysis requests) by this process since it started.
+    """
+    try:
+        runs = await project_service.get_generation_metadata(min(max(limit, 1), 1000))
+        return {**aggregate_token_usage(runs), "outside_runs": unscoped_token_usage()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{project_id}", response_model=Project)
 async def get_project(project_id: str):
     """Get a specific project"""
@@ -38,6 +67,9 @@ async def get_project(project_id: str):
 @router.put("/{project_id}", response_model=Project)
 async def update_project(project_id: str, update: ProjectUpdate):
     """Update a project"""
+    if update.workflow_profile is not None and update.workflow_profile not in WORKFLOW_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown workflow profile: {update.workflow_profile}")
+    
     project = await project_service.update_project(project_id, update)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -78,7 +110,25 @@ async def get_generation_status(project_id: str):
         "project_id": project_id,
         "status": project.status,
         "progress": project.progress,
-        "logs": project.agent_logs[-10:] if project.agent_logs else []  # Last 10 logs
+        "logs": project.agent_logs[-10:] if project.agent_logs else [],  # Last 10 logs
+        "run_id": project.last_run_id,
+        "timeline": project.generation_metadata.get("timeline", {}),
+        "critical_path": project.generation_metadata.get("critical_path"),
+        "execution_times": project.generation_metadata.get("execution_times", {})
+    }
+
+@router.get("/{project_id}/token-usage")
+async def get_token_usage(project_id: str):
+    """Get LLM token usage of the project's last run and across all its runs"""
+    project = await project_service.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    return {
+        "project_id": project_id,
+        "run_id": project.last_run_id,
+        "last_run": project.generation_metadata.get("token_usage"),
+        "all_runs": project.token_usage
     }
 
 @router.get("/{project_id}/code")
@@ -131,9 +181,36 @@ async def download_generated_code(project_id: str):
         }
     )
 
+@router.post("/{project_id}/resume")
+async def resume_generation(project_id: str, background_tasks: BackgroundTasks):
+    """Resume the last generation run, re-executing only the stages that did not finish"""
+    project = await project_service.get_project(project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if project.status == "completed":
+        raise HTTPException(status_code=400, detail="Project generation already completed")
+    
+    if project.status == "in_progress":
+        raise HTTPException(status_code=400, detail="Project generation is already in progress")
+    
+    # Resume generation in background
+    background_tasks.add_task(generation_service.generate_app, project_id, True)
+    
+    return {
+        "message": "Application generation resumed",
+        "project_id": project_id,
+        "run_id": project.last_run_id,
+        "status": "in_progress"
+    }
+
 @router.post("/{project_id}/regenerate")
-async def regenerate_application(project_id: str, background_tasks: BackgroundTasks):
-    """Regenerate the application with the same configuration"""
+async def regenerate_application(project_id: str, background_tasks: BackgroundTasks, full: bool = False):
+    """
+    Regenerate the application with the current configuration.
+    Only stages whose inputs changed since the last run are re-executed,
+    unless full=true is passed.
+    """
     project = await project_service.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -147,11 +224,13 @@ async def regenerate_application(project_id: str, background_tasks: BackgroundTa
     ))
     
     # Start generation in background
-    background_tasks.add_task(generation_service.generate_app, project_id)
+    background_tasks.add_task(generation_service.generate_app, project_id, False, not full)
     
     return {
         "message": "Application regeneration started",
         "project_id": project_id,
         "status": "in_progress",
-        "note": "Previous generation data has been cleared"
+        "incremental": not full,
+        "note": "Previous generation data has been cleared" if full
+                else "Stages with unchanged inputs will be reused from the last run"
     }
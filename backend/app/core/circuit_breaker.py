@@ -0,0 +1,190 @@
+"""
+Circuit breakers for LLM providers
+Each provider's breaker tracks the error rate and p95 latency of its recent
+calls. A failing or browned-out provider is taken out of rotation (open),
+then probed again after a cool-down (half-open) before it is trusted (closed).
+"""
+from typing import Dict, Any, Optional
+from collections import deque
+import logging
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Rolling-window breaker for one provider"""
+
+    def __init__(
+        self,
+        name: str,
+        window_size: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        error_rate_threshold: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_probes: Optional[int] = None
+    ):
+        self.name = name
+        self.window_size = window_size or settings.LLM_BREAKER_WINDOW
+        self.min_calls = min_calls or settings.LLM_BREAKER_MIN_CALLS
+        self.error_rate_threshold = error_rate_threshold or settings.LLM_BREAKER_ERROR_RATE
+        self.slow_call_seconds = slow_call_seconds or settings.LLM_BREAKER_SLOW_CALL_SECONDS
+        self.open_seconds = open_seconds or settings.LLM_BREAKER_OPEN_SECONDS
+        self.half_open_probes = half_open_probes or settings.LLM_BREAKER_HALF_OPEN_PROBES
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.last_trip_reason = ""
+        self.trips = 0
+        self.rejected = 0
+        self._probes_in_flight = 0
+        # Calls started from this time on were admitted as half-open probes
+        self._half_open_since = 0.0
+        # (succeeded, latency_seconds) of the most recent calls
+        self._window: deque = deque(maxlen=self.window_size)
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to this provider now; half-open admits a limited number of probes"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probes_in_flight = 0
+                self._half_open_since = time.monotonic()
+                logger.info(f"Circuit for LLM provider '{self.name}' half-open, probing")
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def is_available(self) -> bool:
+        """Whether the provider may take calls, counting an open circuit whose cool-down has elapsed"""
+        with self._lock:
+            return self.state != OPEN or time.monotonic() - self.opened_at >= self.open_seconds
+
+    def _is_probe(self, latency: float) -> bool:
+        """
+        Whether a finished call was a half-open probe. Calls admitted before the
+        circuit opened can finish while it is half-open; they neither free a
+        probe slot nor decide the probe's outcome.
+        """
+        return self.state == HALF_OPEN and time.monotonic() - latency >= self._half_open_since
+
+    def _probe_finished(self):
+        self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._window.append((True, latency))
+            if self._is_probe(latency):
+                self._probe_finished()
+                if latency < self.slow_call_seconds:
+                    self._close()
+                else:
+                    self._trip(f"half-open probe took {latency:.1f}s")
+            elif self.state == CLOSED:
+                self._evaluate()
+
+    def record_failure(self, latency: float, error: str = ""):
+        with self._lock:
+            self._window.append((False, latency))
+            if self._is_probe(latency):
+                self._probe_finished()
+                self._trip(f"half-open probe failed: {error}")
+            elif self.state == CLOSED:
+                self._evaluate()
+
+    def record_abandoned(self, latency: float):
+        """A call that was cancelled by its caller says nothing about the provider, but frees its probe slot"""
+        with self._lock:
+            if self._is_probe(latency):
+                self._probe_finished()
+
+    def _evaluate(self):
+        if len(self._window) < self.min_calls:
+            return
+        error_rate = self._error_rate()
+        if error_rate >= self.error_rate_threshold:
+            self._trip(f"error rate {error_rate:.0%} over the last {len(self._window)} calls")
+            return
+        p95 = self._p95()
+        if p95 is not None and p95 >= self.slow_call_seconds:
+            self._trip(f"p95 latency {p95:.1f}s over the last {len(self._window)} calls")
+
+    def _trip(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.last_trip_reason = reason
+        self.trips += 1
+        logger.warning(f"Circuit for LLM provider '{self.name}' opened: {reason}")
+
+    def _close(self):
+        self.state = CLOSED
+        self._window.clear()
+        logger.info(f"Circuit for LLM provider '{self.name}' closed")
+
+    def _error_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return sum(1 for ok, _ in self._window if not ok) / len(self._window)
+
+    def _p95(self) -> Optional[float]:
+        latencies = sorted(latency for _, latency in self._window)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def p95_latency(self) -> Optional[float]:
+        """p95 latency of recent calls, or None until min_calls have been observed"""
+        with self._lock:
+            return self._p95() if len(self._window) >= self.min_calls else None
+
+    def get_state(self) -> Dict[str, Any]:
+        with self._lock:
+            p95 = self._p95()
+            return {
+                "state": self.state,
+                "recent_calls": len(self._window),
+                "error_rate": round(self._error_rate(), 3),
+                "p95_latency_seconds": round(p95, 3) if p95 is not None else None,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "last_trip_reason": self.last_trip_reason,
+                "retry_in_seconds": round(max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)), 1)
+                if self.state == OPEN else 0.0
+            }
+
+
+class CircuitBreakerRegistry:
+    """One breaker per provider, shared process-wide"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(provider)
+            if breaker is None:
+                breaker = self._breakers[provider] = CircuitBreaker(provider)
+            return breaker
+
+    def get_states(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {provider: breaker.get_state() for provider, breaker in breakers.items()}
+
+# Global provider circuit breakers
+provider_breakers = CircuitBreakerRegistry()
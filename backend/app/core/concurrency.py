@@ -0,0 +1,49 @@
+"""
+Concurrency helpers shared by agents and the orchestrator
+"""
+from typing import Dict, Any, Awaitable, List
+import asyncio
+
+
+async def gather_limited(awaitables: Dict[str, Awaitable[Any]], limit: int) -> Dict[str, Any]:
+    """
+    Await named awaitables concurrently, at most `limit` at a time, and return
+    their results by name. If one fails, the others are cancelled and the error is raised.
+    
+    The limit bounds this call only (e.g. one agent's sub-tasks); LLM traffic
+    across the process is governed by the rate limiters (LLM_MAX_IN_FLIGHT).
+    Awaitables that never got a slot are closed or cancelled on failure, so no
+    coroutine is left unawaited and no task passed in keeps running.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    started = set()
+    
+    async def run_limited(name: str, awaitable: Awaitable[Any]) -> Any:
+        async with semaphore:
+            started.add(name)
+            return await awaitable
+    
+    tasks = {name: asyncio.create_task(run_limited(name, awaitable)) for name, awaitable in awaitables.items()}
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await _discard([awaitable for name, awaitable in awaitables.items() if name not in started])
+        raise
+    
+    return {name: task.result() for name, task in tasks.items()}
+
+
+async def _discard(awaitables: List[Awaitable[Any]]):
+    """Close coroutines that never ran and cancel futures that never got awaited"""
+    futures = []
+    for awaitable in awaitables:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif asyncio.isfuture(awaitable):
+            awaitable.cancel()
+            futures.append(awaitable)
+    if futures:
+        await asyncio.gather(*futures, return_exceptions=True)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 
 class Settings(BaseSettings):
@@ -21,10 +21,85 @@ class Settings(BaseSettings):
     # LLM Integration
     EMERGENT_LLM_KEY: str = ""
     GEMINI_API_KEY: str = ""
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"  # point at a local stand-in for tests
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    # Local fake provider for load tests (python -m app.core.fake_llm_server); replaces real providers when set
+    LLM_FAKE_PROVIDER_URL: str = ""  # e.g. "http://127.0.0.1:8099/v1beta"
+    LLM_FAKE_PROVIDER_MODEL: str = "fake-llm"
     
+    # Pooled HTTP client (fallback LLM provider)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept open
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_READ_TIMEOUT: float = 60.0
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = ".cache/llm_responses.sqlite3"  # empty to keep the cache in memory only
+    LLM_CACHE_MAX_ENTRIES: int = 512  # in-memory LRU tier
+    LLM_CACHE_MAX_DISK_MB: int = 256
+    LLM_CACHE_TTL: int = 7 * 24 * 3600  # seconds
+    
+    # LLM rate limits, per provider and model (0 disables a limit)
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 400000
+    LLM_MAX_IN_FLIGHT: int = 32
+    # Overrides keyed by "provider" or "provider:model", e.g. {"gemini": {"requests_per_minute": 60}}
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {}
+    LLM_DEFAULT_COMPLETION_TOKENS: int = 1000  # token estimate when max_tokens is not set
+    LLM_THROTTLE_RETRIES: int = 2
+    LLM_THROTTLE_BACKOFF: float = 5.0  # seconds, when the provider gives no Retry-After
+    
+    # Provider circuit breakers and routing
+    LLM_BREAKER_WINDOW: int = 20  # recent calls tracked per provider
+    LLM_BREAKER_MIN_CALLS: int = 5  # calls needed before the breaker can trip
+    LLM_BREAKER_ERROR_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 90.0  # p95 latency that counts as a brownout
+    LLM_BREAKER_OPEN_SECONDS: float = 30.0  # cool-down before half-open probes
+    LLM_BREAKER_HALF_OPEN_PROBES: int = 1
+    LLM_ROUTING_LATENCY_RATIO: float = 2.0  # prefer the fallback when the primary's p95 is this much slower
+    
+    # Hedged requests (opt-in): back up calls that run past a latency percentile
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_BUDGET: float = 0.1  # max fraction of requests that get a backup
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latency history needed per agent/model before hedging
+    LLM_HEDGE_MIN_DELAY: float = 2.0  # never hedge sooner than this, in seconds
+    
+    # Near-duplicate cache (opt-in): reuse responses for requirements that differ only in wording
+    LLM_SIMILARITY_CACHE_ENABLED: bool = False
+    LLM_SIMILARITY_THRESHOLD: float = 0.8  # estimated Jaccard similarity of normalized requirements
+    LLM_SIMILARITY_MAX_ENTRIES: int = 2000
+    
+    # Identical prompts in flight at the same time share one provider request
+    LLM_COALESCING_ENABLED: bool = True
+    
+    # Token streaming to WebSocket clients watching a generation
+    LLM_STREAMING_ENABLED: bool = True
+    LLM_STREAM_FLUSH_INTERVAL: float = 0.1  # seconds; deltas arriving faster are coalesced
+    
+    # Prompt context budgets, in tokens
+    AGENT_CONTEXT_TOKENS: int = 1200  # context attached to an agent's prompt
+    AGENT_CONTEXT_BUDGETS: Dict[str, int] = {}  # per-agent overrides by agent name, e.g. {"Code_Reviewer": 2000}
+    CODE_SUMMARY_TOKENS: int = 1500  # generated-code summary handed to review agents
+    
+    # Batch an agent's independent sub-prompts into one request (fewer round-trips, less parallelism)
+    AGENT_BATCH_PROMPTS: bool = False
+    
+    # Record/replay cassettes of a run's LLM calls (see app/core/llm_cassette.py)
+    LLM_CASSETTE_MODE: str = ""  # "record", "replay" or empty for live calls
+    LLM_CASSETTE_DIR: str = "cassettes"  # recordings are written here as <run_id>.json.gz
+    LLM_CASSETTE_REPLAY_FILE: str = ""  # recording every run replays
+    LLM_CASSETTE_REPLAY_TIMING: str = "recorded"  # "recorded" latencies, or "fast" as fast as possible
+    LLM_CASSETTE_MATCH_THRESHOLD: float = 0.6  # similarity needed to replay a changed prompt
+
     # Agent Configuration
     MAX_AGENTS: int = 12
-    AGENT_TIMEOUT: int = 300  # seconds
+    AGENT_TIMEOUT: int = 300  # seconds, per workflow stage
+    GENERATION_TIMEOUT: int = 1800  # seconds, per generation run
+    AGENT_SUBTASK_CONCURRENCY: int = 3  # parallel LLM sub-prompts per agent
+    MAX_PLATFORM_CONCURRENCY: int = 3  # parallel frontend generations per run
     
     class Config:
         env_file = ".env"
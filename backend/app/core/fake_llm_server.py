@@ -0,0 +1,288 @@
+"""
+Local fake LLM provider for load tests
+Serves Gemini's generateContent and streamGenerateContent endpoints with
+deterministic, plausible agent output (code blocks, JSON, markdown), latency
+drawn from a per-agent distribution, and injected errors and 429s. Point the
+backend at it with LLM_FAKE_PROVIDER_URL (and usually LLM_CACHE_ENABLED=false):
+
+    python -m app.core.fake_llm_server --port 8099 --config fake_llm.json
+    LLM_FAKE_PROVIDER_URL=http://127.0.0.1:8099/v1beta
+
+The config file is JSON; every key is optional:
+
+    {
+        "seed": 42,
+        "time_scale": 1.0,
+        "default": {
+            "latency": {"distribution": "lognormal", "median": 4.0, "sigma": 0.5},
+            "error_rate": 0.0, "throttle_rate": 0.0, "output_tokens": 600
+        },
+        "agents": {
+            "security": {"latency": {"distribution": "normal", "mean": 12, "stddev": 3}},
+            "backend": {"latency": {"distribution": "fixed", "seconds": 5}, "throttle_rate": 0.05}
+        }
+    }
+"""
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG: Dict[str, Any] = {
+    "seed": 42,
+    # Multiplies every sampled latency; below 1 replays the same shape faster
+    "time_scale": 1.0,
+    "default": {
+        "latency": {"distribution": "lognormal", "median": 4.0, "sigma": 0.5},
+        "error_rate": 0.0,
+        "throttle_rate": 0.0,
+        "retry_after_seconds": 1,
+        # Share of the latency spent before the first streamed chunk
+        "first_token_share": 0.3,
+        "output_tokens": 600
+    },
+    "agents": {}
+}
+
+# Phrases that identify which agent wrote a prompt (matching registry names)
+AGENT_MARKERS: List[Tuple[str, str]] = [
+    ("api_architect", "Design a comprehensive API architecture"),
+    ("backend", "Generate FastAPI endpoint code"),
+    ("backend", "Generate Pydantic models"),
+    ("backend", "Generate service layer code"),
+    ("database", "database schema for"),
+    ("database", "Design indexes for"),
+    ("database", "Design data relationships"),
+    ("frontend", "components for:"),
+    ("frontend", "Generate API integration service"),
+    ("frontend", "configuration for:"),
+    ("uiux_designer", "UI/UX design system"),
+    ("image_generator", "visual asset specifications"),
+    ("security", "security audit"),
+    ("performance", "performance optimization strategy"),
+    ("testing", "testing strategy and test suites"),
+    ("devops", "DevOps infrastructure"),
+    ("documentation", "Create comprehensive documentation"),
+    ("code_review", "code review and quality assurance"),
+    ("requirements", "Return ONLY valid JSON")
+]
+
+# Language of the main code block each agent produces
+AGENT_LANGUAGES = {
+    "api_architect": "yaml", "backend": "python", "database": "javascript", "frontend": "jsx",
+    "uiux_designer": "css", "image_generator": "svg", "security": "python", "performance": "python",
+    "testing": "python", "devops": "yaml", "documentation": "markdown", "code_review": "python"
+}
+
+_TASK_HEADER = re.compile(r"^===== TASK: ([\w.-]+) =====$", re.MULTILINE)
+
+
+def classify_agent(prompt: str) -> str:
+    """Agent that most likely sent prompt, or "default"""
+    for agent, marker in AGENT_MARKERS:
+        if marker in prompt:
+            return agent
+    return "default"
+
+
+def sample_latency(spec: Dict[str, Any], rng: random.Random) -> float:
+    """Seconds drawn from a fixed, normal or lognormal latency spec"""
+    distribution = spec.get("distribution", "fixed")
+    if distribution == "fixed":
+        return max(0.0, float(spec.get("seconds", 0.0)))
+    if distribution == "normal":
+        return max(0.0, rng.gauss(spec.get("mean", 1.0), spec.get("stddev", 0.0)))
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(spec.get("median", 1.0)), spec.get("sigma", 0.5))
+    raise ValueError(f"Unknown latency distribution: {distribution}")
+
+
+def _code_lines(agent: str, rng: random.Random, count: int) -> List[str]:
+    """Deterministic filler code in the agent's language"""
+    language = AGENT_LANGUAGES.get(agent, "python")
+    lines = []
+    for index in range(count):
+        name = f"{rng.choice(['item', 'user', 'order', 'task', 'session'])}_{index}"
+        if language == "python":
+            lines.append(f"async def get_{name}(id: str) -> dict:\n    return await db.{name}.find_one({{'id': id}})")
+        elif language in ("jsx", "javascript"):
+            lines.append(f"export const {name} = async (id) => (await api.get(`/{name}/${{id}}`)).data;")
+        elif language == "yaml":
+            lines.append(f"{name}:\n  replicas: {rng.randint(1, 4)}\n  path: /{name}")
+        elif language == "css":
+            lines.append(f".{name} {{ padding: {rng.choice([4, 8, 16])}px; color: var(--color-{index % 5}); }}")
+        elif language == "svg":
+            lines.append(f'<circle cx="{rng.randint(0, 64)}" cy="{rng.randint(0, 64)}" r="{rng.randint(2, 12)}" />')
+        else:
+            lines.append(f"- **{name}**: {rng.choice(['create', 'read', 'update', 'delete'])} via `/{name}`")
+    return lines
+
+
+def fake_answer(agent: str, prompt: str, output_tokens: int) -> str:
+    """Plausible output for one prompt; the same prompt always gets the same answer"""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+    if agent == "requirements":
+        return json.dumps({
+            "app_type": "web",
+            "features": rng.sample(["auth", "crud", "search", "notifications", "payments", "dashboard"], 3),
+            "tech_stack": ["FastAPI", "React", "MongoDB"],
+            "complexity": rng.choice(["simple", "moderate", "complex"]),
+            "architecture": "modular monolith",
+            "estimated_time": f"{rng.randint(2, 12)} weeks"
+        }, indent=2)
+
+    # About 20 tokens per filler line
+    lines = _code_lines(agent, rng, max(1, output_tokens // 20))
+    language = AGENT_LANGUAGES.get(agent, "python")
+    return (
+        f"## {agent.replace('_', ' ').title()} output\n\n"
+        f"Generated implementation covering the requested items.\n\n"
+        f"```{language}\n" + "\n".join(lines) + "\n```\n\n"
+        f"### Notes\n- Deterministic fake response ({len(lines)} blocks)\n"
+    )
+
+
+def fake_response(prompt: str, output_tokens: int) -> str:
+    """Answer a prompt, answering each section of a batched prompt separately"""
+    tasks = _TASK_HEADER.findall(prompt)
+    if not tasks:
+        return fake_answer(classify_agent(prompt), prompt, output_tokens)
+    bodies = _TASK_HEADER.split(prompt)[2::2]
+    sections = []
+    for name, body in zip(tasks, bodies):
+        answer = fake_answer(classify_agent(body), body, output_tokens // len(tasks))
+        sections.append(f"===== SECTION: {name} =====\n{answer}\n===== END SECTION: {name} =====")
+    return "\n\n".join(sections)
+
+
+class FakeLLMServer:
+    """Behaviour and counters of the fake provider"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.default = {**DEFAULT_CONFIG["default"], **config.get("default", {})}
+        self.agents = self.config.get("agents", {})
+        self.rng = random.Random(self.config["seed"])
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def profile(self, agent: str) -> Dict[str, Any]:
+        return {**self.default, **self.agents.get(agent, {})}
+
+    def _count(self, agent: str, outcome: str):
+        with self._lock:
+            counts = self.stats.setdefault(agent, {"requests": 0, "ok": 0, "errors": 0, "throttled": 0})
+            counts["requests"] += 1
+            counts[outcome] += 1
+
+    def plan(self, prompt: str) -> Dict[str, Any]:
+        """Decide the outcome and latency of a request up front (one RNG draw sequence per request)"""
+        agent = classify_agent(prompt)
+        profile = self.profile(agent)
+        with self._lock:
+            roll = self.rng.random()
+            latency = sample_latency(profile["latency"], self.rng) * self.config["time_scale"]
+            # Failures still take a while, like a provider timing out internally
+            error_delay = latency * self.rng.random()
+        if roll < profile["throttle_rate"]:
+            outcome = "throttled"
+        elif roll < profile["throttle_rate"] + profile["error_rate"]:
+            outcome = "errors"
+        else:
+            outcome = "ok"
+        self._count(agent, outcome)
+        return {"agent": agent, "profile": profile, "latency": latency, "error_delay": error_delay, "outcome": outcome}
+
+    async def respond(self, body: Dict[str, Any], stream: bool):
+        prompt = "\n".join(
+            part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", [])
+        )
+        plan = self.plan(prompt)
+        profile = plan["profile"]
+        if plan["outcome"] == "throttled":
+            return JSONResponse(
+                {"error": {"code": 429, "message": "Resource has been exhausted (fake)", "status": "RESOURCE_EXHAUSTED"}},
+                status_code=429,
+                headers={"Retry-After": str(profile["retry_after_seconds"])}
+            )
+        if plan["outcome"] == "errors":
+            await asyncio.sleep(plan["error_delay"])
+            return JSONResponse(
+                {"error": {"code": 500, "message": "Internal error (fake)", "status": "INTERNAL"}}, status_code=500
+            )
+
+        max_tokens = body.get("generationConfig", {}).get("maxOutputTokens") or profile["output_tokens"]
+        text = fake_response(prompt, min(profile["output_tokens"], max_tokens))
+        usage = {"promptTokenCount": len(prompt) // 4 + 1, "candidatesTokenCount": len(text) // 4 + 1}
+        if not stream:
+            await asyncio.sleep(plan["latency"])
+            return JSONResponse({
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+                "usageMetadata": usage
+            })
+        return StreamingResponse(self._stream(text, usage, plan), media_type="text/event-stream")
+
+    async def _stream(self, text: str, usage: Dict[str, int], plan: Dict[str, Any]) -> AsyncIterator[str]:
+        chunks = [text[i:i + 120] for i in range(0, len(text), 120)] or [""]
+        first = plan["latency"] * plan["profile"]["first_token_share"]
+        gap = (plan["latency"] - first) / max(1, len(chunks) - 1)
+        await asyncio.sleep(first)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(gap)
+            event = {"candidates": [{"content": {"parts": [{"text": chunk}], "role": "model"}}]}
+            if index == len(chunks) - 1:
+                event["usageMetadata"] = usage
+            yield f"data: {json.dumps(event)}\r\n\r\n"
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> FastAPI:
+    """FastAPI app serving the fake provider under /v1beta"""
+    server = FakeLLMServer(config)
+    app = FastAPI(title="Fake LLM provider")
+    app.state.server = server
+
+    @app.post("/v1beta/models/{target}")
+    async def generate(target: str, request: Request):
+        _, _, action = target.partition(":")
+        if action not in ("generateContent", "streamGenerateContent"):
+            raise HTTPException(status_code=404, detail=f"Unknown action: {action}")
+        return await server.respond(await request.json(), stream=action == "streamGenerateContent")
+
+    @app.get("/stats")
+    async def stats():
+        """Requests and outcomes per agent"""
+        return server.stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Gemini-compatible LLM provider for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--config", help="JSON file with latency, error and throttle settings")
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Hedged LLM requests
+Tracks recent latency per agent and model, decides when a slow call deserves
+a backup request, and caps backups at a fixed fraction of traffic
+"""
+from typing import Dict, Any, Optional
+from collections import deque
+import threading
+from app.core.config import settings
+
+
+class Hedger:
+    """Latency percentiles per key plus a hedge budget shared by all keys"""
+
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        budget: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        min_delay: Optional[float] = None,
+        window: int = 200
+    ):
+        self.percentile = percentile or settings.LLM_HEDGE_PERCENTILE
+        # Fraction of requests that may be hedged
+        self.budget = settings.LLM_HEDGE_BUDGET if budget is None else budget
+        self.min_samples = min_samples or settings.LLM_HEDGE_MIN_SAMPLES
+        self.min_delay = settings.LLM_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.window = window
+
+        self._latencies: Dict[str, deque] = {}
+        # Each request earns `budget` credits and each hedge spends one; the cap limits bursts
+        self._credits = 0.0
+        self._max_credits = max(1.0, self.budget * 100)
+        self._lock = threading.Lock()
+        self.metrics = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+
+    def _percentile(self, samples: deque) -> float:
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(self.percentile / 100 * len(ordered)))]
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging a call for key, or None while there is too little history"""
+        with self._lock:
+            samples = self._latencies.get(key)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            return max(self.min_delay, self._percentile(samples))
+
+    def observe(self, key: str, latency: float):
+        """Record the latency of a call that reached a provider"""
+        with self._lock:
+            self._observe(key, latency)
+
+    def observe_unfinished(self, key: str, elapsed: float):
+        """
+        Record a call cancelled after elapsed seconds, e.g. a primary that lost
+        to its hedge. Its latency was at least elapsed; leaving such calls out
+        would drop exactly the slow tail and let the hedge delay drift down.
+        A lower bound under the current percentile says nothing about it, so
+        only longer ones are kept, and none before there is a percentile.
+        """
+        with self._lock:
+            samples = self._latencies.get(key)
+            if not samples or len(samples) < self.min_samples or elapsed < self._percentile(samples):
+                return
+            self._observe(key, elapsed)
+
+    def _observe(self, key: str, latency: float):
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def request_started(self):
+        with self._lock:
+            self.metrics["requests"] += 1
+            self._credits = min(self._max_credits, self._credits + self.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend budget on a backup request if any is left"""
+        with self._lock:
+            if self._credits < 1.0:
+                self.metrics["budget_denied"] += 1
+                return False
+            self._credits -= 1.0
+            self.metrics["hedged"] += 1
+            return True
+
+    def hedge_won(self):
+        with self._lock:
+            self.metrics["hedge_wins"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.metrics["requests"]
+            stats = {
+                "enabled": settings.LLM_HEDGING_ENABLED,
+                "percentile": self.percentile,
+                "budget": self.budget,
+                **self.metrics,
+                "hedge_rate": round(self.metrics["hedged"] / requests, 3) if requests else 0.0,
+                "keys": {}
+            }
+            for key, samples in self._latencies.items():
+                ordered = sorted(samples)
+                stats["keys"][key] = {
+                    "samples": len(ordered),
+                    "p50_seconds": round(ordered[len(ordered) // 2], 3),
+                    "hedge_after_seconds": round(max(self.min_delay, self._percentile(samples)), 3)
+                    if len(ordered) >= self.min_samples else None
+                }
+            return stats
+
+# Global hedger shared by every LLMClient
+llm_hedger = Hedger()
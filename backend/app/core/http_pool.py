@@ -0,0 +1,55 @@
+"""
+Pooled async HTTP clients
+httpx clients are bound to the event loop they were created on, so one
+keep-alive client is kept per running loop (the app loop and the background loop)
+"""
+from typing import Optional
+import asyncio
+import logging
+import weakref
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientPool:
+    """Shares one connection-pooling httpx.AsyncClient per event loop"""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        self.timeout = httpx.Timeout(
+            read_timeout or settings.HTTP_READ_TIMEOUT,
+            connect=connect_timeout or settings.HTTP_CONNECT_TIMEOUT
+        )
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+    def get_client(self) -> httpx.AsyncClient:
+        """The client for the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the client of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
+            logger.info("Closed pooled HTTP client")
+
+# Global HTTP client pool
+http_pool = HTTPClientPool()
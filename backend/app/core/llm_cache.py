@@ -0,0 +1,305 @@
+"""
+Content-addressed cache for LLM responses
+An in-memory LRU tier in front of a local SQLite store. Entries are keyed by
+a hash of everything that determines the response and expire after a TTL.
+"""
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    system_message: str,
+    prompt: str,
+    temperature: Optional[float],
+    max_tokens: Optional[int]
+) -> str:
+    """Hash of every input that determines an LLM response"""
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "system_message": system_message,
+        "prompt": prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier (memory LRU + SQLite) response cache with TTL, size caps and hit/miss metrics.
+    The tiers have separate locks, so memory lookups on the event loop never
+    wait behind disk reads and writes running in worker threads.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_disk_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self.path = settings.LLM_CACHE_PATH if path is None else path
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.max_disk_bytes = max_disk_bytes or settings.LLM_CACHE_MAX_DISK_MB * 1024 * 1024
+        self.ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        # Held through SQLite I/O; may take the memory lock, never the other way round
+        self._disk_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+        # Running totals of the disk tier, so writes never scan the table
+        self._disk_bytes = 0
+        self._disk_entries = 0
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "expired": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0
+        }
+
+    def _count(self, metric: str, amount: int = 1):
+        with self._metrics_lock:
+            self.metrics[metric] += amount
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier on first use (under the disk lock); an unusable path disables it with a warning"""
+        if self._db is not None or self._db_failed or not self.path:
+            return self._db
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+            db.commit()
+            # The only full scan: totals of what an earlier process left behind
+            self._disk_entries, self._disk_bytes = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            self._db = db
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache disk tier disabled ({self.path}): {str(e)}")
+            self._db_failed = True
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None"""
+        if not self.enabled:
+            return None
+        response = self._get_memory(key)
+        return response if response is not None else self._get_disk(key)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            response, expires_at = entry
+            fresh = expires_at > now
+            if fresh:
+                self._memory.move_to_end(key)
+            else:
+                del self._memory[key]
+        self._count("memory_hits" if fresh else "expired")
+        return response if fresh else None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        """Look up the disk tier, promoting hits to memory; counts the miss otherwise"""
+        now = time.time()
+        with self._disk_lock:
+            db = self._connect()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT response, expires_at, size FROM responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and row[1] > now:
+                        db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                        db.commit()
+                        self._remember(key, row[0], row[1])
+                        self._count("disk_hits")
+                        return row[0]
+                    if row:
+                        db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        db.commit()
+                        self._disk_entries -= 1
+                        self._disk_bytes -= row[2]
+                        self._count("expired")
+                except sqlite3.Error as e:
+                    logger.warning(f"LLM cache read failed: {str(e)}")
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, response: str):
+        """Store a successful response; empty responses are never cached"""
+        if not self.enabled or not isinstance(response, str) or not response.strip():
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._remember(key, response, expires_at)
+        self._count("writes")
+
+        with self._disk_lock:
+            db = self._connect()
+            if db is None:
+                return
+            size = len(response.encode("utf-8"))
+            try:
+                replaced = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, expires_at, now)
+                )
+                totals = self._evict_disk(db, now, size - (replaced[0] if replaced else 0), 0 if replaced else 1)
+                db.commit()
+            except sqlite3.Error as e:
+                db.rollback()
+                logger.warning(f"LLM cache write failed: {str(e)}")
+                return
+            self._disk_entries, self._disk_bytes, expired, evicted = totals
+        if expired:
+            self._count("expired", expired)
+        if evicted:
+            self._count("disk_evictions", evicted)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get() without blocking the event loop on the disk tier"""
+        if not self.enabled:
+            return None
+        response = self._get_memory(key)
+        if response is not None:
+            return response
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def set_async(self, key: str, response: str):
+        """set() without blocking the event loop on the disk tier"""
+        if self.enabled:
+            await asyncio.to_thread(self.set, key, response)
+
+    def _remember(self, key: str, response: str, expires_at: float):
+        """Insert into the memory tier, evicting least recently used entries"""
+        evicted = 0
+        with self._memory_lock:
+            self._memory[key] = (response, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count("memory_evictions", evicted)
+
+    def _evict_disk(
+        self,
+        db: sqlite3.Connection,
+        now: float,
+        added_bytes: int,
+        added_entries: int
+    ) -> Tuple[int, int, int, int]:
+        """
+        Drop expired rows, then least recently used rows until under the size
+        cap. Returns the new (entries, bytes) totals including the write being
+        made, and the (expired, evicted) counts, for the caller to apply once committed.
+        """
+        expired_entries, expired_bytes = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires_at <= ?", (now,)
+        ).fetchone()
+        if expired_entries:
+            db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        entries = self._disk_entries + added_entries - expired_entries
+        total = self._disk_bytes + added_bytes - expired_bytes
+
+        evicted = 0
+        if total > self.max_disk_bytes:
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                evicted += 1
+                entries -= 1
+                total -= size
+                if total <= self.max_disk_bytes:
+                    break
+
+        return entries, total, expired_entries, evicted
+
+    def clear(self):
+        """Remove all entries from both tiers"""
+        with self._memory_lock:
+            self._memory.clear()
+        with self._disk_lock:
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.execute("DELETE FROM responses")
+                db.commit()
+                self._disk_entries = self._disk_bytes = 0
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed: {str(e)}")
+
+    async def clear_async(self):
+        """clear() without blocking the event loop on the disk tier"""
+        await asyncio.to_thread(self.clear)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics and current tier sizes"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        with self._memory_lock:
+            memory_entries = len(self._memory)
+        lookups = metrics["memory_hits"] + metrics["disk_hits"] + metrics["misses"]
+        hits = metrics["memory_hits"] + metrics["disk_hits"]
+        stats = {
+            "enabled": self.enabled,
+            **metrics,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "memory_entries": memory_entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+        if self.enabled:
+            with self._disk_lock:
+                if self._connect() is not None:
+                    stats.update({
+                        "disk_entries": self._disk_entries,
+                        "disk_bytes": self._disk_bytes,
+                        "max_disk_bytes": self.max_disk_bytes
+                    })
+        return stats
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """get_stats() without blocking the event loop (opening the disk tier, waiting for a write)"""
+        return await asyncio.to_thread(self.get_stats)
+
+# Global LLM response cache
+llm_cache = LLMResponseCache()
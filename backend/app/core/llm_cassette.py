@@ -0,0 +1,325 @@
+"""
+Record/replay cassettes for LLM calls
+In record mode every LLM call of a generation run is captured, whether a
+provider, the response cache or an identical call in flight answered it:
+prompt, response, latency and time to first chunk as seen by the caller, and
+the provider's token usage. The calls are written to one gzipped JSON file
+when the run ends. In replay mode LLMClient answers from such a file instead of
+a provider, at the recorded latency or as fast as possible, so runs can be
+benchmarked with production-shaped output and repeated offline after prompt or
+parser changes.
+
+A replayed prompt is matched exactly first; a prompt that has changed since
+the recording gets the most similar recorded prompt of the same system
+message, if it is similar enough.
+"""
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from app.core.similarity_cache import shingles
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Replay timing: sleep for the recorded latency, or answer immediately
+TIMING_RECORDED = "recorded"
+TIMING_FAST = "fast"
+
+FORMAT_VERSION = 2
+
+
+class CassetteMissError(RuntimeError):
+    """Raised when a replayed prompt matches no recording"""
+
+
+def request_key(system_message: str, prompt: str, temperature: Optional[float], max_tokens: Optional[int]) -> str:
+    """Identity of a request, independent of the provider and model that answered it"""
+    payload = json.dumps([system_message, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _jaccard(first: set, second: set) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class Cassette:
+    """The LLM calls of one run, being recorded or replayed"""
+
+    def __init__(
+        self,
+        mode: str,
+        path: str,
+        timing: Optional[str] = None,
+        match_threshold: Optional[float] = None,
+        entries: Optional[List[Dict[str, Any]]] = None,
+        run_id: Optional[str] = None
+    ):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.mode = mode
+        self.path = path
+        self.run_id = run_id
+        self.timing = timing or settings.LLM_CASSETTE_REPLAY_TIMING
+        if self.timing not in (TIMING_RECORDED, TIMING_FAST):
+            raise ValueError(f"Unknown replay timing: {self.timing}")
+        self.match_threshold = settings.LLM_CASSETTE_MATCH_THRESHOLD if match_threshold is None else match_threshold
+        self.entries: List[Dict[str, Any]] = entries or []
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self.metrics = {"recorded": 0, "replayed": 0, "similar": 0, "misses": 0}
+
+        # Replay state: recordings not yet served, per exact key, in recorded order
+        self._unused: Dict[str, deque] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._used: set = set()
+        self._shingles: Dict[int, set] = {}
+        for index, entry in enumerate(self.entries):
+            entry["index"] = index
+            self._unused.setdefault(entry["key"], deque()).append(entry)
+
+    @classmethod
+    def load(cls, path: str, timing: Optional[str] = None, match_threshold: Optional[float] = None) -> "Cassette":
+        """Open a recorded cassette file for replay"""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')} in {path}")
+        return cls(REPLAY, path, timing, match_threshold, data["entries"], data.get("run_id"))
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def record(
+        self,
+        system_message: str,
+        prompt: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response: str,
+        started: float,
+        latency: float,
+        first_chunk: Optional[float] = None,
+        chunks: int = 1,
+        served: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Capture an answered call; started and latency are time.monotonic() based.
+        served names the provider that answered and its token usage; calls
+        answered without a provider request (cache hits, joined calls) have none.
+        """
+        if not self.recording:
+            return
+        served = served or {}
+        entry = {
+            "key": request_key(system_message, prompt, temperature, max_tokens),
+            "offset": round(started - self._started, 3),
+            "latency": round(latency, 3),
+            "first_chunk": round(latency if first_chunk is None else first_chunk, 3),
+            "chunks": chunks,
+            "provider": served.get("provider"),
+            "model": served.get("model"),
+            "system": system_message,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response": response,
+            "usage": served.get("usage")
+        }
+        with self._lock:
+            self.entries.append(entry)
+            self.metrics["recorded"] += 1
+
+    def match(
+        self,
+        system_message: str,
+        prompt: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        Recording to replay for a request. Identical requests get their
+        recordings in order, and the last one again once those run out; other
+        requests get the most similar unused recording with the same system message.
+        """
+        key = request_key(system_message, prompt, temperature, max_tokens)
+        with self._lock:
+            pending = self._unused.get(key)
+            if pending:
+                entry = pending.popleft()
+                self._used.add(entry["index"])
+                self._last[key] = entry
+                self.metrics["replayed"] += 1
+                return entry
+            if key in self._last:
+                self.metrics["replayed"] += 1
+                return self._last[key]
+
+            entry, score = self._most_similar(system_message, prompt)
+            if entry is None or score < self.match_threshold:
+                self.metrics["misses"] += 1
+                raise CassetteMissError(
+                    f"No recording in {self.path} matches the prompt "
+                    f"(best similarity {score:.2f}, threshold {self.match_threshold})"
+                )
+            self._used.add(entry["index"])
+            self._last[key] = entry
+            self.metrics["replayed"] += 1
+            self.metrics["similar"] += 1
+            logger.info(f"Replaying a recording {score:.2f} similar to a changed prompt")
+            return entry
+
+    def _most_similar(self, system_message: str, prompt: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        features = shingles(prompt)
+        best, best_rank = None, (0.0, False)
+        for entry in self.entries:
+            if entry["system"] != system_message:
+                continue
+            if entry["index"] not in self._shingles:
+                self._shingles[entry["index"]] = shingles(entry["prompt"])
+            # Unused recordings win ties, so repeated calls spread over the candidates
+            rank = (_jaccard(features, self._shingles[entry["index"]]), entry["index"] not in self._used)
+            if best is None or rank > best_rank:
+                best, best_rank = entry, rank
+        return best, best_rank[0]
+
+    async def replay(
+        self,
+        system_message: str,
+        prompt: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Recorded (response, usage) for a request, after its recorded latency unless timing is fast"""
+        entry = self.match(system_message, prompt, temperature, max_tokens)
+        if self.timing == TIMING_RECORDED:
+            await asyncio.sleep(entry["latency"])
+        return entry["response"], entry["usage"]
+
+    async def replay_stream(
+        self,
+        system_message: str,
+        prompt: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield a recorded response in as many chunks as were recorded, the first
+        after the recorded time to first chunk and the rest spread over the
+        remaining latency. The recorded token usage is stored in usage.
+        """
+        entry = self.match(system_message, prompt, temperature, max_tokens)
+        text = entry["response"]
+        count = max(1, min(entry["chunks"], len(text)))
+        size = -(-len(text) // count) if text else 1
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        if self.timing == TIMING_RECORDED:
+            await asyncio.sleep(entry["first_chunk"])
+        gap = max(0.0, entry["latency"] - entry["first_chunk"]) / max(1, len(pieces) - 1)
+        for index, piece in enumerate(pieces):
+            if index and self.timing == TIMING_RECORDED:
+                await asyncio.sleep(gap)
+            yield piece
+        if entry["usage"] and usage is not None:
+            usage.update(entry["usage"])
+
+    def save(self) -> Optional[str]:
+        """Write a recording to its file; returns the path, or None when there is nothing to write"""
+        if not self.recording or not self.entries:
+            return None
+        with self._lock:
+            data = {
+                "version": FORMAT_VERSION,
+                "run_id": self.run_id,
+                "recorded_at": datetime.now().isoformat(),
+                "entries": sorted(self.entries, key=lambda entry: entry["offset"])
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written whole and renamed, so a replay never reads a half-written file
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        logger.info(f"Recorded {len(data['entries'])} LLM call(s) to {self.path}")
+        return self.path
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {"mode": self.mode, "path": self.path, "entries": len(self.entries), **self.metrics}
+            if self.replaying:
+                stats["timing"] = self.timing
+                stats["unused_entries"] = len(self.entries) - len(self._used)
+            return stats
+
+
+def open_run_cassette(run_id: str) -> Optional[Cassette]:
+    """Cassette for a run as configured by LLM_CASSETTE_MODE, or None when cassettes are off"""
+    mode = settings.LLM_CASSETTE_MODE
+    if not mode:
+        return None
+    if mode == RECORD:
+        return Cassette(RECORD, os.path.join(settings.LLM_CASSETTE_DIR, f"{run_id}.json.gz"), run_id=run_id)
+    if mode == REPLAY:
+        if not settings.LLM_CASSETTE_REPLAY_FILE:
+            raise ValueError("LLM_CASSETTE_MODE=replay needs LLM_CASSETTE_REPLAY_FILE")
+        return Cassette.load(settings.LLM_CASSETTE_REPLAY_FILE)
+    raise ValueError(f"Unknown LLM_CASSETTE_MODE: {mode}")
+
+
+# Cassette recording or answering the LLM calls made in the current context, if any
+_cassette: ContextVar[Optional[Cassette]] = ContextVar("llm_cassette", default=None)
+
+
+@contextmanager
+def cassette_scope(cassette: Optional[Cassette]):
+    """Record or replay the LLM calls made in this context, including sub-tasks it spawns"""
+    token = _cassette.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _cassette.reset(token)
+
+
+def current_cassette() -> Optional[Cassette]:
+    return _cassette.get()
+
+
+# Provider and token usage of the call being recorded in this context, filled in by LLMClient
+_served_call: ContextVar[Optional[Dict[str, Any]]] = ContextVar("llm_served_call", default=None)
+
+
+@contextmanager
+def served_call_scope():
+    """Collect which provider answers the call made in this context, including tasks it spawns"""
+    served: Dict[str, Any] = {}
+    token = _served_call.set(served)
+    try:
+        yield served
+    finally:
+        _served_call.reset(token)
+
+
+def current_served_call() -> Optional[Dict[str, Any]]:
+    return _served_call.get()
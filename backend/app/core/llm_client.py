@@ -1,6 +1,10 @@
 import os
 import asyncio
-from typing import Dict, Any, Optional, List
+import logging
+import json
+import time
+import httpx
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple, AsyncIterator
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,8 +13,39 @@ load_dotenv()
 # Import Emergent LLM integration
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 
+from app.core.llm_context import (
+    remaining_time, track_llm_call, record_llm_retry, record_llm_cache_hit, record_llm_hedge, record_llm_tokens
+)
+from app.core.token_counter import count_tokens
+from app.core.llm_cache import llm_cache, make_cache_key
+from app.core.rate_limiter import llm_rate_limiters, estimate_tokens, throttle_delay
+from app.core.background_loop import background_loop
+from app.core.http_pool import http_pool
+from app.core.circuit_breaker import provider_breakers, CLOSED
+from app.core.hedging import llm_hedger
+from app.core.single_flight import llm_single_flight
+from app.core.llm_cassette import Cassette, CassetteMissError, current_cassette, served_call_scope, current_served_call
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when no LLM provider could answer a prompt"""
+
+
 class LLMClient:
-    """Unified LLM client using Emergent LLM Key"""
+    """
+    Unified LLM client using Emergent LLM Key, with Gemini as a second provider
+    The API is async-first; generate() is a sync facade that runs on the shared
+    background loop instead of creating an event loop per call.
+    """
+    
+    PRIMARY_PROVIDER = "emergent"
+    FALLBACK_PROVIDER = "gemini"
+    # Local stand-in speaking Gemini's protocol (app.core.fake_llm_server), used alone when configured
+    FAKE_PROVIDER = "fake"
+    # Set once the missing with_params() of the Emergent integration has been reported
+    _params_warned = False
     
     def __init__(self, provider: str = "openai", model: str = "gpt-4o-mini"):
         self.provider = provider
@@ -18,66 +53,736 @@ class LLMClient:
         self.emergent_key = os.environ.get("EMERGENT_LLM_KEY", "")
         self.gemini_key = os.environ.get("GEMINI_API_KEY", "")
         
-    async def generate_async(self, prompt: str, system_message: str = "You are a helpful AI assistant.", session_id: str = "default") -> str:
-        """Generate text using Emergent LLM integration (async)"""
-        try:
-            chat = LlmChat(
-                api_key=self.emergent_key,
-                session_id=session_id,
-                system_message=system_message
+    async def generate_async(
+        self,
+        prompt: str,
+        system_message: str = "You are a helpful AI assistant.",
+        session_id: str = "default",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        hedge: Optional[bool] = None,
+        latency_key: Optional[str] = None,
+        coalesce: Optional[bool] = None
+    ) -> str:
+        """
+        Generate text, routed to the healthiest available provider (async).
+        temperature and max_tokens default to the provider's settings when omitted.
+        Successful responses are cached by content; pass use_cache=False to force a fresh call.
+        
+        A provider that fails is recorded against its circuit breaker and the
+        next provider is tried. Raises LLMUnavailableError when none could answer,
+        so error text never ends up in generated output.
+        
+        With hedging (hedge=True, or LLM_HEDGING_ENABLED), a call still running
+        after the usual latency of latency_key (e.g. the agent name) gets a
+        backup request; the first answer wins and the other is cancelled.
+        
+        Identical requests already in flight are joined rather than sent again
+        (coalesce, default LLM_COALESCING_ENABLED); use_cache=False opts out too.
+        
+        A recording cassette captures the call however it was answered.
+        """
+        request = dict(
+            prompt=prompt, system_message=system_message, session_id=session_id,
+            temperature=temperature, max_tokens=max_tokens, model=model or self.model, use_cache=use_cache
+        )
+        if hedge is None:
+            hedge = settings.LLM_HEDGING_ENABLED
+        
+        async def call() -> str:
+            if not hedge:
+                response, _ = await self._generate_routed(**request)
+                return response
+            return await self._generate_hedged(f"{latency_key or 'default'}:{request['model']}", request)
+        
+        if coalesce is None:
+            coalesce = settings.LLM_COALESCING_ENABLED
+        
+        async def resolve() -> str:
+            if not (coalesce and use_cache):
+                return await call()
+            key = make_cache_key(self.provider, request["model"], system_message, prompt, temperature, max_tokens)
+            return await llm_single_flight.do(key, call)
+        
+        cassette = current_cassette()
+        if cassette is None or not cassette.recording:
+            return await resolve()
+        # Cache hits and joined in-flight calls are recorded too, so a replay can answer every call of the run
+        started = time.monotonic()
+        with served_call_scope() as served:
+            response = await resolve()
+        cassette.record(
+            system_message, prompt, temperature, max_tokens, response,
+            started=started, latency=time.monotonic() - started, served=served
+        )
+        return response
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_message: str = "You are a helpful AI assistant.",
+        session_id: str = "default",
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        hedge: Optional[bool] = None,
+        latency_key: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate text as it is produced, yielding partial chunks (async generator).
+        Routing, circuit breakers, rate limits, throttling retries and the cache
+        work as in generate_async; a cached response arrives as a single chunk,
+        and so does the Emergent provider's, whose integration returns complete
+        messages only.
+        
+        A provider that fails before its first chunk is failed over like in
+        generate_async; once output has been yielded the error is raised instead.
+        
+        An identical request already in flight is joined and its response
+        arrives as a single chunk. Two racing requests cannot be streamed, so
+        with hedging (hedge, default LLM_HEDGING_ENABLED) the response is
+        generated by generate_async and arrives whole.
+        """
+        model = model or self.model
+        cassette = current_cassette()
+        if cassette is not None and cassette.replaying:
+            async for chunk in self._stream_replay(cassette, prompt, system_message, temperature, max_tokens):
+                yield chunk
+            return
+        if hedge is None:
+            hedge = settings.LLM_HEDGING_ENABLED
+        if hedge:
+            yield await self.generate_async(
+                prompt, system_message, session_id, temperature, max_tokens, model, use_cache,
+                hedge=True, latency_key=latency_key
             )
+            return
+        if cassette is None or not cassette.recording:
+            async for chunk in self._stream_routed(
+                prompt, system_message, session_id, temperature, max_tokens, model, use_cache
+            ):
+                yield chunk
+            return
+        
+        # Recorded however it was answered, cached responses included
+        served: Dict[str, Any] = {}
+        started = time.monotonic()
+        first_chunk = None
+        chunks = []
+        async for chunk in self._stream_routed(
+            prompt, system_message, session_id, temperature, max_tokens, model, use_cache, served
+        ):
+            if first_chunk is None:
+                first_chunk = time.monotonic() - started
+            chunks.append(chunk)
+            yield chunk
+        cassette.record(
+            system_message, prompt, temperature, max_tokens, "".join(chunks), started=started,
+            latency=time.monotonic() - started, first_chunk=first_chunk, chunks=len(chunks), served=served
+        )
+    
+    async def _stream_routed(
+        self,
+        prompt: str,
+        system_message: str,
+        session_id: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        model: str,
+        use_cache: bool,
+        served: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream from an identical call in flight, the cache or the first provider
+        in routing order that answers. The provider that answered and its token
+        usage are stored in served.
+        """
+        if use_cache and settings.LLM_COALESCING_ENABLED:
+            key = make_cache_key(self.provider, model, system_message, prompt, temperature, max_tokens)
+            joined = await llm_single_flight.join(key)
+            if joined is not None:
+                yield joined
+                return
+        
+        errors = []
+        for provider in self._route():
+            is_primary = provider == self.PRIMARY_PROVIDER
+            cache_key = None
+            if use_cache:
+                cache_key = make_cache_key(
+                    self.provider if is_primary else provider,
+                    self._provider_model(provider, model),
+                    system_message, prompt, temperature, max_tokens
+                )
+                cached = await llm_cache.get_async(cache_key)
+                if cached is not None:
+                    record_llm_cache_hit()
+                    yield cached
+                    return
             
-            # Set the model and provider
-            chat.with_model(self.provider, self.model)
+            breaker = provider_breakers.get(provider)
+            if not breaker.allow_request():
+                errors.append(f"{provider}: circuit open")
+                continue
             
-            # Create user message
-            user_message = UserMessage(text=prompt)
+            if errors:
+                record_llm_retry()
+            start = time.monotonic()
+            chunks = []
+            try:
+                async for chunk in self._stream_provider(
+                    provider, prompt, system_message, session_id, temperature, max_tokens, model, served
+                ):
+                    chunks.append(chunk)
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.record_abandoned(time.monotonic() - start)
+                raise
+            except asyncio.TimeoutError:
+                breaker.record_failure(time.monotonic() - start, "timed out")
+                raise
+            except Exception as e:
+                breaker.record_failure(time.monotonic() - start, str(e))
+                logger.warning(f"LLM provider '{provider}' failed while streaming: {str(e)}")
+                # Output already delivered cannot be taken back by switching providers
+                if chunks:
+                    raise
+                errors.append(f"{provider}: {str(e)}")
+                continue
             
-            # Send message and get response
-            response = await chat.send_message(user_message)
-            return response
-        except Exception as e:
-            return f"Error generating with Emergent LLM: {str(e)}"
+            breaker.record_success(time.monotonic() - start)
+            if cache_key:
+                await llm_cache.set_async(cache_key, "".join(chunks))
+            return
+        
+        raise LLMUnavailableError(f"No LLM provider available ({'; '.join(errors) or 'none configured'})")
+    
+    async def _stream_provider(
+        self,
+        provider: str,
+        prompt: str,
+        system_message: str,
+        session_id: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        model: str,
+        served: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream one provider's response while holding a rate limiter slot.
+        Throttling before the first chunk is retried as in _send_limited.
+        """
+        is_primary = provider == self.PRIMARY_PROVIDER
+        limiter = llm_rate_limiters.get(self.provider if is_primary else provider, self._provider_model(provider, model))
+        estimated = estimate_tokens(prompt) + (max_tokens or settings.LLM_DEFAULT_COMPLETION_TOKENS)
+        attempt = 0
+        while True:
+            chunks = []
+            usage: Dict[str, int] = {}
+            with track_llm_call():
+                async with limiter.slot(estimated) as lease:
+                    timeout = remaining_time()
+                    if timeout is not None and timeout <= 0:
+                        raise asyncio.TimeoutError("LLM deadline already expired")
+                    try:
+                        if is_primary:
+                            chat = self._emergent_chat(system_message, session_id, temperature, max_tokens, model)
+                            response = await asyncio.wait_for(chat.send_message(UserMessage(text=prompt)), timeout)
+                            chunks.append(response)
+                            yield response
+                        else:
+                            async for chunk in self._stream_gemini(
+                                prompt, system_message, temperature, max_tokens, usage, provider
+                            ):
+                                chunks.append(chunk)
+                                yield chunk
+                    except asyncio.TimeoutError:
+                        raise
+                    except Exception as e:
+                        delay = throttle_delay(e)
+                        # Output already delivered cannot be sent again
+                        if chunks or delay is None or attempt >= settings.LLM_THROTTLE_RETRIES:
+                            raise
+                        limiter.backoff(delay)
+                    else:
+                        input_tokens, output_tokens = self._account_tokens(system_message, prompt, "".join(chunks), usage)
+                        lease.settle(input_tokens + output_tokens)
+                        self._note_served(
+                            self.provider if is_primary else provider, self._provider_model(provider, model),
+                            input_tokens, output_tokens, not usage, served
+                        )
+                        return
+            attempt += 1
+            record_llm_retry()
+    
+    async def _stream_replay(
+        self,
+        cassette: Cassette,
+        prompt: str,
+        system_message: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[str]:
+        """Stream a recorded response from a replayed cassette; see _generate_replay"""
+        chunks = []
+        usage: Dict[str, int] = {}
+        with track_llm_call():
+            try:
+                async for chunk in cassette.replay_stream(system_message, prompt, temperature, max_tokens, usage):
+                    chunks.append(chunk)
+                    yield chunk
+            except CassetteMissError as e:
+                raise LLMUnavailableError(f"replay: {str(e)}")
+        self._replay_tokens(usage)
     
     def generate(self, prompt: str, model: str = None, temperature: float = 0.7, max_tokens: int = 2000) -> str:
-        """Generate text synchronously (wrapper for async)"""
+        """Generate text synchronously by running generate_async on the background loop"""
         try:
-            # Run async method in event loop
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(self.generate_async(prompt))
-            loop.close()
-            return result
+            return background_loop.run(self.generate_async(
+                prompt, temperature=temperature, max_tokens=max_tokens, model=model
+            ))
         except Exception as e:
-            # Fallback to Gemini if emergent fails
-            if self.gemini_key:
-                return self._generate_gemini(prompt, temperature, max_tokens)
             return f"Error: {str(e)}"
     
-    def _generate_gemini(self, prompt: str, temperature: float, max_tokens: int) -> str:
-        """Generate using Gemini API directly as fallback"""
-        import requests
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={self.gemini_key}"
-        headers = {"Content-Type": "application/json"}
-        payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": temperature,
-                "maxOutputTokens": max_tokens
-            }
-        }
+    async def _generate_hedged(self, key: str, request: Dict[str, Any]) -> str:
+        """Run a routed call, backing it up with a second one if it outlives the key's latency percentile"""
+        llm_hedger.request_started()
         
+        async def attempt(prefer_alternate: bool) -> str:
+            start = time.monotonic()
+            try:
+                response, cached = await self._generate_routed(prefer_alternate=prefer_alternate, **request)
+            except asyncio.CancelledError:
+                llm_hedger.observe_unfinished(key, time.monotonic() - start)
+                raise
+            if not cached:
+                llm_hedger.observe(key, time.monotonic() - start)
+            return response
+        
+        primary = asyncio.create_task(attempt(False))
+        try:
+            delay = llm_hedger.hedge_delay(key)
+            remaining = remaining_time()
+            if delay is not None and (remaining is None or delay < remaining):
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done and llm_hedger.try_hedge():
+                    record_llm_hedge()
+                    logger.info(f"LLM call '{key}' still running after {delay:.1f}s, sending a hedged request")
+                    # Prefer the other provider for the backup when there is one
+                    return await self._first_success(primary, asyncio.create_task(attempt(True)))
+            return await primary
+        finally:
+            if not primary.done():
+                primary.cancel()
+                # Wait for it to release its rate limiter slot and connection
+                await asyncio.gather(primary, return_exceptions=True)
+    
+    async def _first_success(self, primary: asyncio.Task, backup: asyncio.Task) -> str:
+        """Return the first successful result of two attempts and cancel the other"""
+        pending = {primary, backup}
+        error = None
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=60)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            llm_hedger.hedge_won()
+                        return task.result()
+                    # Keep the primary's error if both fail
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def _generate_routed(
+        self,
+        prompt: str,
+        system_message: str,
+        session_id: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        model: str,
+        use_cache: bool,
+        prefer_alternate: bool = False
+    ) -> Tuple[str, bool]:
+        """
+        Try providers in routing order and return (response, served_from_cache).
+        prefer_alternate rotates the order so the second-choice provider goes first.
+        A replayed cassette stands in for every provider.
+        """
+        cassette = current_cassette()
+        if cassette is not None and cassette.replaying:
+            return await self._generate_replay(cassette, prompt, system_message, temperature, max_tokens), False
+        
+        route = self._route()
+        if prefer_alternate:
+            route = route[1:] + route[:1]
+        
+        errors = []
+        for provider in route:
+            is_primary = provider == self.PRIMARY_PROVIDER
+            cache_key = None
+            if use_cache:
+                cache_key = make_cache_key(
+                    self.provider if is_primary else provider,
+                    self._provider_model(provider, model),
+                    system_message, prompt, temperature, max_tokens
+                )
+                cached = await llm_cache.get_async(cache_key)
+                if cached is not None:
+                    record_llm_cache_hit()
+                    return cached, True
+            
+            breaker = provider_breakers.get(provider)
+            if not breaker.allow_request():
+                errors.append(f"{provider}: circuit open")
+                continue
+            
+            if errors:
+                record_llm_retry()
+            start = time.monotonic()
+            try:
+                if is_primary:
+                    response = await self._generate_emergent(prompt, system_message, session_id, temperature, max_tokens, model)
+                else:
+                    response = await self._generate_gemini(prompt, system_message, temperature, max_tokens, provider)
+            except asyncio.CancelledError:
+                breaker.record_abandoned(time.monotonic() - start)
+                raise
+            except asyncio.TimeoutError:
+                # A call cut off by the deadline counts as a slow failure; there is no time left to fail over
+                breaker.record_failure(time.monotonic() - start, "timed out")
+                raise
+            except Exception as e:
+                breaker.record_failure(time.monotonic() - start, str(e))
+                logger.warning(f"LLM provider '{provider}' failed: {str(e)}")
+                errors.append(f"{provider}: {str(e)}")
+                continue
+            
+            breaker.record_success(time.monotonic() - start)
+            # Only successful responses reach the cache
+            if cache_key:
+                await llm_cache.set_async(cache_key, response)
+            return response, False
+        
+        raise LLMUnavailableError(f"No LLM provider available ({'; '.join(errors) or 'none configured'})")
+    
+    async def _generate_replay(
+        self,
+        cassette: Cassette,
+        prompt: str,
+        system_message: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> str:
+        """
+        Answer from a replayed cassette instead of a provider. The response cache
+        and circuit breakers are bypassed so that a replay does not depend on
+        earlier runs; a prompt without a recording fails like an unavailable provider.
+        """
+        with track_llm_call():
+            try:
+                response, usage = await asyncio.wait_for(
+                    cassette.replay(system_message, prompt, temperature, max_tokens), remaining_time()
+                )
+            except CassetteMissError as e:
+                raise LLMUnavailableError(f"replay: {str(e)}")
+        self._replay_tokens(usage)
+        return response
+    
+    def _replay_tokens(self, usage: Optional[Dict[str, Any]]):
+        """Account the tokens a replayed call spent when recorded; cache hits and joined calls spent none"""
+        if usage:
+            record_llm_tokens(usage["input_tokens"], usage["output_tokens"], estimated=usage.get("estimated", False))
+    
+    def _route(self) -> List[str]:
+        """
+        Providers in the order to try them. The primary goes first unless its
+        breaker is open, or its recent p95 latency is LLM_ROUTING_LATENCY_RATIO
+        times worse than the fallback's. A configured fake provider replaces both.
+        """
+        if settings.LLM_FAKE_PROVIDER_URL:
+            return [self.FAKE_PROVIDER]
+        providers = [self.PRIMARY_PROVIDER]
+        if self.gemini_key:
+            providers.append(self.FALLBACK_PROVIDER)
+        if len(providers) == 1:
+            return providers
+        
+        primary, fallback = provider_breakers.get(providers[0]), provider_breakers.get(providers[1])
+        # Once the primary's cool-down has elapsed it goes first again, as the half-open probe
+        if not primary.is_available() and fallback.is_available():
+            return providers[::-1]
+        primary_p95, fallback_p95 = primary.p95_latency(), fallback.p95_latency()
+        if (primary_p95 is not None and fallback_p95 is not None and fallback.state == CLOSED
+                and primary_p95 > fallback_p95 * settings.LLM_ROUTING_LATENCY_RATIO):
+            return providers[::-1]
+        return providers
+    
+    async def _generate_emergent(
+        self,
+        prompt: str,
+        system_message: str,
+        session_id: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        model: str
+    ) -> str:
+        """Generate using the Emergent LLM integration; raises on failure"""
+        chat = self._emergent_chat(system_message, session_id, temperature, max_tokens, model)
+        
+        # Create user message
+        user_message = UserMessage(text=prompt)
+        
+        async def send() -> Tuple[str, Optional[Dict[str, int]]]:
+            # The integration returns text only, so its token usage is estimated
+            return await chat.send_message(user_message), None
+        
+        # Send message through the rate limiter and get response
+        return await self._send_limited(self.provider, model, system_message, prompt, max_tokens, send)
+    
+    def _emergent_chat(
+        self,
+        system_message: str,
+        session_id: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        model: str
+    ) -> LlmChat:
+        """An Emergent chat session configured for one request"""
+        chat = LlmChat(
+            api_key=self.emergent_key,
+            session_id=session_id,
+            system_message=system_message
+        )
+        
+        # Set the model and provider
+        chat.with_model(self.provider, model)
+        params = {
+            name: value for name, value in
+            (("temperature", temperature), ("max_tokens", max_tokens)) if value is not None
+        }
+        if params:
+            if hasattr(chat, "with_params"):
+                chat.with_params(**params)
+            elif not LLMClient._params_warned:
+                # Older integration versions have no way to pass sampling parameters
+                LLMClient._params_warned = True
+                logger.warning(
+                    f"The Emergent LLM integration does not support with_params(); "
+                    f"{', '.join(params)} will not be applied to '{self.PRIMARY_PROVIDER}' requests"
+                )
+        return chat
+    
+    async def _generate_gemini(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        provider: str = FALLBACK_PROVIDER
+    ) -> str:
+        """Generate using Gemini API directly, over the pooled keep-alive HTTP client; raises on failure"""
+        base_url, model, api_key = self._gemini_endpoint(provider)
+        url = f"{base_url}/models/{model}:generateContent"
+        headers, payload = self._gemini_request(prompt, system_message, temperature, max_tokens, api_key)
+        
+        async def post() -> Tuple[str, Optional[Dict[str, int]]]:
+            response = await http_pool.get_client().post(url, json=payload, headers=headers, timeout=self._http_timeout())
             response.raise_for_status()
             data = response.json()
-            return data["candidates"][0]["content"]["parts"][0]["text"]
-        except Exception as e:
-            return f"Error generating with Gemini: {str(e)}"
+            return data["candidates"][0]["content"]["parts"][0]["text"], self._gemini_usage(data)
+        
+        return await self._send_limited(provider, model, system_message, prompt, max_tokens, post)
+    
+    async def _stream_gemini(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        usage: Optional[Dict[str, int]] = None,
+        provider: str = FALLBACK_PROVIDER
+    ) -> AsyncIterator[str]:
+        """
+        Stream text chunks from Gemini's server-sent events endpoint; raises on failure.
+        Token usage reported along the way is stored in usage.
+        """
+        base_url, model, api_key = self._gemini_endpoint(provider)
+        url = f"{base_url}/models/{model}:streamGenerateContent"
+        headers, payload = self._gemini_request(prompt, system_message, temperature, max_tokens, api_key)
+        
+        async with http_pool.get_client().stream(
+            "POST", url, params={"alt": "sse"}, json=payload, headers=headers, timeout=self._http_timeout()
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError("LLM deadline expired while streaming")
+                data = json.loads(line[len("data:"):])
+                reported = self._gemini_usage(data)
+                if reported and usage is not None:
+                    usage.update(reported)
+                for candidate in data.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+    
+    def _gemini_endpoint(self, provider: str) -> Tuple[str, str, str]:
+        """(base URL, model, API key) of a provider speaking Gemini's protocol"""
+        if provider == self.FAKE_PROVIDER:
+            return settings.LLM_FAKE_PROVIDER_URL.rstrip("/"), settings.LLM_FAKE_PROVIDER_MODEL, "fake"
+        return settings.GEMINI_BASE_URL.rstrip("/"), settings.GEMINI_MODEL, self.gemini_key
+    
+    def _provider_model(self, provider: str, model: str) -> str:
+        """Model a provider actually serves; only the primary honours the requested model"""
+        if provider == self.PRIMARY_PROVIDER:
+            return model
+        return self._gemini_endpoint(provider)[1]
+    
+    def _gemini_usage(self, data: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        """Token usage from a Gemini response, if it reports any"""
+        metadata = data.get("usageMetadata") or {}
+        if "promptTokenCount" not in metadata:
+            return None
+        return {
+            "input_tokens": metadata["promptTokenCount"],
+            "output_tokens": metadata.get("candidatesTokenCount", 0)
+        }
+    
+    def _gemini_request(
+        self,
+        prompt: str,
+        system_message: str,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        api_key: str
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Headers and body shared by Gemini's generate and stream endpoints"""
+        # Key in a header rather than the query string, so it stays out of URL logs
+        headers = {"Content-Type": "application/json", "x-goog-api-key": api_key}
+        generation_config = {
+            name: value for name, value in
+            (("temperature", temperature), ("maxOutputTokens", max_tokens)) if value is not None
+        }
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": generation_config
+        }
+        if system_message:
+            payload["systemInstruction"] = {"parts": [{"text": system_message}]}
+        return headers, payload
+    
+    def _http_timeout(self) -> httpx.Timeout:
+        """Pool timeouts, capped so a request never outlives the caller's deadline"""
+        timeout = http_pool.timeout
+        remaining = remaining_time()
+        if remaining is not None:
+            timeout = httpx.Timeout(
+                min(timeout.read, remaining),
+                connect=min(timeout.connect, remaining),
+                pool=min(timeout.pool or remaining, remaining)
+            )
+        return timeout
+    
+    async def _send_limited(
+        self,
+        provider: str,
+        model: str,
+        system_message: str,
+        prompt: str,
+        max_tokens: Optional[int],
+        send: Callable[[], Awaitable[Tuple[str, Optional[Dict[str, int]]]]]
+    ) -> str:
+        """
+        Run send() under the provider's rate limits and the caller's deadline.
+        send() returns the response and the provider's token usage, if reported.
+        Throttled calls (HTTP 429) pause the limiter and are queued again, up to
+        LLM_THROTTLE_RETRIES times, rather than surfacing as errors.
+        """
+        limiter = llm_rate_limiters.get(provider, model)
+        estimated = estimate_tokens(prompt) + (max_tokens or settings.LLM_DEFAULT_COMPLETION_TOKENS)
+        attempt = 0
+        while True:
+            # Queueing counts as LLM wait for the stage, and is also reported separately
+            with track_llm_call():
+                async with limiter.slot(estimated) as lease:
+                    timeout = remaining_time()
+                    if timeout is not None and timeout <= 0:
+                        raise asyncio.TimeoutError("LLM deadline already expired")
+                    try:
+                        response, usage = await asyncio.wait_for(send(), timeout)
+                    except asyncio.TimeoutError:
+                        raise
+                    except Exception as e:
+                        delay = throttle_delay(e)
+                        if delay is None or attempt >= settings.LLM_THROTTLE_RETRIES:
+                            raise
+                        limiter.backoff(delay)
+                    else:
+                        input_tokens, output_tokens = self._account_tokens(system_message, prompt, response, usage)
+                        lease.settle(input_tokens + output_tokens)
+                        self._note_served(provider, model, input_tokens, output_tokens, not usage)
+                        return response
+            attempt += 1
+            record_llm_retry()
+    
+    def _note_served(
+        self,
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        estimated: bool,
+        served: Optional[Dict[str, Any]] = None
+    ):
+        """Note which provider answered a call being recorded, and its token usage"""
+        served = current_served_call() if served is None else served
+        if served is not None:
+            served.update(provider=provider, model=model, usage={
+                "input_tokens": input_tokens, "output_tokens": output_tokens, "estimated": estimated
+            })
+    
+    def _account_tokens(
+        self,
+        system_message: str,
+        prompt: str,
+        response: str,
+        usage: Optional[Dict[str, int]]
+    ) -> Tuple[int, int]:
+        """Record a call's (input, output) tokens, as reported by the provider or counted locally"""
+        if usage:
+            input_tokens, output_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            input_tokens = count_tokens(system_message) + count_tokens(prompt)
+            output_tokens = count_tokens(response)
+        record_llm_tokens(input_tokens, output_tokens, estimated=not usage)
+        return input_tokens, output_tokens
     
     def analyze_requirements(self, user_input: str) -> Dict[str, Any]:
         """Analyze user requirements and extract structured information"""
-        prompt = f"""Analyze the following application requirements and extract structured information.
+        response = self.generate(self._requirements_prompt(user_input))
+        return self._parse_requirements_response(response)
+    
+    async def analyze_requirements_async(self, user_input: str) -> Dict[str, Any]:
+        """Analyze user requirements and extract structured information (async)"""
+        response = await self.generate_async(self._requirements_prompt(user_input))
+        return self._parse_requirements_response(response)
+    
+    def _requirements_prompt(self, user_input: str) -> str:
+        """Build the requirements analysis prompt"""
+        return f"""Analyze the following application requirements and extract structured information.
 
 User Input: {user_input}
 
@@ -90,9 +795,9 @@ Provide a JSON response with:
 - estimated_time: development time estimate
 
 Be specific and practical. Return ONLY valid JSON."""
-        
-        response = self.generate(prompt)
-        # Parse JSON from response
+    
+    def _parse_requirements_response(self, response: str) -> Dict[str, Any]:
+        """Parse JSON from a requirements analysis response"""
         try:
             import json
             # Extract JSON if wrapped in markdown code blocks
@@ -0,0 +1,225 @@
+"""
+Per-call context for LLM requests
+Carries state such as deadlines and call statistics between the orchestrator
+and every LLM call without threading extra arguments through each agent
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar, Context, copy_context
+from typing import Optional, Dict, Any
+import threading
+import time
+
+# Absolute time.monotonic() deadline for LLM calls made in the current context
+_llm_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float]):
+    """
+    Bound all LLM calls in this context to `timeout` seconds from now.
+    Nested scopes can only shorten an outer deadline, never extend it.
+    """
+    current = _llm_deadline.get()
+    deadline = current
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+        if current is not None:
+            deadline = min(current, deadline)
+
+    token = _llm_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _llm_deadline.reset(token)
+
+
+def context_without_deadline() -> Context:
+    """Copy of the current context with no LLM deadline, for work shared by callers with different deadlines"""
+    context = copy_context()
+    context.run(_llm_deadline.set, None)
+    return context
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None when unbounded"""
+    deadline = _llm_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+class LLMCallStats:
+    """
+    Accumulates the LLM calls made within a scope, such as one workflow stage.
+    wait_seconds is wall time with at least one call in flight, so concurrent
+    calls are not double counted; call_seconds is the plain sum.
+    """
+    
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.hedges = 0
+        self.coalesced = 0
+        self.near_duplicate_hits = 0
+        # Successful provider responses; calls also counts failed attempts and throttled retries
+        self.responses = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        # Calls whose token counts were estimated locally rather than reported by the provider
+        self.estimated_token_calls = 0
+        self.queue_wait_seconds = 0.0
+        self.call_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._in_flight = 0
+        self._busy_since = 0.0
+    
+    def call_started(self) -> float:
+        now = time.monotonic()
+        if self._in_flight == 0:
+            self._busy_since = now
+        self._in_flight += 1
+        self.calls += 1
+        return now
+    
+    def call_finished(self, started: float, failed: bool = False):
+        now = time.monotonic()
+        self._in_flight -= 1
+        if self._in_flight == 0:
+            self.wait_seconds += now - self._busy_since
+        self.call_seconds += now - started
+        if failed:
+            self.errors += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "llm_calls": self.calls,
+            "llm_errors": self.errors,
+            "retries": self.retries,
+            "llm_cache_hits": self.cache_hits,
+            "llm_hedges": self.hedges,
+            "llm_coalesced": self.coalesced,
+            "llm_near_duplicate_hits": self.near_duplicate_hits,
+            "llm_responses": self.responses,
+            "llm_input_tokens": self.input_tokens,
+            "llm_output_tokens": self.output_tokens,
+            "llm_estimated_token_calls": self.estimated_token_calls,
+            "llm_queue_seconds": round(self.queue_wait_seconds, 4),
+            "llm_call_seconds": round(self.call_seconds, 4),
+            "llm_wait_seconds": round(self.wait_seconds, 4)
+        }
+
+
+# Stats collector for LLM calls made in the current context, if any
+_llm_stats: ContextVar[Optional[LLMCallStats]] = ContextVar("llm_stats", default=None)
+
+
+@contextmanager
+def llm_stats_scope():
+    """Collect stats for all LLM calls made in this context, including sub-tasks it spawns"""
+    stats = LLMCallStats()
+    token = _llm_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _llm_stats.reset(token)
+
+
+@contextmanager
+def track_llm_call():
+    """Record one LLM call in the current stats scope; a no-op outside any scope"""
+    stats = _llm_stats.get()
+    if stats is None:
+        yield
+        return
+    started = stats.call_started()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        stats.call_finished(started, failed)
+
+
+def record_llm_retry():
+    """Count a retried or re-routed LLM call in the current stats scope"""
+    stats = _llm_stats.get()
+    if stats is not None:
+        stats.retries += 1
+
+
+def record_llm_cache_hit():
+    """Count an LLM call answered from the response cache in the current stats scope"""
+    stats = _llm_stats.get()
+    if stats is not None:
+        stats.cache_hits += 1
+
+
+def record_llm_queue_wait(seconds: float):
+    """Add time spent queued in the LLM rate limiter to the current stats scope"""
+    stats = _llm_stats.get()
+    if stats is not None:
+        stats.queue_wait_seconds += seconds
+
+
+def record_llm_hedge():
+    """Count a hedged (backup) LLM request in the current stats scope"""
+    stats = _llm_stats.get()
+    if stats is not None:
+        stats.hedges += 1
+
+
+def record_llm_coalesced():
+    """Count an LLM call that joined an identical in-flight request in the current stats scope"""
+    stats = _llm_stats.get()
+    if stats is not None:
+        stats.coalesced += 1
+
+
+# Tokens of provider calls made outside any stats scope (e.g. the standalone
+# requirements analysis endpoint), accumulated since the process started
+_unscoped_tokens = LLMCallStats()
+_unscoped_lock = threading.Lock()
+
+
+def record_llm_tokens(input_tokens: int, output_tokens: int, estimated: bool):
+    """
+    Add the prompt and completion tokens of one successful provider response to
+    the current stats scope, or to the process-wide unscoped totals outside any scope
+    """
+    stats = _llm_stats.get()
+    if stats is None:
+        with _unscoped_lock:
+            _add_tokens(_unscoped_tokens, input_tokens, output_tokens, estimated)
+        return
+    _add_tokens(stats, input_tokens, output_tokens, estimated)
+
+
+def _add_tokens(stats: LLMCallStats, input_tokens: int, output_tokens: int, estimated: bool):
+    stats.responses += 1
+    stats.input_tokens += input_tokens
+    stats.output_tokens += output_tokens
+    if estimated:
+        stats.estimated_token_calls += 1
+
+
+def unscoped_token_usage() -> Dict[str, int]:
+    """Token totals of provider calls made outside any generation run since the process started"""
+    with _unscoped_lock:
+        return {
+            "input_tokens": _unscoped_tokens.input_tokens,
+            "output_tokens": _unscoped_tokens.output_tokens,
+            "total_tokens": _unscoped_tokens.input_tokens + _unscoped_tokens.output_tokens,
+            "llm_calls": _unscoped_tokens.responses,
+            "estimated_token_calls": _unscoped_tokens.estimated_token_calls
+        }
+
+
+def record_llm_near_duplicate():
+    """Count an LLM call answered from a near-duplicate prompt's response in the current stats scope"""
+    stats = _llm_stats.get()
+    if stats is not None:
+        stats.near_duplicate_hits += 1
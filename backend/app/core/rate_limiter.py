@@ -0,0 +1,261 @@
+"""
+Process-wide LLM rate limiting
+Token buckets for requests and tokens per minute plus a cap on in-flight
+requests, per provider and model. Callers queue in FIFO order instead of
+failing; the limiter is shared by every event loop in the process.
+"""
+from typing import Dict, Any, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.core.llm_context import remaining_time, record_llm_queue_wait
+from app.core.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count used to charge the tokens-per-minute bucket"""
+    return count_tokens(text) or 1
+
+
+def throttle_delay(error: BaseException) -> Optional[float]:
+    """Seconds to back off if the error is provider throttling (HTTP 429), otherwise None"""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status == 429:
+        retry_after = response.headers.get("retry-after", "")
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return settings.LLM_THROTTLE_BACKOFF
+    message = str(error).lower()
+    if status is None and ("429" in message or "rate limit" in message or "too many requests" in message):
+        return settings.LLM_THROTTLE_BACKOFF
+    return None
+
+
+class TokenBucket:
+    """Refills continuously at capacity per minute; the level may go negative to record debt"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.refill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give_back(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimitLease:
+    """An admitted request; settle() corrects the token estimate once the response is known"""
+
+    def __init__(self, limiter: "RateLimiter", tokens: int, queue_wait: float):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.queue_wait = queue_wait
+        self.released = False
+
+    def settle(self, actual_tokens: int):
+        self.limiter._settle(self.tokens, actual_tokens)
+        self.tokens = actual_tokens
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RateLimiter:
+    """FIFO admission under requests/min, tokens/min and max in-flight limits (0 disables a limit)"""
+
+    def __init__(self, name: str, requests_per_minute: int = 0, tokens_per_minute: int = 0, max_in_flight: int = 0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._paused_until = 0.0
+
+        self._lock = threading.Lock()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+        # ticket -> (loop, future) used to wake a waiter from any thread
+        self._waiters: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+
+        self.metrics = {
+            "admitted": 0,
+            "throttled": 0,
+            "queue_wait_seconds": 0.0,
+            "max_queue_wait_seconds": 0.0
+        }
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Hold one request slot; waiting in the queue is bounded by the caller's deadline"""
+        lease = await asyncio.wait_for(self.acquire(estimated_tokens), remaining_time())
+        record_llm_queue_wait(lease.queue_wait)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    async def acquire(self, estimated_tokens: int) -> RateLimitLease:
+        """Wait for this caller's turn and for capacity, then admit it"""
+        loop = asyncio.get_running_loop()
+        if self.tokens:
+            # A request larger than the whole bucket would otherwise never be admitted
+            estimated_tokens = min(estimated_tokens, int(self.tokens.capacity))
+        started = time.monotonic()
+        with self._lock:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+
+        try:
+            while True:
+                future = loop.create_future()
+                with self._lock:
+                    self._waiters[ticket] = (loop, future)
+                    delay = self._admit(ticket, estimated_tokens)
+                    if delay == 0:
+                        del self._waiters[ticket]
+                        queue_wait = time.monotonic() - started
+                        self.metrics["admitted"] += 1
+                        self.metrics["queue_wait_seconds"] += queue_wait
+                        self.metrics["max_queue_wait_seconds"] = max(self.metrics["max_queue_wait_seconds"], queue_wait)
+                        self._notify_head()
+                        return RateLimitLease(self, estimated_tokens, queue_wait)
+                # None means "until signalled" (not at the head, or all slots busy)
+                await asyncio.wait({future}, timeout=delay)
+        except BaseException:
+            with self._lock:
+                self._waiters.pop(ticket, None)
+                if ticket >= self._serving:
+                    self._abandoned.add(ticket)
+                self._skip_abandoned()
+                self._notify_head()
+            raise
+
+    def _admit(self, ticket: int, tokens: int) -> Optional[float]:
+        """Admit the head of the queue if capacity allows; otherwise return how long to wait"""
+        self._skip_abandoned()
+        if ticket != self._serving:
+            return None
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return None
+
+        now = time.monotonic()
+        wait = self._paused_until - now
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        self.in_flight += 1
+        self._serving += 1
+        self._skip_abandoned()
+        return 0
+
+    def _skip_abandoned(self):
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+
+    def _notify_head(self):
+        waiter = self._waiters.get(self._serving)
+        if waiter:
+            loop, future = waiter
+            loop.call_soon_threadsafe(_wake, future)
+
+    def release(self, lease: RateLimitLease):
+        """Free the lease's in-flight slot"""
+        with self._lock:
+            if lease.released:
+                return
+            lease.released = True
+            self.in_flight -= 1
+            self._notify_head()
+
+    def _settle(self, estimated: int, actual: int):
+        if not self.tokens:
+            return
+        with self._lock:
+            if actual < estimated:
+                self.tokens.give_back(estimated - actual)
+            else:
+                self.tokens.take(actual - estimated)
+
+    def backoff(self, seconds: float):
+        """Pause admissions after the provider throttled us"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.metrics["throttled"] += 1
+        logger.warning(f"LLM provider throttled ({self.name}), pausing requests for {seconds:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            admitted = self.metrics["admitted"]
+            return {
+                "requests_per_minute": int(self.requests.capacity) if self.requests else 0,
+                "tokens_per_minute": int(self.tokens.capacity) if self.tokens else 0,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "queued": self._next_ticket - self._serving - len(self._abandoned),
+                **self.metrics,
+                "mean_queue_wait_seconds": round(self.metrics["queue_wait_seconds"] / admitted, 4) if admitted else 0.0
+            }
+
+
+class RateLimiterRegistry:
+    """One limiter per provider and model, configured from Settings"""
+
+    def __init__(self):
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: str) -> RateLimiter:
+        key = f"{provider}:{model}"
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                # "provider:model" overrides take precedence over "provider" overrides
+                overrides = settings.LLM_RATE_LIMITS.get(key) or settings.LLM_RATE_LIMITS.get(provider) or {}
+                limiter = self._limiters[key] = RateLimiter(
+                    key,
+                    requests_per_minute=overrides.get("requests_per_minute", settings.LLM_REQUESTS_PER_MINUTE),
+                    tokens_per_minute=overrides.get("tokens_per_minute", settings.LLM_TOKENS_PER_MINUTE),
+                    max_in_flight=overrides.get("max_in_flight", settings.LLM_MAX_IN_FLIGHT)
+                )
+            return limiter
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.get_stats() for key, limiter in limiters.items()}
+
+# Global rate limiters, shared by every LLMClient
+llm_rate_limiters = RateLimiterRegistry()
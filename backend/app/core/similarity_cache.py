@@ -0,0 +1,199 @@
+"""
+Near-duplicate cache for LLM responses
+Prompts whose variable part (e.g. the requirements) says the same thing in
+different words share a response. Texts are normalized (lowercase, stop words
+dropped, common synonyms folded), turned into word shingles and summarized as
+a MinHash signature; an LSH index finds candidates whose estimated Jaccard
+similarity is above a threshold. Entries live in memory only.
+"""
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import OrderedDict
+import hashlib
+import random
+import re
+import threading
+import time
+from app.core.config import settings
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for matching requirements
+_STOP_WORDS = {
+    "a", "an", "the", "and", "or", "with", "for", "to", "of", "in", "on", "that", "this", "which",
+    "is", "are", "be", "can", "should", "must", "will", "i", "we", "want", "need", "like", "some",
+    "simple", "basic", "build", "create", "make", "me", "my", "our", "using", "use", "allow", "allows",
+    "users", "user"
+}
+
+# Different words for the same thing in requirements, folded onto one term
+SYNONYMS = {
+    "todo": "task", "todos": "task", "tasks": "task", "checklist": "task",
+    "manager": "app", "management": "app", "application": "app", "tracker": "app",
+    "platform": "app", "system": "app", "tool": "app", "website": "app", "site": "app",
+    "login": "auth", "signin": "auth", "signup": "auth", "authentication": "auth", "authorization": "auth",
+    "register": "auth", "registration": "auth", "accounts": "auth", "account": "auth",
+    "shop": "store", "ecommerce": "store", "commerce": "store", "marketplace": "store",
+    "blog": "posts", "articles": "posts", "post": "posts",
+    "chat": "messaging", "messages": "messaging", "message": "messaging",
+    "dashboard": "admin", "panel": "admin", "analytics": "reports", "report": "reports",
+    "notifications": "alerts", "notification": "alerts", "reminders": "alerts", "reminder": "alerts",
+    "pictures": "images", "photos": "images", "photo": "images", "image": "images"
+}
+
+_PRIME = (1 << 61) - 1
+
+
+def normalize(text: str) -> List[str]:
+    """Meaningful words of text, with synonyms folded"""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOP_WORDS:
+            continue
+        words.append(SYNONYMS.get(word, word))
+    return words
+
+
+def shingles(text: str) -> Set[str]:
+    """Words and adjacent word pairs of the normalized text"""
+    words = normalize(text)
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class MinHasher:
+    """MinHash signatures from a fixed family of hash permutations"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features: Set[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            for feature in features
+        ] or [0]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the feature sets behind two signatures"""
+        return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class SimilarityCache:
+    """
+    Responses indexed by MinHash signature within a namespace. The namespace
+    holds everything that must match exactly (agent, model, prompt template);
+    only the text passed to lookup()/store() is compared fuzzily.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+        num_perm: int = 64,
+        bands: int = 16
+    ):
+        self.enabled = settings.LLM_SIMILARITY_CACHE_ENABLED if enabled is None else enabled
+        self.threshold = threshold or settings.LLM_SIMILARITY_THRESHOLD
+        self.max_entries = max_entries or settings.LLM_SIMILARITY_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL
+        self.hasher = MinHasher(num_perm)
+        # LSH banding: texts sharing any band of their signature become candidates
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+
+    def _band_keys(self, namespace: str, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [
+            (namespace, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def lookup(self, namespace: str, text: str) -> Optional[Dict[str, Any]]:
+        """Best cached match for text at or above the threshold: response, similarity and matched text"""
+        if not self.enabled:
+            return None
+        signature = self.hasher.signature(shingles(text))
+        now = time.time()
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(namespace, signature):
+                candidates |= self._buckets.get(key, set())
+
+            best, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry["expires_at"] <= now:
+                    self._remove(entry_id)
+                    self.metrics["expired"] += 1
+                    continue
+                score = MinHasher.similarity(signature, entry["signature"])
+                if score > best_score:
+                    best, best_score = entry_id, score
+
+            if best is None or best_score < self.threshold:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self.metrics["hits"] += 1
+            entry = self._entries[best]
+            return {"response": entry["response"], "similarity": round(best_score, 3), "matched_text": entry["text"]}
+
+    def store(self, namespace: str, text: str, response: str):
+        """Index a successful response under the signature of text"""
+        if not self.enabled or not response or not response.strip():
+            return
+        signature = self.hasher.signature(shingles(text))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "namespace": namespace,
+                "signature": signature,
+                "text": text[:500],
+                "response": response,
+                "expires_at": time.time() + self.ttl_seconds
+            }
+            for key in self._band_keys(namespace, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            self.metrics["writes"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.metrics["evictions"] += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for key in self._band_keys(entry["namespace"], entry["signature"]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                **self.metrics,
+                "hit_rate": round(self.metrics["hits"] / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+# Global near-duplicate response cache
+llm_similarity_cache = SimilarityCache()
@@ -0,0 +1,131 @@
+"""
+Single-flight coalescing of identical LLM requests
+While a request is in flight, identical requests wait for its result instead
+of calling the provider again. Unlike the response cache this also covers
+requests whose first copy has not finished yet. Works across event loops.
+"""
+from typing import Dict, Any, Callable, Awaitable, Optional
+import asyncio
+import concurrent.futures
+import threading
+from app.core.config import settings
+from app.core.llm_context import remaining_time, record_llm_coalesced, context_without_deadline, deadline_scope
+
+
+class _Flight:
+    """One in-flight request and the callers waiting for it"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.task: Optional[asyncio.Task] = None
+        # Thread-safe future, so callers on other loops can await the result
+        self.result: concurrent.futures.Future = concurrent.futures.Future()
+        self.waiters = 0
+
+
+def _consume_outcome(future: asyncio.Future):
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome with every caller"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.metrics = {"requests": 0, "coalesced": 0, "abandoned": 0}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return call()'s result, or that of an identical call already in flight.
+        The shared call runs in the first caller's context (stats) but not under
+        its deadline; each caller's own deadline bounds only its own wait, and
+        the call gets AGENT_TIMEOUT, at least as long as any caller's stage.
+        The call is cancelled once every caller waiting for it was cancelled. If
+        the last caller ran out of time instead, it keeps running to its own
+        deadline, so a hung provider is failed by its circuit breaker rather
+        than written off as abandoned, and a late response still gets cached.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.metrics["requests"] += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(loop)
+                # One caller's deadline must not fail the call for callers with more time
+                flight.task = context_without_deadline().run(loop.create_task, self._run(call))
+                flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+            else:
+                self.metrics["coalesced"] += 1
+                record_llm_coalesced()
+            flight.waiters += 1
+        return await self._wait(key, flight)
+
+    async def join(self, key: str) -> Optional[Any]:
+        """
+        Result of an identical call already in flight, waited for as in do(),
+        or None at once when there is none. For callers that would rather not
+        start a shared call themselves, such as streams.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                return None
+            self.metrics["requests"] += 1
+            self.metrics["coalesced"] += 1
+            record_llm_coalesced()
+            flight.waiters += 1
+        return await self._wait(key, flight)
+
+    async def _wait(self, key: str, flight: _Flight) -> Any:
+        waiter = asyncio.wrap_future(flight.result)
+        # A caller that gave up no longer retrieves the outcome; consume it so errors aren't logged as unhandled
+        waiter.add_done_callback(_consume_outcome)
+        timed_out = False
+        try:
+            # shield() keeps one caller's cancellation or timeout from cancelling the shared call
+            return await asyncio.wait_for(asyncio.shield(waiter), remaining_time())
+        except asyncio.TimeoutError:
+            timed_out = not flight.result.done()
+            raise
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0 and not flight.result.done() and not timed_out
+                if abandoned:
+                    self.metrics["abandoned"] += 1
+                    # Nobody may join a call that is about to be cancelled; later requests start a new one
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+            if abandoned:
+                flight.loop.call_soon_threadsafe(flight.task.cancel)
+
+    @staticmethod
+    async def _run(call: Callable[[], Awaitable[Any]]) -> Any:
+        with deadline_scope(settings.AGENT_TIMEOUT):
+            return await call()
+
+    def _finish(self, key: str, flight: _Flight, task: asyncio.Task):
+        with self._lock:
+            # Requests made from now on start a new flight
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        if task.cancelled():
+            flight.result.cancel()
+        elif task.exception() is not None:
+            flight.result.set_exception(task.exception())
+        else:
+            flight.result.set_result(task.result())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.metrics["requests"]
+            return {
+                **self.metrics,
+                "in_flight": len(self._flights),
+                "coalesced_rate": round(self.metrics["coalesced"] / requests, 3) if requests else 0.0
+            }
+
+# Global single-flight group shared by every LLMClient
+llm_single_flight = SingleFlight()
@@ -0,0 +1,60 @@
+"""
+Local token counting for prompts and completions
+Uses tiktoken's cl100k_base encoding and falls back to a characters-per-token
+estimate while the encoding is loading, or if it cannot be loaded. Counts are
+estimates either way; they are only used where a provider does not report its
+own usage.
+
+Loading the encoding may download it on first use, so it is loaded on a
+separate thread (started at server startup, or by the first count) and never
+on the event loop.
+"""
+from typing import Optional, Any
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_encoding: Optional[Any] = None
+_encoding_loaded = False
+_loading_started = False
+_lock = threading.Lock()
+
+
+def load_encoding() -> Optional[Any]:
+    """Load the tiktoken encoding once, blocking; None if it is unavailable"""
+    global _encoding, _encoding_loaded
+    with _lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # Not installed, or the encoding file could not be fetched
+                logger.info(f"tiktoken unavailable, estimating tokens from text length: {str(e)}")
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def preload_encoding():
+    """Start loading the encoding on a background thread, if not already started"""
+    global _loading_started
+    with _lock:
+        if _loading_started or _encoding_loaded:
+            return
+        _loading_started = True
+    threading.Thread(target=load_encoding, name="tiktoken-loader", daemon=True).start()
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in text"""
+    if not text:
+        return 0
+    if _encoding_loaded:
+        if _encoding is not None:
+            return len(_encoding.encode(text, disallowed_special=()))
+    else:
+        preload_encoding()
+    # Roughly 4 characters per token for English text and code
+    return len(text) // 4 + 1
@@ -2,6 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import projects, agents, websocket
+from app.core.background_loop import background_loop
+from app.core.http_pool import http_pool
+from app.core.token_counter import preload_encoding
+import asyncio
 import logging
 
 # Configure logging
@@ -51,7 +55,14 @@ async def health_check():
 async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"LLM Provider configured: Emergent + Gemini")
+    # May download the encoding; done on a thread so requests are served meanwhile
+    preload_encoding()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Multi-Agent Generator")
+    await http_pool.aclose()
+    if background_loop.running:
+        # The background loop has its own pooled client, closed on that loop
+        await asyncio.wrap_future(background_loop.submit(http_pool.aclose()))
+    background_loop.stop()
@@ -11,6 +11,8 @@ class Project(BaseModel):
     target_platforms: List[str] = []  # react, nextjs, react-native, electron, flutter
     requirements: str
     architecture_type: str = "modular"  # modular, microservices, monolithic
+    design_style: str = "modern"
+    workflow_profile: str = "full"  # fast, standard, full
     features: List[str] = []
     tech_stack: Dict[str, Any] = {}
     status: str = "pending"  # pending, in_progress, completed, failed
@@ -19,6 +21,9 @@ class Project(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     generated_code: Dict[str, Any] = {}  # Store generated code structure
     agent_logs: List[Dict[str, Any]] = []
+    last_run_id: Optional[str] = None  # Generation run whose stage checkpoints can be resumed
+    generation_metadata: Dict[str, Any] = {}  # Timings, stage timeline and critical path of the last run
+    token_usage: Dict[str, Any] = {}  # LLM tokens spent across all runs, in total and per agent
 
 class ProjectCreate(BaseModel):
     name: str
@@ -27,9 +32,21 @@ class ProjectCreate(BaseModel):
     app_type: str = "web"
     target_platforms: List[str] = ["react"]
     architecture_type: str = "modular"
+    design_style: str = "modern"
+    workflow_profile: str = "full"
 
 class ProjectUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    requirements: Optional[str] = None
+    app_type: Optional[str] = None
+    target_platforms: Optional[List[str]] = None
+    architecture_type: Optional[str] = None
+    design_style: Optional[str] = None
+    workflow_profile: Optional[str] = None
     status: Optional[str] = None
     progress: Optional[int] = None
     generated_code: Optional[Dict[str, Any]] = None
     agent_logs: Optional[List[Dict[str, Any]]] = None
+    last_run_id: Optional[str] = None
+    generation_metadata: Optional[Dict[str, Any]] = None
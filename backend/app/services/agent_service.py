@@ -1,6 +1,6 @@
 from typing import Optional, Dict, Any
 from app.models.agent import AgentTask, AgentTaskCreate
-from app.core.llm_client import LLMClient
+from app.agents.registry import agent_registry
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from datetime import datetime, timezone
@@ -13,7 +13,7 @@ class AgentService:
         self.client = AsyncIOMotorClient(mongo_url)
         self.db = self.client[os.environ.get('DB_NAME', 'agent_generator')]
         self.collection = self.db.agent_tasks
-        self.llm_client = LLMClient()
+        self.llm_client = agent_registry.get_llm_client("openai")
     
     async def create_task(self, task_data: AgentTaskCreate) -> AgentTask:
         """Create a new agent task"""
@@ -44,7 +44,7 @@ class AgentService:
     
     async def analyze_requirements(self, requirements_text: str) -> Dict[str, Any]:
         """Analyze requirements and suggest agent workflow"""
-        analysis = self.llm_client.analyze_requirements(requirements_text)
+        analysis = await self.llm_client.analyze_requirements_async(requirements_text)
         
         # Add suggested agent workflow
         workflow = self._suggest_workflow(analysis)
@@ -0,0 +1,48 @@
+from typing import Dict, Any, List
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from datetime import datetime, timezone
+
+class CheckpointService:
+    """Service for persisting completed generation stages so failed runs can resume"""
+    
+    def __init__(self):
+        mongo_url = os.environ.get('MONGO_URL')
+        self.client = AsyncIOMotorClient(mongo_url)
+        self.db = self.client[os.environ.get('DB_NAME', 'agent_generator')]
+        self.collection = self.db.generation_checkpoints
+    
+    async def save_stage(self, project_id: str, run_id: str, stage: str, result: Any, fingerprint: str):
+        """Store the result of a completed stage and the fingerprint of its inputs"""
+        await self.collection.update_one(
+            {"project_id": project_id, "run_id": run_id, "stage": stage},
+            {"$set": {
+                "result": result,
+                "fingerprint": fingerprint,
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+    
+    async def get_completed_stages(self, project_id: str, run_id: str) -> Dict[str, Dict[str, Any]]:
+        """Get {"fingerprint", "result"} for every completed stage of a run, keyed by stage"""
+        docs = await self.collection.find(
+            {"project_id": project_id, "run_id": run_id},
+            {"_id": 0}
+        ).to_list(1000)
+        return {
+            doc["stage"]: {"fingerprint": doc.get("fingerprint"), "result": doc["result"]}
+            for doc in docs
+        }
+    
+    async def delete_run(self, project_id: str, run_id: str) -> int:
+        """Delete all checkpoints for a run"""
+        result = await self.collection.delete_many({"project_id": project_id, "run_id": run_id})
+        return result.deleted_count
+    
+    async def delete_other_runs(self, project_id: str, keep_run_ids: List[str]) -> int:
+        """Delete the checkpoints of every run of a project except keep_run_ids"""
+        result = await self.collection.delete_many(
+            {"project_id": project_id, "run_id": {"$nin": [run_id for run_id in keep_run_ids if run_id]}}
+        )
+        return result.deleted_count
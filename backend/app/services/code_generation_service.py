@@ -34,7 +34,10 @@ class CodeGenerationService:
         
         try:
             # Run agents
-            agent_outputs = await self.orchestrator.orchestrate(project_config)
+            generation = await self.orchestrator.generate_application(project_config)
+            if generation["status"] != "completed":
+                raise RuntimeError(generation.get("error", "Agent workflow failed"))
+            agent_outputs = generation["stages"]
             
             # Generate code for each platform
             platforms = project_config.get("platforms", ["web"])
@@ -1,7 +1,11 @@
 from app.agents.orchestrator import AgentOrchestrator
 from app.services.project_service import ProjectService
+from app.services.checkpoint_service import CheckpointService
+from app.services.websocket_manager import websocket_manager
 from app.models.project import ProjectUpdate
+from typing import Dict, Any
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -10,9 +14,17 @@ class GenerationService:
     
     def __init__(self):
         self.project_service = ProjectService()
+        self.checkpoint_service = CheckpointService()
+        # Shared by all projects; each run keeps its own state
+        self.orchestrator = AgentOrchestrator(checkpoint_service=self.checkpoint_service)
     
-    async def generate_app(self, project_id: str):
-        """Generate application for a project"""
+    async def generate_app(self, project_id: str, resume: bool = False, incremental: bool = False):
+        """
+        Generate application for a project.
+        With resume=True, continue the project's last run and only execute
+        the stages that have no checkpoint yet. With incremental=True, start a
+        new run that reuses every stage of the last run whose inputs are unchanged.
+        """
         try:
             logger.info(f"Starting generation for project: {project_id}")
             
@@ -22,45 +34,79 @@ class GenerationService:
                 logger.error(f"Project not found: {project_id}")
                 return
             
-            # Update status to in_progress
+            previous_run_id = project.last_run_id
+            previous_stages = {}
+            if (resume or incremental) and previous_run_id:
+                previous_stages = await self.checkpoint_service.get_completed_stages(project_id, previous_run_id)
+                logger.info(f"Loaded {len(previous_stages)} checkpointed stages from run {previous_run_id} for project {project_id}")
+            
+            run_id = previous_run_id if resume and previous_run_id else str(uuid.uuid4())
+            
+            # Only the run being continued or reused from is ever read again; checkpoints of
+            # older runs (e.g. several failures in a row) would otherwise pile up
+            await self.checkpoint_service.delete_other_runs(project_id, [run_id, previous_run_id])
+            
+            # Update status to in_progress; components are filled in as stages finish
             await self.project_service.update_project(
                 project_id,
-                ProjectUpdate(status="in_progress", progress=10)
+                ProjectUpdate(status="in_progress", progress=10, last_run_id=run_id, generated_code={})
             )
             
-            # Create orchestrator with project_id for WebSocket broadcasting
-            orchestrator = AgentOrchestrator(project_id=project_id)
-            
-            # Generate application using orchestrator
-            result = await orchestrator.generate_application({
+            # Stream stage results from the orchestrator, persisting each one as it finishes
+            result = None
+            async for event in self.orchestrator.stream_application({
                 "name": project.name,
                 "requirements": project.requirements,
                 "app_type": project.app_type,
                 "target_platforms": project.target_platforms,
-                "architecture_type": project.architecture_type
-            })
+                "architecture_type": project.architecture_type,
+                "design_style": project.design_style,
+                "workflow_profile": project.workflow_profile
+            }, run_id=run_id, previous_stages=previous_stages, project_id=project_id):
+                if event["type"] == "stage_completed":
+                    await self._persist_stage(project_id, event)
+                else:
+                    result = event["results"]
+            
+            # Tokens were spent whether or not the run succeeded
+            if result["metadata"].get("token_usage"):
+                await self.project_service.add_token_usage(project_id, result["metadata"]["token_usage"])
             
             # Update project with results
             if result["status"] == "completed":
+                await self.project_service.update_generated_code(
+                    project_id,
+                    self.orchestrator.integration_summary(
+                        len(result["metadata"]["stage_order"]),
+                        result["metadata"]["execution_times"]
+                    )
+                )
                 await self.project_service.update_project(
                     project_id,
                     ProjectUpdate(
                         status="completed",
                         progress=100,
-                        generated_code=result.get("integrated_structure", {}),
-                        agent_logs=result.get("logs", [])
+                        agent_logs=result.get("logs", []),
+                        generation_metadata=result["metadata"]
                     )
                 )
+                await websocket_manager.broadcast_completion(project_id, True)
                 logger.info(f"Generation completed for project: {project_id}")
+                
+                # Reused stages were re-checkpointed under the new run
+                if previous_run_id and previous_run_id != run_id:
+                    await self.checkpoint_service.delete_run(project_id, previous_run_id)
             else:
                 await self.project_service.update_project(
                     project_id,
                     ProjectUpdate(
                         status="failed",
                         progress=0,
-                        agent_logs=result.get("logs", [])
+                        agent_logs=result.get("logs", []),
+                        generation_metadata=result["metadata"]
                     )
                 )
+                await websocket_manager.broadcast_completion(project_id, False)
                 logger.error(f"Generation failed for project: {project_id}")
         
         except Exception as e:
@@ -69,3 +115,14 @@ class GenerationService:
                 project_id,
                 ProjectUpdate(status="failed", progress=0)
             )
+    
+    async def _persist_stage(self, project_id: str, event: Dict[str, Any]):
+        """Store a finished stage under generated_code.components and push it to clients"""
+        progress = 10 + int(85 * event["completed_stages"] / event["total_stages"])
+        component = AgentOrchestrator.STAGE_COMPONENTS.get(event["stage"])
+        fields = {f"components.{component}": event["result"]} if component else {}
+        
+        await self.project_service.update_generated_code(project_id, fields, progress=progress)
+        await websocket_manager.broadcast_stage_result(
+            project_id, event["stage"], event["agent"], event["result"]
+        )
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from app.models.project import Project, ProjectCreate, ProjectUpdate
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
@@ -67,6 +67,39 @@ class ProjectService:
         
         return await self.get_project(project_id)
     
+    async def update_generated_code(self, project_id: str, fields: Dict[str, Any], progress: Optional[int] = None) -> bool:
+        """Set individual generated_code fields without replacing the whole document"""
+        update_dict = {f"generated_code.{key}": value for key, value in fields.items()}
+        if progress is not None:
+            update_dict['progress'] = progress
+        update_dict['updated_at'] = datetime.now(timezone.utc).isoformat()
+        
+        result = await self.collection.update_one(
+            {"id": project_id},
+            {"$set": update_dict}
+        )
+        return result.matched_count > 0
+    
+    async def get_generation_metadata(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get the last-run generation metadata of the most recently updated projects"""
+        docs = await self.collection.find(
+            {"generation_metadata.timeline": {"$exists": True}},
+            {"_id": 0, "id": 1, "generation_metadata": 1}
+        ).sort("updated_at", -1).to_list(limit)
+        return [doc["generation_metadata"] for doc in docs]
+    
+    async def add_token_usage(self, project_id: str, usage: Dict[str, Any]) -> bool:
+        """Add a run's token usage to the project's running totals"""
+        fields = ("input_tokens", "output_tokens", "total_tokens", "llm_calls")
+        increments = {f"token_usage.{field}": usage.get(field, 0) for field in fields}
+        increments["token_usage.runs"] = 1
+        for agent, counts in usage.get("by_agent", {}).items():
+            for field in fields:
+                increments[f"token_usage.by_agent.{agent}.{field}"] = counts.get(field, 0)
+        
+        result = await self.collection.update_one({"id": project_id}, {"$inc": increments})
+        return result.matched_count > 0
+    
     async def delete_project(self, project_id: str) -> bool:
         """Delete a project"""
         result = await self.collection.delete_one({"id": project_id})
@@ -89,6 +89,42 @@ class WebSocketManager:
         }
         await self.broadcast_to_project(project_id, message)
     
+    async def broadcast_stage_result(self, project_id: str, stage: str, agent_name: str, result: dict):
+        """Broadcast the result of a completed workflow stage"""
+        message = {
+            "type": "stage_result",
+            "project_id": project_id,
+            "stage": stage,
+            "agent": agent_name,
+            "result": result,
+            "timestamp": None
+        }
+        await self.broadcast_to_project(project_id, message)
+    
+    async def broadcast_agent_output_delta(
+        self,
+        project_id: str,
+        agent_name: str,
+        stage: str,
+        stream_id: str,
+        sequence: int,
+        delta: str,
+        code_blocks: List[dict] = None
+    ):
+        """Broadcast partial LLM output of an agent, plus any code blocks it completed"""
+        message = {
+            "type": "agent_output_delta",
+            "project_id": project_id,
+            "agent": agent_name,
+            "stage": stage,
+            "stream_id": stream_id,
+            "sequence": sequence,
+            "delta": delta,
+            "code_blocks": code_blocks or [],
+            "timestamp": None
+        }
+        await self.broadcast_to_project(project_id, message)
+    
     async def broadcast_log(self, project_id: str, log_message: str, log_level: str = "info"):
         """Broadcast a log message"""
         message = {
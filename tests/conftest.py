@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend is not an installed package; make `app` importable from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
@@ -0,0 +1,126 @@
+import time
+
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def _breaker(**kw):
+    options = dict(window_size=10, min_calls=4, error_rate_threshold=0.5,
+                   slow_call_seconds=5.0, open_seconds=0.05, half_open_probes=1)
+    options.update(kw)
+    return CircuitBreaker("test", **options)
+
+
+def _open(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.record_failure(0.1, "boom")
+    assert breaker.state == OPEN
+
+
+def _cool_down(breaker):
+    time.sleep(breaker.open_seconds + 0.01)
+
+
+def test_stays_closed_below_min_calls():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure(0.1, "boom")
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_opens_on_error_rate():
+    breaker = _breaker()
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1, "boom")
+    assert breaker.state == CLOSED
+    breaker.record_failure(0.1, "boom")
+    assert breaker.state == OPEN
+    assert "error rate" in breaker.last_trip_reason
+
+
+def test_opens_on_slow_p95():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_success(6.0)
+    assert breaker.state == OPEN
+    assert "p95" in breaker.last_trip_reason
+
+
+def test_open_rejects_until_cool_down():
+    breaker = _breaker()
+    _open(breaker)
+    assert not breaker.allow_request()
+    assert not breaker.is_available()
+    assert breaker.get_state()["rejected"] == 1
+    _cool_down(breaker)
+    assert breaker.is_available()
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_admits_limited_probes():
+    breaker = _breaker(half_open_probes=2)
+    _open(breaker)
+    _cool_down(breaker)
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes():
+    breaker = _breaker()
+    _open(breaker)
+    _cool_down(breaker)
+    assert breaker.allow_request()
+    breaker.record_success(0.0)
+    assert breaker.state == CLOSED
+    assert breaker.get_state()["recent_calls"] == 0
+
+
+def test_failed_or_slow_probe_reopens():
+    breaker = _breaker()
+    _open(breaker)
+    _cool_down(breaker)
+    assert breaker.allow_request()
+    breaker.record_failure(0.0, "boom")
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+    _cool_down(breaker)
+    assert breaker.allow_request()
+    # A probe slower than the brownout threshold reopens the circuit too
+    breaker._half_open_since -= 6.0
+    breaker.record_success(6.0)
+    assert breaker.state == OPEN
+    assert "half-open probe took" in breaker.last_trip_reason
+
+
+def test_abandoned_probe_frees_its_slot():
+    breaker = _breaker()
+    _open(breaker)
+    _cool_down(breaker)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_abandoned(0.0)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_calls_started_before_half_open_are_not_probes():
+    breaker = _breaker()
+    _open(breaker)
+    _cool_down(breaker)
+    assert breaker.allow_request()
+
+    # Calls admitted while the circuit was still closed finish during the probe
+    started_long_ago = 10.0
+    breaker.record_success(started_long_ago)
+    breaker.record_failure(started_long_ago, "late")
+    breaker.record_abandoned(started_long_ago)
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.0)
+    assert breaker.state == CLOSED
+    assert breaker._probes_in_flight == 0
@@ -0,0 +1,64 @@
+import asyncio
+import gc
+import warnings
+
+import pytest
+
+from app.core.concurrency import gather_limited
+
+
+def test_gather_limited_returns_results_by_name_within_limit():
+    running = 0
+    peak = 0
+
+    async def work(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return value * 2
+
+    results = asyncio.run(gather_limited({f"t{i}": work(i) for i in range(6)}, limit=2))
+
+    assert results == {f"t{i}": i * 2 for i in range(6)}
+    assert peak == 2
+
+
+def test_gather_limited_cancels_the_rest_when_one_fails():
+    cancelled = []
+
+    async def slow(name):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(gather_limited({"a": slow("a"), "b": failing(), "c": slow("c")}, limit=3))
+    assert sorted(cancelled) == ["a", "c"]
+
+
+def test_gather_limited_closes_awaitables_that_never_started():
+    async def main():
+        outside = asyncio.create_task(asyncio.sleep(10))
+        awaitables = {"first": asyncio.sleep(10), "coroutine": asyncio.sleep(10), "task": outside}
+        runner = asyncio.create_task(gather_limited(awaitables, limit=1))
+        await asyncio.sleep(0.01)
+        runner.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await runner
+        return outside
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        outside = asyncio.run(main())
+        gc.collect()
+
+    assert outside.cancelled()
+    assert not [w for w in caught if "was never awaited" in str(w.message)]
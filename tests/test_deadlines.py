@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.agents.workflow import STAGE_TIMED_OUT, WorkflowScheduler, WorkflowStage
+from app.core.llm_context import context_without_deadline, deadline_scope, remaining_time
+
+
+def _stage(key, run, critical=True, depends_on=None):
+    return WorkflowStage(key, key.title(), lambda outputs: None, run, depends_on=depends_on, critical=critical)
+
+
+def test_remaining_time_is_unbounded_outside_any_scope():
+    assert remaining_time() is None
+
+
+def test_nested_scopes_only_shorten_the_deadline():
+    with deadline_scope(1.0):
+        with deadline_scope(100.0):
+            assert remaining_time() <= 1.0
+        with deadline_scope(0.1):
+            assert remaining_time() <= 0.1
+        assert 0.1 < remaining_time() <= 1.0
+    assert remaining_time() is None
+
+
+def test_deadline_propagates_into_spawned_tasks():
+    async def main():
+        with deadline_scope(5.0):
+            return await asyncio.create_task(asyncio.sleep(0, remaining_time()))
+
+    assert 0 < asyncio.run(main()) <= 5.0
+
+
+def test_context_without_deadline_clears_only_the_deadline():
+    with deadline_scope(1.0):
+        assert context_without_deadline().run(remaining_time) is None
+        assert remaining_time() is not None
+
+
+def test_stage_deadline_bounds_llm_calls_inside_the_stage():
+    seen = {}
+
+    async def run(inputs):
+        seen["remaining"] = remaining_time()
+        return "ok"
+
+    scheduler = WorkflowScheduler([_stage("a", run)], stage_timeout=2.0)
+    assert asyncio.run(scheduler.run()) == {"a": "ok"}
+    assert 0 < seen["remaining"] <= 2.0
+
+
+def test_generation_deadline_caps_a_longer_stage_timeout():
+    seen = {}
+
+    async def run(inputs):
+        seen["remaining"] = remaining_time()
+
+    async def main():
+        with deadline_scope(0.5):
+            await WorkflowScheduler([_stage("a", run)], stage_timeout=60).run()
+
+    asyncio.run(main())
+    assert seen["remaining"] <= 0.5
+
+
+def test_critical_stage_timeout_fails_the_run():
+    async def slow(inputs):
+        await asyncio.sleep(10)
+
+    with pytest.raises(asyncio.TimeoutError, match="Stage 'a' timed out"):
+        asyncio.run(WorkflowScheduler([_stage("a", slow)], stage_timeout=0.05).run())
+
+
+def test_non_critical_stage_timeout_yields_a_marker_and_dependents_continue():
+    async def slow(inputs):
+        await asyncio.sleep(10)
+
+    async def after(inputs):
+        return "done"
+
+    scheduler = WorkflowScheduler(
+        [_stage("a", slow, critical=False), _stage("b", after, depends_on=["a"])], stage_timeout=0.05
+    )
+    outputs = asyncio.run(scheduler.run())
+    assert outputs["a"]["status"] == STAGE_TIMED_OUT
+    assert outputs["b"] == "done"
+    assert scheduler.timed_out == ["a"]
+
+
+def test_inner_timeout_without_stage_timeout_keeps_its_message():
+    async def inner_timeout(inputs):
+        raise asyncio.TimeoutError("read timed out")
+
+    with pytest.raises(asyncio.TimeoutError, match="read timed out"):
+        asyncio.run(WorkflowScheduler([_stage("a", inner_timeout)], stage_timeout=None).run())
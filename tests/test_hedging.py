@@ -0,0 +1,75 @@
+from app.core.hedging import Hedger
+
+
+def _hedger(**kw):
+    options = dict(percentile=90.0, budget=0.5, min_samples=10, min_delay=0.0)
+    options.update(kw)
+    return Hedger(**options)
+
+
+def test_no_delay_until_min_samples():
+    hedger = _hedger()
+    for _ in range(9):
+        hedger.observe("agent:model", 1.0)
+    assert hedger.hedge_delay("agent:model") is None
+    hedger.observe("agent:model", 1.0)
+    assert hedger.hedge_delay("agent:model") == 1.0
+    assert hedger.hedge_delay("other:model") is None
+
+
+def test_delay_is_the_latency_percentile():
+    hedger = _hedger()
+    for latency in range(1, 11):
+        hedger.observe("key", float(latency))
+    # The 90th percentile of 1..10 s
+    assert hedger.hedge_delay("key") == 10.0
+    hedger = _hedger(percentile=50.0)
+    for latency in range(1, 11):
+        hedger.observe("key", float(latency))
+    assert hedger.hedge_delay("key") == 6.0
+
+
+def test_delay_never_below_min_delay():
+    hedger = _hedger(min_delay=2.0)
+    for _ in range(10):
+        hedger.observe("key", 0.5)
+    assert hedger.hedge_delay("key") == 2.0
+
+
+def test_window_keeps_recent_latencies():
+    hedger = _hedger(window=10)
+    for _ in range(10):
+        hedger.observe("key", 9.0)
+    for _ in range(10):
+        hedger.observe("key", 1.0)
+    assert hedger.hedge_delay("key") == 1.0
+
+
+def test_unfinished_calls_only_raise_the_percentile():
+    hedger = _hedger()
+    for _ in range(10):
+        hedger.observe("key", 1.0)
+    hedger.observe_unfinished("key", 0.2)
+    assert hedger.get_stats()["keys"]["key"]["samples"] == 10
+    for _ in range(5):
+        hedger.observe_unfinished("key", 8.0)
+    assert hedger.hedge_delay("key") == 8.0
+
+
+def test_unfinished_calls_ignored_without_history():
+    hedger = _hedger()
+    hedger.observe_unfinished("key", 0.1)
+    assert "key" not in hedger.get_stats()["keys"]
+
+
+def test_budget_caps_hedges():
+    hedger = _hedger(budget=0.25)
+    assert not hedger.try_hedge()
+    for _ in range(4):
+        hedger.request_started()
+    assert hedger.try_hedge()
+    assert not hedger.try_hedge()
+    stats = hedger.get_stats()
+    assert stats["hedged"] == 1
+    assert stats["budget_denied"] == 2
+    assert stats["hedge_rate"] == 0.25
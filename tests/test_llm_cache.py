@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+from app.core.llm_cache import LLMResponseCache
+
+
+def _cache(tmp_path, **kwargs):
+    return LLMResponseCache(path=str(tmp_path / "cache.db"), enabled=True, **kwargs)
+
+
+def test_disk_totals_track_writes_replacements_and_evictions(tmp_path):
+    cache = _cache(tmp_path, max_entries=5, max_disk_bytes=2000, ttl_seconds=100)
+    for index in range(30):
+        cache.set(f"k{index}", "x" * 100)
+    cache.set("k29", "y" * 50)
+
+    stats = cache.get_stats()
+    actual = sqlite3.connect(str(tmp_path / "cache.db")).execute(
+        "SELECT COUNT(*), SUM(size) FROM responses"
+    ).fetchone()
+    assert (stats["disk_entries"], stats["disk_bytes"]) == actual == (20, 1950)
+    assert stats["disk_evictions"] == 10
+    assert cache.get("k0") is None
+    assert cache.get("k29") == "y" * 50
+
+
+def test_disk_totals_survive_a_restart(tmp_path):
+    _cache(tmp_path).set("key", "response")
+    stats = _cache(tmp_path).get_stats()
+    assert (stats["disk_entries"], stats["disk_bytes"]) == (1, len("response"))
+
+
+def test_expired_entries_are_dropped_from_both_tiers(tmp_path):
+    cache = _cache(tmp_path, max_entries=1, ttl_seconds=0.05)
+    cache.set("a", "first")
+    cache.set("b", "second")
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get_stats()["disk_entries"] == 0
+
+
+def test_memory_lookups_do_not_wait_for_the_disk_tier(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("key", "response")
+    with cache._disk_lock:
+        assert cache._get_memory("key") == "response"
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = _cache(tmp_path)
+    cache.set("key", "response")
+    cache.clear()
+    assert cache.get("key") is None
+    assert cache.get_stats()["disk_entries"] == 0
@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.llm_context import deadline_scope
+from app.core.rate_limiter import RateLimiter, throttle_delay
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    limiter = RateLimiter("test", max_in_flight=1)
+    order = []
+
+    async def request(index):
+        async with limiter.slot(1):
+            order.append(index)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        tasks = []
+        for index in range(5):
+            tasks.append(asyncio.create_task(request(index)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.get_stats()["in_flight"] == 0
+
+
+def test_abandoned_waiter_does_not_block_the_queue():
+    limiter = RateLimiter("test", max_in_flight=1)
+    admitted = []
+
+    async def request(index, hold):
+        async with limiter.slot(1):
+            admitted.append(index)
+            await asyncio.sleep(hold)
+
+    async def main():
+        first = asyncio.create_task(request(0, 0.05))
+        await asyncio.sleep(0)
+        abandoned = asyncio.create_task(request(1, 0))
+        await asyncio.sleep(0)
+        last = asyncio.create_task(request(2, 0))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        await asyncio.gather(first, last)
+
+    asyncio.run(main())
+    assert admitted == [0, 2]
+    assert limiter.get_stats()["queued"] == 0
+
+
+def test_queue_wait_is_bounded_by_the_callers_deadline():
+    limiter = RateLimiter("test", max_in_flight=1)
+
+    async def main():
+        async with limiter.slot(1):
+            with deadline_scope(0.05):
+                with pytest.raises(asyncio.TimeoutError):
+                    async with limiter.slot(1):
+                        pass
+
+    asyncio.run(main())
+
+
+def test_requests_per_minute_bucket_delays_admission():
+    # 600/min refills one request every 0.1s once the burst is used up
+    limiter = RateLimiter("test", requests_per_minute=600)
+    limiter.requests.level = 1
+
+    async def main():
+        started = time.monotonic()
+        for _ in range(2):
+            async with limiter.slot(1):
+                pass
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.09
+
+
+def test_oversized_token_estimate_is_capped_to_the_bucket():
+    limiter = RateLimiter("test", tokens_per_minute=100)
+
+    async def main():
+        async with limiter.slot(10_000) as lease:
+            return lease.tokens
+
+    assert asyncio.run(main()) == 100
+
+
+def test_backoff_pauses_admissions():
+    limiter = RateLimiter("test")
+
+    async def main():
+        limiter.backoff(0.1)
+        started = time.monotonic()
+        async with limiter.slot(1):
+            return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.09
+    assert limiter.get_stats()["throttled"] == 1
+
+
+def test_settle_returns_unused_tokens():
+    limiter = RateLimiter("test", tokens_per_minute=1000)
+
+    async def main():
+        async with limiter.slot(500) as lease:
+            lease.settle(100)
+
+    asyncio.run(main())
+    assert limiter.tokens.level == pytest.approx(900, abs=5)
+
+
+def _status_error(status, headers=None):
+    request = httpx.Request("POST", "http://provider")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status, headers=headers or {}))
+
+
+def test_throttle_delay_reads_retry_after():
+    assert throttle_delay(_status_error(429, {"Retry-After": "3"})) == 3.0
+
+
+def test_throttle_delay_ignores_other_errors():
+    assert throttle_delay(_status_error(500)) is None
+    assert throttle_delay(RuntimeError("connection reset")) is None
+
+
+def test_throttle_delay_recognizes_sdk_rate_limit_messages():
+    assert throttle_delay(RuntimeError("Rate limit exceeded")) is not None
@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm_context import deadline_scope, remaining_time
+from app.core.single_flight import SingleFlight
+
+
+def test_identical_calls_share_one_call():
+    group = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", call) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["response"] * 3
+    assert len(calls) == 1
+    stats = group.get_stats()
+    assert stats["requests"] == 3
+    assert stats["coalesced"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_errors_reach_every_caller():
+    group = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider failed")
+
+    async def main():
+        return await asyncio.gather(*(group.do("key", call) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_finished_calls_are_not_reused():
+    group = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return [await group.do("key", call), await group.do("key", call)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_shared_call_has_its_own_deadline():
+    group = SingleFlight()
+    seen = []
+
+    async def call():
+        seen.append(remaining_time())
+        await asyncio.sleep(0.1)
+        return "response"
+
+    async def short_caller():
+        with deadline_scope(0.02):
+            return await group.do("key", call)
+
+    async def main():
+        first = asyncio.create_task(short_caller())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(group.do("key", call))
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    # The caller that created the call timed out; the one with more time still got the result
+    assert isinstance(first, asyncio.TimeoutError)
+    assert second == "response"
+    assert seen[0] == pytest.approx(settings.AGENT_TIMEOUT, abs=1.0)
+
+
+def test_hung_call_times_out(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_TIMEOUT", 0.05)
+    group = SingleFlight()
+
+    async def call():
+        await asyncio.wait_for(asyncio.sleep(10), remaining_time())
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(group.do("key", call))
+    assert group.get_stats()["in_flight"] == 0
+
+
+def test_cancelled_callers_abandon_the_call():
+    group = SingleFlight()
+    cancelled = []
+
+    async def call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        callers = [asyncio.create_task(group.do("key", call)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        callers[0].cancel()
+        await asyncio.sleep(0.01)
+        # One caller is still waiting, so the call goes on
+        assert not cancelled
+        callers[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert cancelled == [1]
+    stats = group.get_stats()
+    assert stats["abandoned"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_caller_after_abandonment_starts_a_new_call():
+    group = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.02 if len(calls) > 1 else 10)
+        return "response"
+
+    async def main():
+        first = asyncio.create_task(group.do("key", call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        # Joins before the abandoned call has finished cancelling
+        return await group.do("key", call)
+
+    assert asyncio.run(main()) == "response"
+    assert len(calls) == 2
+
+
+def test_call_outlives_callers_that_ran_out_of_time():
+    group = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def impatient():
+        with deadline_scope(0.01):
+            return await group.do("key", call)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient()
+        # The call keeps running, so a retry joins it instead of starting over
+        assert group.get_stats()["in_flight"] == 1
+        return await group.do("key", call)
+
+    assert asyncio.run(main()) == "response"
+    assert len(calls) == 1
+    assert group.get_stats()["abandoned"] == 0
+
+
+def test_join_waits_only_for_a_call_in_flight():
+    group = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def main():
+        assert await group.join("key") is None
+        first = asyncio.create_task(group.do("key", call))
+        await asyncio.sleep(0)
+        joined = await group.join("key")
+        return joined, await first
+
+    assert asyncio.run(main()) == ("response", "response")
+    stats = group.get_stats()
+    assert stats["requests"] == 2
+    assert stats["coalesced"] == 1
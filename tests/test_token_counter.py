@@ -0,0 +1,44 @@
+import threading
+
+from app.core import token_counter
+
+
+class _Encoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+def _reset(monkeypatch, loaded=False, encoding=None):
+    monkeypatch.setattr(token_counter, "_encoding", encoding)
+    monkeypatch.setattr(token_counter, "_encoding_loaded", loaded)
+    monkeypatch.setattr(token_counter, "_loading_started", False)
+
+
+def test_estimates_while_the_encoding_loads(monkeypatch):
+    _reset(monkeypatch)
+    release = threading.Event()
+    started = []
+
+    def slow_load():
+        started.append(1)
+        release.wait(5)
+
+    monkeypatch.setattr(token_counter, "load_encoding", slow_load)
+    try:
+        assert token_counter.count_tokens("a" * 40) == 11
+        assert token_counter.count_tokens("a" * 40) == 11
+    finally:
+        release.set()
+    # Only one loader thread was started
+    assert started == [1]
+
+
+def test_uses_the_encoding_once_loaded(monkeypatch):
+    _reset(monkeypatch, loaded=True, encoding=_Encoding())
+    assert token_counter.count_tokens("three short words") == 3
+    assert token_counter.count_tokens("") == 0
+
+
+def test_falls_back_when_the_encoding_is_unavailable(monkeypatch):
+    _reset(monkeypatch, loaded=True, encoding=None)
+    assert token_counter.count_tokens("a" * 8) == 3